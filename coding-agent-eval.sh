@@ -12,7 +12,22 @@ BASE_DIR="${BASE_DIR:-$(dirname "$0")/eval_results_$(date +%y%m%d)}"
 PYTHON_BIN="${PYTHON_BIN:-python3}"
 NPM_BIN="${NPM_BIN:-npm}"
 TIMEOUT_SEC="${TIMEOUT_SEC:-2400}"   # 40m per agent
-RESULTS_CSV="$BASE_DIR/results.csv"
+LIVE_PORT=""            # if set, serve a live report on this localhost port
+JOBS=""                 # cells running at once (default: one per agent; 1 in serial mode)
+AGENT_JOBS=()           # --agent-jobs AGENT=N caps, passed to lib/orchestrate.py
+CELL_MODE=0             # internal: --cell TASK RUN_ID AGENT runs one cell and exits
+RESUME=0                # finish an interrupted run in BASE_DIR instead of starting over
+LOG_CAP_MB="${LOG_CAP_MB:-64}"   # agent output kept per generation log (head + tail)
+ADMISSION="${ADMISSION:-1}"                  # wait for CPU/memory/disk before each phase
+ADMIT_MAX_LOAD="${ADMIT_MAX_LOAD:-}"         # runnable tasks allowed (default: CPU count)
+ADMIT_MIN_MEM_MB="${ADMIT_MIN_MEM_MB:-}"     # MemAvailable to keep free (default: 512)
+ADMIT_MIN_DISK_MB="${ADMIT_MIN_DISK_MB:-}"   # disk to keep free under BASE_DIR (default: 1024)
+VENV_CACHE="${VENV_CACHE:-1}"                # clone Python acceptance venvs from lib/venvcache.py
+VENV_CACHE_DIR="${VENV_CACHE_DIR:-}"         # (default: ~/.cache/coding-agent-eval/venvs)
+NODE_CACHE="${NODE_CACHE:-1}"                # link npm acceptance node_modules from lib/nodecache.py
+NODE_CACHE_DIR="${NODE_CACHE_DIR:-}"         # (default: ~/.cache/coding-agent-eval/node_modules)
+ACCEPT_CACHE="${ACCEPT_CACHE:-1}"            # reuse acceptance outcomes of identical projects
+TRANSCRIPTS="${TRANSCRIPTS:-0}"              # log Claude as stream-json for lib/transcripts.py
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -22,6 +37,22 @@ while [[ $# -gt 0 ]]; do
     --base-dir) BASE_DIR="$2"; shift 2;;
     --timeout) TIMEOUT_SEC="$2"; shift 2;;
     --runs) RUNS="$2"; shift 2;;
+    --live) LIVE_PORT="$2"; shift 2;;
+    --jobs) JOBS="$2"; shift 2;;
+    --agent-jobs) AGENT_JOBS+=(--agent-jobs "$2"); shift 2;;
+    --max-load) ADMIT_MAX_LOAD="$2"; shift 2;;
+    --min-free-mem) ADMIT_MIN_MEM_MB="$2"; shift 2;;
+    --min-free-disk) ADMIT_MIN_DISK_MB="$2"; shift 2;;
+    --no-admission) ADMISSION=0; shift;;
+    --venv-cache) VENV_CACHE_DIR="$2"; shift 2;;
+    --no-venv-cache) VENV_CACHE=0; shift;;
+    --node-cache) NODE_CACHE_DIR="$2"; shift 2;;
+    --no-node-cache) NODE_CACHE=0; shift;;
+    --no-accept-cache) ACCEPT_CACHE=0; shift;;
+    --resume) RESUME=1; shift;;
+    --log-cap) LOG_CAP_MB="$2"; shift 2;;
+    --transcripts) TRANSCRIPTS=1; shift;;
+    --cell) CELL_MODE=1; TASK="$2"; CELL_RUN_ID="$3"; CELL_AGENT="$4"; shift 4;;
     --help|-h)
       # Discover available tasks dynamically for help
       help_tasks=($(ls -1 "$(dirname "$0")/prompts"/*.txt 2>/dev/null | sed 's|.*/||; s|\.txt$||' | sort))
@@ -37,6 +68,23 @@ while [[ $# -gt 0 ]]; do
       echo "  --runs N           Number of runs per agent (default: 1)"
       echo "  --base-dir DIR     Base directory for output (default: ./eval_results_YYMMDD)"
       echo "  --timeout SEC      Timeout per agent in seconds (default: 2400)"
+      echo "  --resume           Run only the cells an interrupted run in the base dir did not finish"
+      echo "  --log-cap MB       Agent output kept per generation log, head and tail (default: 64)"
+      echo "  --transcripts      Log Claude's turns, tool calls and tokens as stream-json"
+      echo "                     (counted in metrics.csv; replaces its plain console output)"
+      echo "  --jobs N           Cells (task, agent, run) running at once"
+      echo "                     (default: one cell per agent at a time; 1 in serial mode)"
+      echo "  --agent-jobs A=N   At most N cells of agent A at once (repeatable)"
+      echo "  --max-load N       Start a phase only while runnable tasks stay <= N (default: CPUs)"
+      echo "  --min-free-mem MB  ... and MemAvailable stays >= MB (default: 512)"
+      echo "  --min-free-disk MB ... and free disk under the base dir stays >= MB (default: 1024)"
+      echo "  --no-admission     Start phases without checking host resources"
+      echo "  --venv-cache DIR   Cache of prebuilt Python venvs (default: ~/.cache/coding-agent-eval/venvs)"
+      echo "  --no-venv-cache    Create and pip install every acceptance venv from scratch"
+      echo "  --node-cache DIR   Store of installed node_modules (default: ~/.cache/coding-agent-eval/node_modules)"
+      echo "  --no-node-cache    Run npm ci in every npm acceptance workspace"
+      echo "  --no-accept-cache  Run acceptance even for projects whose outcome is cached"
+      echo "  --live PORT        Serve live results on http://127.0.0.1:PORT/ while running"
       echo "  --help, -h         Show this help message"
       echo ""
       echo "Examples:"
@@ -45,6 +93,7 @@ while [[ $# -gt 0 ]]; do
       echo "  $0 --agent claude            # Run only Claude on ALL tasks"
       echo "  $0 --task ${help_tasks[1]:-task} --mode serial  # Run specific task in serial mode"
       echo "  $0 --agent gemini --runs 3   # Run Gemini 3 times on ALL tasks"
+      echo "  $0 --runs 5 --jobs 6 --agent-jobs gemini=1  # 6 cells at a time, one Gemini"
       exit 0;;
     *) echo "Unknown arg: $1. Use --help for usage information."; exit 1;;
   esac
@@ -53,23 +102,35 @@ done
 # =========================
 # Directory Management with Backup
 # =========================
-# If BASE_DIR exists, create a backup with timestamp
-if [[ -d "$BASE_DIR" ]]; then
-  BACKUP_DIR="${BASE_DIR}_backup_$(date +%H%M%S)"
-  echo "Directory $BASE_DIR exists, backing up to $BACKUP_DIR"
-  mv "$BASE_DIR" "$BACKUP_DIR"
-fi
+# (A --cell invocation from lib/orchestrate.py reuses the prepared BASE_DIR)
+if [[ $CELL_MODE -eq 0 ]]; then
+  # Backups and finished runs share identical files through a hardlinked
+  # object store next to BASE_DIR
+  SNAPSHOT_PY="$(dirname "$0")/lib/snapshot.py"
+
+  # If BASE_DIR exists, create a backup with timestamp (or, with --resume,
+  # carry on with the run it holds)
+  if [[ $RESUME -eq 1 && -d "$BASE_DIR" ]]; then
+    echo "Resuming the run in $BASE_DIR"
+  elif [[ -d "$BASE_DIR" ]]; then
+    BACKUP_DIR="${BASE_DIR}_backup_$(date +%H%M%S)"
+    echo "Directory $BASE_DIR exists, backing up to $BACKUP_DIR"
+    mv "$BASE_DIR" "$BACKUP_DIR"
+    "$PYTHON_BIN" "$SNAPSHOT_PY" dedupe "$BACKUP_DIR" || echo "Warning: failed to dedupe $BACKUP_DIR"
+  fi
 
-# Create fresh BASE_DIR
-mkdir -p "$BASE_DIR"
+  # Create fresh BASE_DIR
+  mkdir -p "$BASE_DIR"
 
-# Ensure .gitignore exists and includes eval_results_* pattern
-GITIGNORE_FILE="$(dirname "$0")/.gitignore"
-if [[ ! -f "$GITIGNORE_FILE" ]]; then
-  echo "Creating .gitignore file..."
-  cat > "$GITIGNORE_FILE" << 'GITIGNORE'
+  # Ensure .gitignore exists and includes the eval_results_* pattern and the
+  # object store deduplicated results link into (lib/snapshot.py)
+  GITIGNORE_FILE="$(dirname "$0")/.gitignore"
+  if [[ ! -f "$GITIGNORE_FILE" ]]; then
+    echo "Creating .gitignore file..."
+    cat > "$GITIGNORE_FILE" << 'GITIGNORE'
 # Evaluation results directories
 eval_results_*
+.eval-objects/
 
 # Temporary files
 /tmp/
@@ -87,31 +148,50 @@ eval_results_*
 .DS_Store
 Thumbs.db
 GITIGNORE
-else
-  # Check if eval_results_* pattern is already in .gitignore
-  if ! grep -q "eval_results_" "$GITIGNORE_FILE" 2>/dev/null; then
-    echo "Adding eval_results_* pattern to existing .gitignore"
-    echo "" >> "$GITIGNORE_FILE"
-    echo "# Evaluation results directories" >> "$GITIGNORE_FILE"
-    echo "eval_results_*" >> "$GITIGNORE_FILE"
+  else
+    # Check if eval_results_* pattern is already in .gitignore
+    if ! grep -q "eval_results_" "$GITIGNORE_FILE" 2>/dev/null; then
+      echo "Adding eval_results_* pattern to existing .gitignore"
+      echo "" >> "$GITIGNORE_FILE"
+      echo "# Evaluation results directories" >> "$GITIGNORE_FILE"
+      echo "eval_results_*" >> "$GITIGNORE_FILE"
+    fi
+    if ! grep -q "^\.eval-objects" "$GITIGNORE_FILE" 2>/dev/null; then
+      echo "Adding .eval-objects/ to existing .gitignore"
+      echo ".eval-objects/" >> "$GITIGNORE_FILE"
+    fi
   fi
-fi
 
-# Clean up old backup directories (keep only last 5 backups)
-cleanup_old_backups() {
-  local base_pattern="$(basename "$BASE_DIR")_backup_"
-  local backup_dir="$(dirname "$BASE_DIR")"
-  local backup_count=$(find "$backup_dir" -maxdepth 1 -name "${base_pattern}*" -type d 2>/dev/null | wc -l)
-
-  if [[ $backup_count -gt 5 ]]; then
-    echo "Cleaning up old backups (keeping newest 5)..."
-    # List backups sorted by modification time, remove oldest ones
-    find "$backup_dir" -maxdepth 1 -name "${base_pattern}*" -type d -print0 2>/dev/null | \
-      xargs -0 ls -dt | tail -n +6 | xargs rm -rf 2>/dev/null || true
+  # Clean up old backup directories (keep only last 5 backups)
+  cleanup_old_backups() {
+    local base_pattern="$(basename "$BASE_DIR")_backup_"
+    local backup_dir="$(dirname "$BASE_DIR")"
+    local backup_count=$(find "$backup_dir" -maxdepth 1 -name "${base_pattern}*" -type d 2>/dev/null | wc -l)
+
+    if [[ $backup_count -gt 5 ]]; then
+      echo "Cleaning up old backups (keeping newest 5)..."
+      # List backups sorted by modification time, remove oldest ones
+      find "$backup_dir" -maxdepth 1 -name "${base_pattern}*" -type d -print0 2>/dev/null | \
+        xargs -0 ls -dt | tail -n +6 | xargs rm -rf 2>/dev/null || true
+      # Drop the objects only those backups used
+      "$PYTHON_BIN" "$SNAPSHOT_PY" gc "$backup_dir" || true
+    fi
+  }
+
+  cleanup_old_backups
+
+  # Cells cd into their workspaces, so every path below must be absolute
+  BASE_DIR="$(cd "$BASE_DIR" && pwd)"
+  if [[ -n "$VENV_CACHE_DIR" ]]; then
+    mkdir -p "$VENV_CACHE_DIR" && VENV_CACHE_DIR="$(cd "$VENV_CACHE_DIR" && pwd)"
   fi
-}
+  if [[ -n "$NODE_CACHE_DIR" ]]; then
+    mkdir -p "$NODE_CACHE_DIR" && NODE_CACHE_DIR="$(cd "$NODE_CACHE_DIR" && pwd)"
+  fi
+fi
 
-cleanup_old_backups
+RESULTS_CSV="$BASE_DIR/results.csv"
+TIMELINE_CSV="$BASE_DIR/timeline.csv"
 
 # Validate --mode parameter
 case "$MODE" in
@@ -155,6 +235,10 @@ fi
 # =========================
 # Claude Code: print mode skips trust dialog, bypass permissions for automated execution; no API key check here—if not authed, the run will fail and be logged.
 CLAUDE_CMD=${CLAUDE_CMD:-'claude -p --max-turns 50 --dangerously-skip-permissions --verbose'}
+# --transcripts: stream-json logs every turn and tool call for lib/transcripts.py
+if [[ $TRANSCRIPTS -eq 1 && "$CLAUDE_CMD" != *--output-format* ]]; then
+  CLAUDE_CMD+=" --output-format stream-json"
+fi
 
 # Copilot CLI: interactive mode; restrict dangerous tools but allow prompts.
 COPILOT_FLAGS=${COPILOT_FLAGS:-"--allow-all-tools --allow-tool write --allow-tool shell --allow-tool 'shell(mkdir)' --deny-tool 'shell(rm)' --deny-tool 'shell(git_push)'"}
@@ -168,8 +252,10 @@ GEMINI_CMD=${GEMINI_CMD:-"gemini $GEMINI_FLAGS"}
 # Trust / permissions (avoid prompts)
 # =========================
 COPILOT_CFG_DIR="$BASE_DIR/copilot-config"
-mkdir -p "$COPILOT_CFG_DIR"
-printf '{ "trusted_folders": ["%s"] }\n' "$BASE_DIR" > "$COPILOT_CFG_DIR/config.json"
+if [[ $CELL_MODE -eq 0 ]]; then
+  mkdir -p "$COPILOT_CFG_DIR"
+  printf '{ "trusted_folders": ["%s"] }\n' "$BASE_DIR" > "$COPILOT_CFG_DIR/config.json"
+fi
 export XDG_CONFIG_HOME="$COPILOT_CFG_DIR"
 
 CLAUDE_SETTINGS='{
@@ -189,6 +275,7 @@ CLAUDE_SETTINGS='{
 # =========================
 SCRIPT_DIR="$(dirname "$0")"
 PROMPTS_DIR="$SCRIPT_DIR/prompts"
+LIB_DIR="$(cd "$SCRIPT_DIR" && pwd)/lib"
 
 # Check if prompts directory exists
 if [[ ! -d "$PROMPTS_DIR" ]]; then
@@ -218,45 +305,145 @@ else
     exit 1
   fi
   TASKS_TO_RUN=("$TASK")
-  echo "Running specific task: $TASK"
+  [[ $CELL_MODE -eq 1 ]] || echo "Running specific task: $TASK"
 fi
 
-echo "Tasks to execute: ${TASKS_TO_RUN[*]}"
+[[ $CELL_MODE -eq 1 ]] || echo "Tasks to execute: ${TASKS_TO_RUN[*]}"
 
 # =========================
 # Helpers
 # =========================
 timestamp() { date +%s; }
 
-# Safe function to append to CSV results file with simple locking
-append_to_csv() {
-  local line="$1"
-  local lockfile="${RESULTS_CSV}.lock"
-  local max_wait=30
-  local wait_count=0
-
-  # Ensure the directory exists
-  mkdir -p "$(dirname "$RESULTS_CSV")"
-
-  # Simple file-based locking for cross-platform compatibility
-  while [[ -f "$lockfile" && $wait_count -lt $max_wait ]]; do
-    sleep 0.1
-    ((wait_count++))
+# Wall-clock seconds with sub-second precision (EPOCHREALTIME needs bash 5;
+# older shells such as macOS's bash 3.2 ask Python instead)
+now() {
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    echo "${EPOCHREALTIME/,/.}"
+  else
+    "$PYTHON_BIN" -c 'import time; print("%.6f" % time.time())'
+  fi
+}
+
+# results.csv schema v2 (see lib/results.py): the v1 columns, with Time(min)
+# in decimal minutes, followed by wall seconds and exit code per phase
+TIMELINE_HEADER="Task,RunId,Agent,Phase,Start,End,ExitCode,UserCPU(s),SysCPU(s),MaxRSS(KB),InBlocks,OutBlocks,VolCtx,InvolCtx"
+RESULTS_HEADER="Task,RunId,Agent,Success(Y/N),Time(min),Setup(s),Setup(ec),Generation(s),Generation(ec),Venv(s),Venv(ec),Install(s),Install(ec),Tests(s),Tests(ec),Headless(s),Headless(ec)"
+PHASE_NAMES=(setup generation venv install tests headless)
+
+# Forget the phases recorded for the previous cell
+reset_phases() {
+  local p
+  for p in "${PHASE_NAMES[@]}"; do
+    printf -v "PHASE_S_$p" '%s' ""
+    printf -v "PHASE_EC_$p" '%s' ""
   done
+}
+
+# record_phase NAME START EXIT_CODE: NAME ran from START (a `now` value) until
+# now.  Besides the results.csv columns, every phase of the current cell
+# (CELL="task,run_id,agent") gets a line in timeline.csv for the report's
+# execution timeline, with the resource usage `supervise` left in
+# RUSAGE_FILE, if any.  Timeline rows skip the fsync: a crash can at worst
+# cost the chart its last few bars.
+record_phase() {
+  local end=$(now) usage=",,,,,,,"
+  printf -v "PHASE_S_$1" '%s' "$(awk -v a="$2" -v b="$end" 'BEGIN { printf "%.3f", b - a }')"
+  printf -v "PHASE_EC_$1" '%s' "$3"
+  if [[ -n "${RUSAGE_FILE:-}" && -s "$RUSAGE_FILE" ]]; then
+    usage=",$(<"$RUSAGE_FILE")"
+    : > "$RUSAGE_FILE"
+  fi
+  append_csv "$TIMELINE_CSV" "$TIMELINE_HEADER" "$CELL,$1,$2,$end,$3$usage" --no-sync
+}
 
-  # Create lock file
-  echo $$ > "$lockfile" 2>/dev/null || return 1
+# supervise CMD...: run CMD under lib/rusage.py, which reaps it with wait4
+# and leaves its CPU time, peak RSS, block I/O and context switches in
+# RUSAGE_FILE for record_phase; returns CMD's exit code
+supervise() {
+  "$PYTHON_BIN" "$LIB_DIR/rusage.py" run ${RUSAGE_FILE:+--out "$RUSAGE_FILE"} -- "$@"
+}
+
+# admit PHASE: block until the host has room for PHASE (lib/admission.py)
+# and add the time spent waiting to ADMIT_WAIT_S, which is not reported as
+# time the cell took
+admit() {
+  [[ $ADMISSION -eq 1 ]] || return 0
+  local waited
+  waited=$("$PYTHON_BIN" "$LIB_DIR/admission.py" acquire --state "$BASE_DIR/.admission.json" \
+    --owner $$ --phase "$1") || return 0
+  ADMIT_WAIT_S=$(awk -v a="$ADMIT_WAIT_S" -v b="$waited" 'BEGIN { printf "%.3f", a + b }')
+}
+
+# Drop this cell's reservation once it has nothing left to run
+release_admission() {
+  [[ $ADMISSION -eq 1 ]] || return 0
+  "$PYTHON_BIN" "$LIB_DIR/admission.py" release --state "$BASE_DIR/.admission.json" --owner $$ || true
+}
+
+# run_phase NAME CMD...: run CMD within what is left of the acceptance budget
+# (ACCEPT_DEADLINE) and record it as phase NAME; returns CMD's exit code.
+# Waiting for admission extends the budget rather than eating into it.
+run_phase() {
+  local name="$1"; shift
+  local before=$ADMIT_WAIT_S
+  admit "$name"
+  ACCEPT_DEADLINE=$(( ACCEPT_DEADLINE + $(awk -v a="$before" -v b="$ADMIT_WAIT_S" 'BEGIN { printf "%d", b - a }') ))
+  local start=$(now)
+  local left=$(( ACCEPT_DEADLINE - $(timestamp) ))
+  if (( left < 1 )); then left=1; fi
+  supervise timeout "${left}s" "$@"
+  local ec=$?
+  record_phase "$name" "$start" "$ec"
+  return $ec
+}
 
-  # If CSV doesn't exist, create it with headers
-  if [[ ! -f "$RESULTS_CSV" ]]; then
-    echo "Task,RunId,Agent,Success(Y/N),Time(min)" > "$RESULTS_CSV"
+# python_venv: the venv and install phases of a Python acceptance run.  With
+# the venv cache, the install phase makes sure a prebuilt env exists for this
+# requirements.txt (lib/venvcache.py pip installs it on the first miss) and
+# the venv phase clones it into the project.  Requirements the cache cannot
+# key take the uncached path.
+python_venv() {
+  if [[ $VENV_CACHE -eq 1 && $("$PYTHON_BIN" "$LIB_DIR/venvcache.py" key requirements.txt 2>/dev/null) != uncacheable ]]; then
+    run_phase install bash -lc "python3 '$LIB_DIR/venvcache.py' populate requirements.txt" &&
+      run_phase venv bash -lc "python3 '$LIB_DIR/venvcache.py' clone requirements.txt venv"
+  else
+    run_phase venv bash -lc "python3 -m venv venv" &&
+      run_phase install bash -lc "source venv/bin/activate && python -m pip install -r requirements.txt"
   fi
+}
+
+# npm_install: the install phase of an npm acceptance run.  With the node
+# cache, node_modules is linked from a store filled once per lockfile
+# (lib/nodecache.py); otherwise `npm ci` as usual.
+npm_install() {
+  if [[ $NODE_CACHE -eq 1 ]]; then
+    run_phase install bash -lc "python3 '$LIB_DIR/nodecache.py' install --npm '$NPM_BIN'"
+  else
+    run_phase install bash -lc "$NPM_BIN ci"
+  fi
+}
+
+# result_row TASK RUN_ID AGENT STATUS MINUTES: a results.csv line for the
+# current cell including its recorded phases
+result_row() {
+  local row="$1,$2,$3,$4,$5" p s ec
+  for p in "${PHASE_NAMES[@]}"; do
+    s="PHASE_S_$p"; ec="PHASE_EC_$p"
+    row+=",${!s:-},${!ec:-}"
+  done
+  echo "$row"
+}
 
-  # Append the line
-  echo "$line" >> "$RESULTS_CSV"
+# append_csv FILE HEADER ROW [--no-sync]: append ROW to FILE under an
+# exclusive flock (lib/results_writer.py), writing HEADER first when FILE is
+# empty.  Waiting writers block in the kernel rather than polling.
+append_csv() {
+  "$PYTHON_BIN" "$LIB_DIR/results_writer.py" append ${4:+"$4"} --header "$2" "$1" "$3"
+}
 
-  # Release lock
-  rm -f "$lockfile" 2>/dev/null || true
+append_to_csv() {
+  append_csv "$RESULTS_CSV" "$RESULTS_HEADER" "$1"
 }
 
 # Function to run command in a new terminal window or background process
@@ -266,7 +453,8 @@ run_in_terminal() {
   local logfile="$3"
 
   # Create a script that runs the command and logs output
-  local script_file="/tmp/agent_runner_$$.sh"
+  local script_file
+  script_file=$(mktemp "${TMPDIR:-/tmp}/agent_runner.XXXXXX") || return 1
   cat > "$script_file" << EOF
 #!/bin/bash
 echo "Starting $title..."
@@ -292,6 +480,7 @@ if [[ \$exit_code -eq 0 ]]; then
 else
     echo "❌ FAILED: Agent exited with code \$exit_code" | tee -a "$logfile"
 fi
+rm -f "\$0"
 EOF
   chmod +x "$script_file"
 
@@ -319,20 +508,99 @@ EOF
   fi
 }
 
+# run_acceptance: run the acceptance steps for the project in the current
+# directory; returns the exit code of the first one that fails
+run_acceptance() {
+  if [[ -x ./accept.sh ]]; then
+    # Custom acceptance script takes precedence
+    run_phase tests ./accept.sh
+  elif [[ -f "requirements.txt" && -f "game/__init__.py" ]]; then
+    # Python project with game module
+    python_venv &&
+      run_phase tests bash -lc "source venv/bin/activate && python -m pytest -q" &&
+      run_phase headless bash -lc "source venv/bin/activate && HEADLESS=1 python -m game.main"
+  elif [[ -f "package.json" ]]; then
+    # Node.js/npm project
+    npm_install &&
+      run_phase tests bash -lc "$NPM_BIN test" &&
+      run_phase headless bash -lc "node smoke.js"
+  elif [[ -f "requirements.txt" ]]; then
+    # Generic Python project
+    python_venv &&
+      run_phase tests bash -lc "source venv/bin/activate && python -m pytest -q"
+  elif [[ -f "index.html" && -f "*.js" ]]; then
+    # Static web project - basic validation
+    run_phase tests bash -lc "echo 'Static web project detected - basic validation only' && [[ -f index.html ]]"
+  else
+    # Fallback - just check if basic files exist
+    echo "No recognized project structure - performing basic validation"
+    run_phase tests bash -lc "ls -la && echo 'Project structure validation passed'"
+  fi
+}
+
+# accept_key: the acceptance cache key (lib/acceptcache.py) for the project in
+# the current directory.  The recipe is the text of the functions above, so
+# changing how acceptance runs invalidates earlier outcomes.
+accept_key() {
+  declare -f run_acceptance python_venv npm_install run_phase |
+    "$PYTHON_BIN" "$LIB_DIR/acceptcache.py" key .
+}
+
+# accept_cached KEY: set ACCEPT_EC to the exit code stored under KEY; fails
+# when nothing is stored.  The stored phase times are not copied into this
+# cell's phase columns: they were spent by an earlier cell, not this one.
+accept_cached() {
+  local outcome name s ec
+  outcome=$("$PYTHON_BIN" "$LIB_DIR/acceptcache.py" lookup "$1") || return 1
+  while read -r name s ec; do
+    [[ $name == exit ]] && ACCEPT_EC=$s
+  done <<< "$outcome"
+  return 0
+}
+
+# accept_store KEY EXIT_CODE: remember this cell's acceptance outcome
+accept_store() {
+  local p s ec
+  for p in "${PHASE_NAMES[@]:2}"; do
+    s="PHASE_S_$p"; ec="PHASE_EC_$p"
+    [[ -n "${!s}" ]] && echo "$p ${!s} ${!ec}"
+  done | "$PYTHON_BIN" "$LIB_DIR/acceptcache.py" store "$1" "$2" || true
+}
+
+# capture_log LABEL CMD_TEXT CMD...: run CMD supervised (see supervise) with
+# its output on the console and in $logfile, gzip-compressed and capped at
+# LOG_CAP_MB (lib/logcap.py); returns CMD's exit code
+capture_log() {
+  local label="$1" text="$2"; shift 2
+  "$PYTHON_BIN" "$LIB_DIR/logcap.py" run --cap-mb "$LOG_CAP_MB" --label "$label" \
+    --header "Starting $label with logging..." --header "Command: $text" \
+    --header "Working directory: $(pwd)" "$logfile" -- \
+    "$PYTHON_BIN" "$LIB_DIR/rusage.py" run ${RUSAGE_FILE:+--out "$RUSAGE_FILE"} -- "$@"
+}
+
 run_agent_once() {
   local run_id="$1"   # 1..N
   local agent="$2"    # claude | copilot | gemini
   local prompt="$3"
   local outdir="$4"
 
+  reset_phases
+
   # Skip gracefully if agent CLI missing
   if [[ "$agent" == "claude" && $have_claude -eq 0 ]]; then
-    append_to_csv "${TASK},${run_id},claude,SKIP,0"; return 0; fi
+    append_to_csv "$(result_row "$TASK" "$run_id" claude SKIP 0)"; return 0; fi
   if [[ "$agent" == "copilot" && $have_copilot -eq 0 ]]; then
-    append_to_csv "${TASK},${run_id},copilot,SKIP,0"; return 0; fi
+    append_to_csv "$(result_row "$TASK" "$run_id" copilot SKIP 0)"; return 0; fi
   if [[ "$agent" == "gemini" && $have_gemini -eq 0 ]]; then
-    append_to_csv "${TASK},${run_id},gemini,SKIP,0"; return 0; fi
-
+    append_to_csv "$(result_row "$TASK" "$run_id" gemini SKIP 0)"; return 0; fi
+
+  local CELL="${TASK},${run_id},${agent}"
+  local RUSAGE_FILE
+  RUSAGE_FILE=$(mktemp "${TMPDIR:-/tmp}/coding-agent-eval-rusage.XXXXXX") || RUSAGE_FILE=""
+  ADMIT_WAIT_S=0
+  admit generation
+  ADMIT_WAIT_S=0   # only waits after t0 below come out of Time(min)
+  local setup_start=$(now)
   rm -rf "$outdir" && mkdir -p "$outdir/.claude" "$outdir/.gemini"
   printf '%s\n' "$CLAUDE_SETTINGS" > "$outdir/.claude/settings.json"
 
@@ -364,54 +632,41 @@ CLAUDE_LOCAL
 
   pushd "$outdir" >/dev/null
 
-  local t0=$(timestamp)
+  local t0=$(now)
   echo "==> [Run:$run_id][$agent][$TASK] generating in $outdir ..."
 
   # Create prompt file to avoid shell escaping issues
   printf '%s' "$prompt" > prompt.txt
 
   # Create log file for this run (use absolute path to avoid nesting issues)
-  local logfile="$(pwd)/${agent}_generation.log"
+  local logfile="$(pwd)/${agent}_generation.log.gz"
 
   # Ensure log directory exists
   mkdir -p "$(dirname "$logfile")"
 
+  record_phase setup "$setup_start" 0
+
   set +e
   # Always run agents directly (no separate terminal windows)
   echo "Running $agent directly..."
+  local gen_start=$(now)
   case "$agent" in
     claude)
-      echo "Starting Claude with logging..." | tee "$logfile"
-      echo "Command: ${CLAUDE_CMD}" | tee -a "$logfile"
-      echo "Working directory: $(pwd)" | tee -a "$logfile"
-      echo "================================" | tee -a "$logfile"
-      timeout "${TIMEOUT_SEC}s" ${CLAUDE_CMD} "$(cat prompt.txt)" 2>&1 | tee -a "$logfile"
-      local gen_ec=${PIPESTATUS[0]}
-      echo "================================" | tee -a "$logfile"
-      echo "Claude finished with exit code: $gen_ec" | tee -a "$logfile"
+      capture_log Claude "${CLAUDE_CMD}" timeout "${TIMEOUT_SEC}s" ${CLAUDE_CMD} "$(cat prompt.txt)"
+      local gen_ec=$?
       ;;
     copilot)
-      echo "Starting Copilot with logging..." | tee "$logfile"
-      echo "Command: ${COPILOT_CMD}" | tee -a "$logfile"
-      echo "Working directory: $(pwd)" | tee -a "$logfile"
-      echo "================================" | tee -a "$logfile"
-      timeout "${TIMEOUT_SEC}s" bash -c "cat prompt.txt | ${COPILOT_CMD}" 2>&1 | tee -a "$logfile"
-      local gen_ec=${PIPESTATUS[0]}
-      echo "================================" | tee -a "$logfile"
-      echo "Copilot finished with exit code: $gen_ec" | tee -a "$logfile"
+      capture_log Copilot "${COPILOT_CMD}" timeout "${TIMEOUT_SEC}s" bash -c "cat prompt.txt | ${COPILOT_CMD}"
+      local gen_ec=$?
       ;;
     gemini)
-      echo "Starting Gemini with logging..." | tee "$logfile"
-      echo "Command: ${GEMINI_CMD}" | tee -a "$logfile"
-      echo "Working directory: $(pwd)" | tee -a "$logfile"
-      echo "================================" | tee -a "$logfile"
-      timeout "${TIMEOUT_SEC}s" ${GEMINI_CMD} --prompt "$(cat prompt.txt)" 2>&1 | tee -a "$logfile"
-      local gen_ec=${PIPESTATUS[0]}
-      echo "================================" | tee -a "$logfile"
-      echo "Gemini finished with exit code: $gen_ec" | tee -a "$logfile"
+      capture_log Gemini "${GEMINI_CMD}" timeout "${TIMEOUT_SEC}s" ${GEMINI_CMD} --prompt "$(cat prompt.txt)"
+      local gen_ec=$?
       ;;
   esac
 
+  record_phase generation "$gen_start" "$gen_ec"
+
   # Agent execution completed, gen_ec is already set
   echo "Agent $agent completed with exit code: $gen_ec"
 
@@ -420,156 +675,61 @@ CLAUDE_LOCAL
   [[ -d "$PROJECT_ROOT_NAME" ]] && cd "$PROJECT_ROOT_NAME"
   [[ -f accept.sh ]] && chmod +x accept.sh
 
-  echo "==> [Run:$run_id][$agent][$TASK] running acceptance ..."
-  local acc_ec=1
-  set +e
-  if [[ -x ./accept.sh ]]; then
-    # Custom acceptance script takes precedence
-    timeout "${TIMEOUT_SEC}s" ./accept.sh
-    acc_ec=$?
+  # With the cache on, the key and lookup are timed as a "cached" timeline
+  # phase whose exit code is the stored one; the acceptance phase columns stay
+  # empty, so a cached outcome is never mistaken for acceptance that ran
+  local acc_ec=1 accept_key="" cache_start=$(now)
+  if [[ $ACCEPT_CACHE -eq 1 ]]; then
+    accept_key=$(accept_key) || accept_key=""
+  fi
+  if [[ -n "$accept_key" ]] && accept_cached "$accept_key"; then
+    acc_ec=$ACCEPT_EC
+    record_phase cached "$cache_start" "$acc_ec"
+    echo "==> [Run:$run_id][$agent][$TASK] acceptance outcome cached for this project (${accept_key:0:12})"
   else
-    # Dynamic acceptance testing based on project structure
-    if [[ -f "requirements.txt" && -f "game/__init__.py" ]]; then
-      # Python project with game module
-      timeout "${TIMEOUT_SEC}s" bash -lc "python3 -m venv venv && source venv/bin/activate && python -m pip install -r requirements.txt && python -m pytest -q && HEADLESS=1 python -m game.main"
-      acc_ec=$?
-    elif [[ -f "package.json" ]]; then
-      # Node.js/npm project
-      timeout "${TIMEOUT_SEC}s" bash -lc "$NPM_BIN ci && $NPM_BIN test && node smoke.js"
-      acc_ec=$?
-    elif [[ -f "requirements.txt" ]]; then
-      # Generic Python project
-      timeout "${TIMEOUT_SEC}s" bash -lc "python3 -m venv venv && source venv/bin/activate && python -m pip install -r requirements.txt && python -m pytest -q"
-      acc_ec=$?
-    elif [[ -f "index.html" && -f "*.js" ]]; then
-      # Static web project - basic validation
-      timeout "${TIMEOUT_SEC}s" bash -lc "echo 'Static web project detected - basic validation only' && [[ -f index.html ]]"
-      acc_ec=$?
-    else
-      # Fallback - just check if basic files exist
-      echo "No recognized project structure - performing basic validation"
-      timeout "${TIMEOUT_SEC}s" bash -lc "ls -la && echo 'Project structure validation passed'"
-      acc_ec=$?
-    fi
+    echo "==> [Run:$run_id][$agent][$TASK] running acceptance ..."
+    # Acceptance steps share one TIMEOUT_SEC budget; each is timed as its own
+    # phase and the chain stops at the first failure
+    ACCEPT_DEADLINE=$(( $(timestamp) + TIMEOUT_SEC ))
+    set +e
+    run_acceptance
+    acc_ec=$?
+    set -e
+    [[ -n "$accept_key" ]] && accept_store "$accept_key" "$acc_ec"
   fi
-  set -e
 
-  local t1=$(timestamp)
-  local dt=$((t1 - t0))
+  local t1=$(now)
+  release_admission
+  local dt=$(awk -v a="$t0" -v b="$t1" -v w="$ADMIT_WAIT_S" 'BEGIN { printf "%.1f", b - a - w }')
+  local minutes=$(awk -v a="$t0" -v b="$t1" -v w="$ADMIT_WAIT_S" 'BEGIN { printf "%.2f", (b - a - w) / 60 }')
 
   # Success = both generation and acceptance passed
   local success="N"
   if [[ $gen_ec -eq 0 && $acc_ec -eq 0 ]]; then success="Y"; fi
 
-  append_to_csv "${TASK},${run_id},${agent},${success},$((dt/60)).$(((dt%60)))"
+  local row
+  row=$(result_row "$TASK" "$run_id" "$agent" "$success" "$minutes")
+  append_to_csv "$row"
+  # Completion marker for --resume (lib/orchestrate.py); a workspace without
+  # one is from a cell that was cut short
+  printf '%s\n' "$row" > "$outdir/.cell-done"
+  rm -f "$RUSAGE_FILE"
   echo "==> [Run:$run_id][$agent][$TASK] SUCCESS=${success} TIME=${dt}s (gen_ec=${gen_ec}, acc_ec=${acc_ec})"
 
   popd >/dev/null
 }
 
-run_agent() {
-  local agent="$1"
-  local prompt="$2"
-  local base="$3"
-  for r in $(seq 1 "$RUNS"); do
-    local outdir="${base}-run${r}"
-    run_agent_once "$r" "$agent" "$prompt" "$outdir"
-  done
-}
-
-# Function to run all agents for a single task
-run_single_task() {
-  local task_name="$1"
-
-  echo ""
-  echo "=========================================="
-  echo "🚀 Starting evaluation for task: $task_name"
-  echo "=========================================="
-
-  # Load prompt for current task
-  local prompt_file="$PROMPTS_DIR/${task_name}.txt"
-  local prompt="$(cat "$prompt_file")"
-  echo "Loaded prompt from: $prompt_file"
-
-  # Set project root name for this task
-  PROJECT_ROOT_NAME="$task_name"
-
-  # Set up task-specific directories
-  local claude_base="$BASE_DIR/${task_name}-claude"
-  local copilot_base="$BASE_DIR/${task_name}-copilot"
-  local gemini_base="$BASE_DIR/${task_name}-gemini"
-
-  if [[ -n "$AGENT" ]]; then
-    echo "Running single agent: $AGENT for task: $task_name"
-    case "$AGENT" in
-      claude)  run_agent claude  "$prompt" "$claude_base";;
-      copilot) run_agent copilot "$prompt" "$copilot_base";;
-      gemini)  run_agent gemini  "$prompt" "$gemini_base";;
-    esac
-  elif [[ "$MODE" == "parallel" ]]; then
-    echo "Running agents in parallel mode for task: $task_name..."
-
-    # Start all agents in parallel in background processes
-    local pids=()
-
-    if [[ $have_claude -eq 1 ]]; then
-      echo "Starting Claude in background for task: $task_name..."
-      run_agent claude "$prompt" "$claude_base" &
-      local pid=$!
-      pids+=($pid)
-      echo "Claude started (PID: $pid)"
-    fi
-
-    if [[ $have_copilot -eq 1 ]]; then
-      echo "Starting Copilot in background for task: $task_name..."
-      run_agent copilot "$prompt" "$copilot_base" &
-      local pid=$!
-      pids+=($pid)
-      echo "Copilot started (PID: $pid)"
-    fi
-
-    if [[ $have_gemini -eq 1 ]]; then
-      echo "Starting Gemini in background for task: $task_name..."
-      run_agent gemini "$prompt" "$gemini_base" &
-      local pid=$!
-      pids+=($pid)
-      echo "Gemini started (PID: $pid)"
-    fi
-
-    echo "Waiting for all agents to complete for task: $task_name..."
-
-    # Wait for all background processes
-    for pid in "${pids[@]}"; do
-      echo "Waiting for process $pid..."
-      wait "$pid" || echo "Process $pid completed with error"
-    done
-  else
-    echo "Running agents in serial mode for task: $task_name..."
-
-    if [[ $have_claude -eq 1 ]]; then
-      echo "Running Claude for task: $task_name..."
-      run_agent claude  "$prompt" "$claude_base"
-    fi
-
-    if [[ $have_copilot -eq 1 ]]; then
-      echo "Running Copilot for task: $task_name..."
-      run_agent copilot "$prompt" "$copilot_base"
-    fi
-
-    if [[ $have_gemini -eq 1 ]]; then
-      echo "Running Gemini for task: $task_name..."
-      run_agent gemini  "$prompt" "$gemini_base"
-    fi
-  fi
-
-  echo "✅ Completed evaluation for task: $task_name"
-}
-
-
-
 # =========================
 # Run
 # =========================
+# One cell, started by lib/orchestrate.py
+if [[ $CELL_MODE -eq 1 ]]; then
+  PROJECT_ROOT_NAME="$TASK"
+  run_agent_once "$CELL_RUN_ID" "$CELL_AGENT" "$(cat "$PROMPTS_DIR/${TASK}.txt")" \
+    "$BASE_DIR/${TASK}-${CELL_AGENT}-run${CELL_RUN_ID}"
+  exit 0
+fi
+
 # Ensure the base directory exists and is writable
 mkdir -p "$BASE_DIR"
 if [[ ! -w "$BASE_DIR" ]]; then
@@ -577,25 +737,41 @@ if [[ ! -w "$BASE_DIR" ]]; then
   exit 1
 fi
 
-echo "Task,RunId,Agent,Success(Y/N),Time(min)" > "$RESULTS_CSV"
+if [[ $RESUME -eq 0 || ! -s "$RESULTS_CSV" ]]; then
+  echo "$RESULTS_HEADER" > "$RESULTS_CSV"
+  echo "$TIMELINE_HEADER" > "$TIMELINE_CSV"
+fi
+
+# Optional live view: tails results.csv and pushes updates to the browser
+LIVE_PID=""
+if [[ -n "$LIVE_PORT" ]]; then
+  "$PYTHON_BIN" "$LIB_DIR/build_report.py" --watch --port "$LIVE_PORT" "$BASE_DIR" &
+  LIVE_PID=$!
+  trap '[[ -n "$LIVE_PID" ]] && kill "$LIVE_PID" 2>/dev/null || true' EXIT
+fi
 
 if [[ -n "$AGENT" ]]; then
-  echo "Running single agent: $AGENT"
+  AGENTS_TO_RUN=("$AGENT")
 else
-  if [[ "$MODE" == "parallel" ]]; then
-    echo "Running multiple agents in parallel..."
-  else
-    echo "Running multiple agents in serial..."
-  fi
-  echo "Each agent will run and log to files in $BASE_DIR."
+  AGENTS_TO_RUN=()
+  [[ $have_claude -eq 1 ]] && AGENTS_TO_RUN+=(claude)
+  [[ $have_copilot -eq 1 ]] && AGENTS_TO_RUN+=(copilot)
+  [[ $have_gemini -eq 1 ]] && AGENTS_TO_RUN+=(gemini)
 fi
-
-# Run evaluation for each task
-for task in "${TASKS_TO_RUN[@]}"; do
-  # Set TASK environment variable for report generation
-  export TASK="$task"
-  run_single_task "$task"
-done
+if [[ -z "$JOBS" && "$MODE" == "serial" ]]; then JOBS=1; fi
+echo "Each agent will run and log to files in $BASE_DIR."
+
+# Every (task, agent, run) cell goes through one work queue; each cell is
+# this script again with --cell, so the per-cell logic above is unchanged
+export TIMEOUT_SEC PYTHON_BIN NPM_BIN ADMISSION ADMIT_MAX_LOAD ADMIT_MIN_MEM_MB ADMIT_MIN_DISK_MB \
+  VENV_CACHE VENV_CACHE_DIR NODE_CACHE NODE_CACHE_DIR ACCEPT_CACHE LOG_CAP_MB TRANSCRIPTS
+RESUME_FLAG=()
+[[ $RESUME -eq 1 ]] && RESUME_FLAG=(--resume)
+orchestrate_tasks=$(IFS=,; echo "${TASKS_TO_RUN[*]}")
+orchestrate_agents=$(IFS=,; echo "${AGENTS_TO_RUN[*]}")
+"$PYTHON_BIN" "$LIB_DIR/orchestrate.py" --script "$0" --base-dir "$BASE_DIR" \
+  --tasks "$orchestrate_tasks" --agents "$orchestrate_agents" --runs "$RUNS" \
+  ${JOBS:+--jobs "$JOBS"} ${AGENT_JOBS[@]+"${AGENT_JOBS[@]}"} ${RESUME_FLAG[@]+"${RESUME_FLAG[@]}"}
 
 echo ""
 echo "=========================================="
@@ -609,148 +785,32 @@ fi
 # =========================
 # Report (HTML)
 # =========================
-REPORT_PY="$BASE_DIR/_build_report.py"
 REPORT_HTML="$BASE_DIR/report.html"
 
-cat > "$REPORT_PY" <<'PY'
-import csv, statistics, os
-from collections import defaultdict
-
-base_dir = os.path.dirname(__file__)
-csv_path = os.path.join(base_dir, "results.csv")
-html_path = os.path.join(base_dir, "report.html")
-
-rows = []
-with open(csv_path, newline='') as f:
-    r = csv.DictReader(f)
-    for row in r:
-        row["RunId"] = int(row["RunId"]) if row["RunId"].isdigit() else 0
-        s = row["Success(Y/N)"].strip().upper()
-        row["Skip"] = (s == "SKIP")
-        row["Success"] = (s == "Y")
-        try:
-            row["TimeMin"] = float(row["Time(min)"])
-        except:
-            row["TimeMin"] = None
-        rows.append(row)
-
-agents = sorted(set(r["Agent"] for r in rows))
-by_agent = defaultdict(list)
-for row in rows:
-    by_agent[row["Agent"]].append(row)
-
-summary = []
-for a in agents:
-    data = [d for d in by_agent[a] if not d["Skip"]]
-    total = len(data)
-    succ = sum(1 for d in data if d["Success"])
-    sr = (succ / total * 100.0) if total else 0.0
-    times = [d["TimeMin"] for d in data if d["TimeMin"] is not None]
-    med = statistics.median(times) if times else None
-    summary.append({"agent": a, "pass": succ, "total": total, "success_rate": sr, "median_time": med})
-
-def bar_chart_svg(values, labels, width=560, height=200, unit=""):
-    if not values: return "<svg/>"
-    maxv = max(values) or 1
-    bar_h = max(12, int(height / (len(values)*1.5)))
-    gap = bar_h // 2
-    svg = [f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
-    y = gap
-    for v, lab in zip(values, labels):
-        w = int((v / maxv) * (width - 160))
-        svg.append(f'<text x="6" y="{y+bar_h-4}" font-size="12" font-family="system-ui">{lab}</text>')
-        svg.append(f'<rect x="120" y="{y}" width="{w}" height="{bar_h}" fill="#4F46E5" rx="4"></rect>')
-        svg.append(f'<text x="{120+w+6}" y="{y+bar_h-4}" font-size="12" font-family="system-ui">{v:.1f}{unit}</text>')
-        y += bar_h + gap
-    svg.append('</svg>')
-    return "\n".join(svg)
-
-succ_values = [s["success_rate"] for s in summary]
-time_values = [s["median_time"] or 0.0 for s in summary]
-labels = [s["agent"] for s in summary]
-
-succ_svg = bar_chart_svg(succ_values, labels, unit="%")
-time_svg = bar_chart_svg(time_values, labels, unit="m")
-
-def esc(x): return (str(x).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;"))
-
-table_rows = "\n".join(
-    f"<tr><td>{esc(s['agent'])}</td>"
-    f"<td>{s['pass']}/{s['total']}</td>"
-    f"<td>{s['success_rate']:.1f}%</td>"
-    f"<td>{'—' if s['median_time'] is None else f'{s['median_time']:.2f} m'}</td></tr>"
-    for s in summary
-)
-
-run_rows = "\n".join(
-    f"<tr><td>{esc(r['RunId'])}</td><td>{esc(r['Agent'])}</td>"
-    f"<td>{'SKIP' if r['Skip'] else ('Y' if r['Success'] else 'N')}</td>"
-    f"<td>{'—' if r['TimeMin'] is None else f'{r['TimeMin']:.2f}'}</td></tr>"
-    for r in sorted(rows, key=lambda x: (x['RunId'], x['Agent']))
-)
-
-html = f"""<!doctype html>
-<meta charset="utf-8">
-<title>CLI Coding Agents — Evaluation Report</title>
-<style>
-  :root {{ --fg:#0f172a; --muted:#64748b; --card:#f8fafc; --accent:#4F46E5; }}
-  body {{ font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; color:var(--fg); margin:24px; }}
-  h1 {{ margin: 0 0 4px 0; }}
-  .muted {{ color: var(--muted); }}
-  .grid {{ display:grid; grid-template-columns: 1fr 1fr; gap: 24px; }}
-  .card {{ background:var(--card); padding:16px; border-radius:12px; box-shadow:0 1px 2px rgba(0,0,0,.06); }}
-  table {{ width:100%; border-collapse: collapse; }}
-  th, td {{ padding:8px 10px; border-bottom:1px solid #e5e7eb; text-align:left; }}
-  th {{ font-weight:600; }}
-  .mono {{ font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; }}
-</style>
-
-<h1>CLI Coding Agents — Evaluation Report</h1>
-<p class="muted">Task: <b class="mono">{esc(os.environ.get('TASK','')) or 'n/a'}</b> • Runs per agent: <b>{len(set(r['RunId'] for r in rows))}</b></p>
-
-<div class="grid">
-  <div class="card">
-    <h2>Success Rate</h2>
-    {succ_svg}
-  </div>
-  <div class="card">
-    <h2>Median Time (minutes)</h2>
-    {time_svg}
-  </div>
-</div>
-
-<div class="card" style="margin-top:24px">
-  <h2>Per-agent Summary</h2>
-  <table>
-    <thead><tr><th>Agent</th><th>Pass</th><th>Success Rate</th><th>Median Time</th></tr></thead>
-    <tbody>
-      {table_rows}
-    </tbody>
-  </table>
-</div>
-
-<div class="card" style="margin-top:24px">
-  <h2>All Runs</h2>
-  <table class="mono">
-    <thead><tr><th>RunId</th><th>Agent</th><th>Success</th><th>Time (min)</th></tr></thead>
-    <tbody>
-      {run_rows}
-    </tbody>
-  </table>
-</div>
-"""
-with open(html_path, "w", encoding="utf-8") as f:
-    f.write(html)
-print("Wrote", html_path)
-PY
-
-# Set TASK for report generation (use first task if multiple)
+if [[ -n "$LIVE_PID" ]]; then
+  kill "$LIVE_PID" 2>/dev/null || true
+  LIVE_PID=""
+fi
+
+# Set TASK for report generation; with several tasks the report lists the
+# tasks found in results.csv and breaks results down per task instead
 export TASK="${TASKS_TO_RUN[0]}"
 if [[ ${#TASKS_TO_RUN[@]} -gt 1 ]]; then
-  export TASK="Multiple Tasks (${TASKS_TO_RUN[*]})"
+  unset TASK
 fi
 
-"$PYTHON_BIN" "$REPORT_PY"
+# Turns, tool calls and tokens of every cell from its agent log, for the
+# report's efficiency table (logs are parsed on a process pool)
+"$PYTHON_BIN" "$LIB_DIR/transcripts.py" scan "$BASE_DIR" || echo "Warning: failed to parse agent logs"
+
+"$PYTHON_BIN" "$LIB_DIR/build_report.py" "$BASE_DIR"
+
+# Share files identical to earlier runs' (and between this run's workspaces)
+"$PYTHON_BIN" "$LIB_DIR/snapshot.py" dedupe "$BASE_DIR" || echo "Warning: failed to dedupe $BASE_DIR"
+
+# Fold this run's rows into the cross-history index (only new rows are read)
+"$PYTHON_BIN" "$LIB_DIR/results_index.py" update "$SCRIPT_DIR" "$(dirname "$BASE_DIR")" \
+  || echo "Warning: failed to update results index"
 
 echo
 echo "==== RESULTS CSV ===="
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Memoized acceptance outcomes, keyed by a hash of the generated project.
+
+    acceptcache.py hash [--jobs N] DIR
+    acceptcache.py key DIR < RECIPE
+    acceptcache.py lookup KEY
+    acceptcache.py store KEY EXIT_CODE < PHASES
+    acceptcache.py prune [--older-than DAYS]
+
+Re-evaluations and byte-identical generations used to run the whole
+acceptance pipeline (accept.sh, pytest, the headless run) again.  A cell
+now computes
+
+    key = sha256(tree hash of the project, acceptance recipe, toolchain versions)
+
+before acceptance and reuses the stored outcome when there is one.  The
+recipe is the text of the harness's acceptance functions (passed on stdin,
+so editing them invalidates every entry); the toolchain is the versions of
+python3, node and npm on PATH.
+
+The tree hash is a Merkle hash: each file's SHA-256 is computed on a
+thread pool (hashlib releases the GIL), and each directory hashes the
+sorted names, kinds and hashes of its entries.  Acceptance by-products and
+state that does not affect the outcome are left out: IGNORE_DIRS
+(venv/, node_modules/, caches), logs, *.pyc and highscore.json.
+
+An outcome is the acceptance exit code plus each phase's seconds and exit
+code, one JSON file per key under $ACCEPT_CACHE_DIR (default
+~/.cache/coding-agent-eval/accept).  Only passing outcomes are stored: a
+failure may come from the host rather than the project (a timed-out phase,
+a network error in pip or npm, a flaky test), and replaying it would keep
+the project failing for good.  Outcomes expire after MAX_AGE_DAYS
+($ACCEPT_CACHE_MAX_AGE_DAYS, 0 for never), so the cache does not hide
+changes outside the key, such as new releases of unpinned dependencies.
+`prune` deletes expired outcomes, or all of them with --older-than 0.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+IGNORE_DIRS = {"venv", ".venv", "node_modules", "__pycache__", ".pytest_cache", ".mypy_cache", ".git"}
+IGNORE_FILES = {"highscore.json", ".DS_Store"}
+IGNORE_SUFFIXES = (".log", ".log.gz", ".log.gz.idx", ".log.gz.tail", ".pyc")
+TOOLS = (("python3", "--version"), ("node", "--version"), ("npm", "--version"))
+MAX_AGE_DAYS = 7
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("ACCEPT_CACHE_DIR") or os.path.join(base, "coding-agent-eval", "accept")
+
+
+def _ignored(entry):
+    if entry.is_dir(follow_symlinks=False):
+        return entry.name in IGNORE_DIRS
+    return entry.name in IGNORE_FILES or entry.name.endswith(IGNORE_SUFFIXES)
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.digest()
+
+
+def _scan(root):
+    """(dirs deepest first, {dir: [(kind, name, path)]}, [file paths])."""
+    dirs, entries, files, stack = [], {}, [], [root]
+    while stack:
+        d = stack.pop()
+        dirs.append(d)
+        items = entries[d] = []
+        with os.scandir(d) as it:
+            for e in it:
+                if _ignored(e):
+                    continue
+                if e.is_symlink():
+                    items.append(("l", e.name, e.path))
+                elif e.is_dir():
+                    items.append(("d", e.name, e.path))
+                    stack.append(e.path)
+                else:
+                    items.append(("f", e.name, e.path))
+                    files.append(e.path)
+    dirs.reverse()
+    return dirs, entries, files
+
+
+def tree_hash(root, jobs=None):
+    """(hex Merkle hash of root, number of files hashed)."""
+    dirs, entries, files = _scan(root)
+    with ThreadPoolExecutor(jobs or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        hashes = dict(zip(files, pool.map(_file_sha256, files)))
+    for d in dirs:
+        h = hashlib.sha256()
+        for kind, name, path in sorted(entries[d], key=lambda item: item[1]):
+            digest = os.readlink(path).encode() if kind == "l" else hashes[path]
+            h.update(kind.encode() + name.encode("utf-8", "surrogateescape") + b"\0" + digest + b"\n")
+        hashes[d] = h.digest()
+    return hashes[root].hex(), len(files)
+
+
+def toolchain():
+    """Version strings of the acceptance toolchain, queried in parallel."""
+    def version(cmd):
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            return f"{cmd[0]} {out.stdout.strip() or out.stderr.strip()}"
+        except (OSError, subprocess.TimeoutExpired):
+            return f"{cmd[0]} missing"
+    with ThreadPoolExecutor(len(TOOLS)) as pool:
+        return list(pool.map(version, TOOLS)) + [sys.platform, platform.machine()]
+
+
+def cache_key(project, recipe):
+    tree, _ = tree_hash(project)
+    h = hashlib.sha256()
+    for part in (tree, recipe, *toolchain()):
+        h.update(part.encode() + b"\0")
+    return h.hexdigest()[:32]
+
+
+def max_age_s():
+    try:
+        days = float(os.environ.get("ACCEPT_CACHE_MAX_AGE_DAYS", MAX_AGE_DAYS))
+    except ValueError:
+        days = MAX_AGE_DAYS
+    return days * 86400 if days > 0 else None
+
+
+def lookup(key, cache=None, max_age=None):
+    """The stored outcome for key, or None when there is none or it is older
+    than max_age seconds (default: max_age_s())."""
+    path = os.path.join(cache or default_cache_dir(), key + ".json")
+    try:
+        with open(path) as f:
+            outcome = json.load(f)
+    except (OSError, ValueError):
+        return None
+    max_age = max_age_s() if max_age is None else max_age
+    if max_age is not None and time.time() - outcome.get("stored", 0) > max_age:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return outcome
+
+
+def store(key, exit_code, phases, cache=None):
+    """Record an outcome; phases maps name -> (seconds, exit code).  Returns
+    False when it was not stored because acceptance or a phase failed."""
+    if exit_code != 0 or any(ec != 0 for _, ec in phases.values()):
+        return False
+    cache = cache or default_cache_dir()
+    os.makedirs(cache, exist_ok=True)
+    path = os.path.join(cache, key + ".json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"exit": exit_code, "phases": phases, "stored": time.time()}, f)
+    os.replace(tmp, path)
+    return True
+
+
+def prune(cache=None, older_than=None):
+    """Delete outcomes older than older_than seconds (default: max_age_s());
+    returns how many were deleted."""
+    cache = cache or default_cache_dir()
+    older_than = max_age_s() if older_than is None else older_than
+    if older_than is None:
+        return 0
+    removed = 0
+    try:
+        names = os.listdir(cache)
+    except FileNotFoundError:
+        return 0
+    now = time.time()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(cache, name)
+        try:
+            with open(path) as f:
+                stored = json.load(f).get("stored", 0)
+        except (OSError, ValueError):
+            stored = 0
+        if now - stored >= older_than:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Memoized acceptance outcomes")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ha = sub.add_parser("hash", help="print the Merkle hash of DIR")
+    ha.add_argument("--jobs", type=int, default=None, help="hashing threads")
+    ha.add_argument("dir")
+    ky = sub.add_parser("key", help="print the cache key for DIR; the recipe is read from stdin")
+    ky.add_argument("dir")
+    lk = sub.add_parser("lookup", help="print a stored outcome as PHASE SECONDS EXIT lines, "
+                        "then `exit EXIT SECONDS`; exits 1 when there is none")
+    lk.add_argument("key")
+    st = sub.add_parser("store", help="store an outcome; PHASE SECONDS EXIT lines on stdin")
+    st.add_argument("key")
+    st.add_argument("exit_code", type=int)
+    pr = sub.add_parser("prune", help="delete expired outcomes")
+    pr.add_argument("--older-than", type=float, default=None, metavar="DAYS",
+                    help=f"delete outcomes older than DAYS; 0 deletes all (default: {MAX_AGE_DAYS})")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "hash":
+        t0 = time.monotonic()
+        digest, files = tree_hash(args.dir, args.jobs)
+        print(f"{digest}  {files} files in {time.monotonic() - t0:.3f}s")
+    elif args.cmd == "key":
+        print(cache_key(args.dir, sys.stdin.read()))
+    elif args.cmd == "lookup":
+        outcome = lookup(args.key)
+        if outcome is None:
+            return 1
+        total = 0.0
+        for name, (seconds, ec) in outcome["phases"].items():
+            print(name, seconds, ec)
+            total += float(seconds)
+        print("exit", outcome["exit"], f"{total:.3f}")
+    elif args.cmd == "prune":
+        older = None if args.older_than is None else args.older_than * 86400
+        print(f"Deleted {prune(older_than=older)} acceptance outcomes")
+    else:
+        phases = {}
+        for line in sys.stdin:
+            name, seconds, ec = line.split()
+            phases[name] = (seconds, int(ec))
+        store(args.key, args.exit_code, phases)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Admission control for agent and acceptance phases on shared hosts.
+
+    admission.py acquire --state FILE --owner PID --phase NAME
+    admission.py release --state FILE --owner PID
+
+Running every cell's `pip install` and pytest at once oversubscribes CPU and
+memory, and the contention shows up in the times we report.  Before each
+phase a cell calls `acquire`, which blocks until the host has room for that
+phase's estimated cost (PHASE_COST) and then records a reservation for the
+owner (the cell's shell PID) in a small JSON ledger guarded by flock.  The
+next acquire by the same owner replaces its reservation; `release`, or the
+owner exiting, drops it.
+
+A phase is admitted when, counting everything already admitted,
+
+    runnable + reserved cores     <= max load (default: CPU count)
+    MemAvailable - reserved MB    >= min free memory
+    free disk under BASE_DIR - MB >= min free disk
+
+"runnable" is the number of runnable tasks from /proc/loadavg, averaged
+over a few samples.  The samples are taken before the ledger is locked, so
+cells waiting to be admitted do not queue behind each other's sampling;
+under the lock, acquire only re-checks the readings against the current
+reservations and records its own.  A reservation made in between is still
+settling and so counts in full.  The 1-minute load average in the same file lags by
+about a minute in both directions, which would keep slots idle long after
+a phase ends (os.getloadavg() is the fallback elsewhere).  Readings still
+trail a phase that has only just started, so each reservation counts in
+full for its first SETTLE seconds.  When nothing else holds a reservation,
+the phase is always admitted.  A host that is busy for other reasons then
+slows a run down but cannot stall it.
+
+Thresholds come from ADMIT_MAX_LOAD, ADMIT_MIN_MEM_MB and ADMIT_MIN_DISK_MB.
+`bench_report.py admission` measures the effect on a CPU-bound job mix.
+"""
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import sys
+import time
+from collections import namedtuple
+
+Cost = namedtuple("Cost", "cpu mem_mb disk_mb")
+Limits = namedtuple("Limits", "max_load min_mem_mb min_disk_mb")
+
+# Rough per-phase footprint: cores, resident MB, disk MB written
+PHASE_COST = {
+    "generation": Cost(0.5, 500, 50),
+    "venv": Cost(0.5, 100, 30),
+    "install": Cost(1.0, 400, 300),
+    "tests": Cost(1.0, 500, 20),
+    "headless": Cost(1.0, 300, 0),
+}
+DEFAULT_COST = Cost(1.0, 300, 50)
+SETTLE = 10.0
+SAMPLES = 5
+POLL_MIN, POLL_MAX = 0.05, 0.5
+
+
+def limits_from_env():
+    return Limits(float(os.environ.get("ADMIT_MAX_LOAD") or os.cpu_count() or 1),
+                  float(os.environ.get("ADMIT_MIN_MEM_MB") or 512),
+                  float(os.environ.get("ADMIT_MIN_DISK_MB") or 1024))
+
+
+def runnable():
+    """Runnable tasks besides this one, averaged over SAMPLES reads."""
+    total = 0
+    try:
+        for i in range(SAMPLES):
+            if i:
+                time.sleep(0.02)
+            with open("/proc/loadavg") as f:
+                total += int(f.read().split()[3].split("/")[0]) - 1
+    except OSError:
+        return os.getloadavg()[0]
+    return total / SAMPLES
+
+
+def mem_available_mb():
+    """MemAvailable in MB, or None where /proc/meminfo does not exist."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def disk_free_mb(path):
+    return shutil.disk_usage(path).free / (1 << 20)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Ledger:
+    """The reservations file, locked for the duration of a with block."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reservations = {}
+
+    def __enter__(self):
+        self._lock = open(self.path + ".lock", "a")
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+        try:
+            with open(self.path) as f:
+                self.reservations = json.load(f)
+        except (OSError, ValueError):
+            self.reservations = {}
+        self.reservations = {o: r for o, r in self.reservations.items() if _alive(int(o))}
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.reservations, f)
+            os.replace(tmp, self.path)
+        finally:
+            self._lock.close()
+
+
+def pending(reservations, now):
+    """Cores, MB of memory and MB of disk that readings do not show yet."""
+    cpu = mem = disk = 0.0
+    for r in reservations.values():
+        if now - r["t"] < SETTLE:
+            cpu += r["cpu"]
+            mem += r["mem_mb"]
+            disk += r["disk_mb"]
+    return cpu, mem, disk
+
+
+def readings(disk_path):
+    """(runnable, MB available, MB of disk free), taken without the ledger
+    lock: sampling the load takes most of 100 ms."""
+    return runnable(), mem_available_mb(), disk_free_mb(disk_path)
+
+
+def admissible(reservations, cost, limits, sample, now):
+    """(ok, reason) for admitting cost on top of reservations, given
+    readings() from before the ledger was locked."""
+    cpu, mem, disk = pending(reservations, now)
+    load, avail, free = sample
+    if load + cpu + cost.cpu > limits.max_load:
+        return False, f"{load:.1f} runnable, {cpu:.1f} cores reserved"
+    if avail is not None and avail - mem - cost.mem_mb < limits.min_mem_mb:
+        return False, f"{avail:.0f} MB available, {mem:.0f} MB reserved"
+    if free - disk - cost.disk_mb < limits.min_disk_mb:
+        return False, f"{free:.0f} MB disk free, {disk:.0f} MB reserved"
+    return True, ""
+
+
+def acquire(state, owner, phase, limits=None, log=None):
+    """Block until `phase` fits, then reserve it for owner.  Returns the
+    seconds spent waiting."""
+    limits = limits or limits_from_env()
+    cost = PHASE_COST.get(phase, DEFAULT_COST)
+    disk_path = os.path.dirname(os.path.abspath(state))
+    t0, delay, reason = time.monotonic(), POLL_MIN, ""
+    while True:
+        sample = readings(disk_path)
+        with Ledger(state) as ledger:
+            ledger.reservations.pop(str(owner), None)
+            now = time.time()
+            ok, why = admissible(ledger.reservations, cost, limits, sample, now)
+            if ok or not ledger.reservations:
+                ledger.reservations[str(owner)] = dict(cost._asdict(), phase=phase, t=now)
+                waited = time.monotonic() - t0
+                if log and reason:
+                    log(f"starting {phase} after waiting {waited:.1f}s")
+                return waited
+        if log and not reason:
+            log(f"waiting to start {phase}: {why}")
+            reason = why
+        time.sleep(delay)
+        delay = min(POLL_MAX, delay * 2)
+
+
+def release(state, owner):
+    with Ledger(state) as ledger:
+        ledger.reservations.pop(str(owner), None)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Admission control for evaluation phases")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    acq = sub.add_parser("acquire", help="wait for room, then reserve it; prints seconds waited")
+    acq.add_argument("--state", required=True)
+    acq.add_argument("--owner", type=int, required=True)
+    acq.add_argument("--phase", required=True)
+    rel = sub.add_parser("release", help="drop the owner's reservation")
+    rel.add_argument("--state", required=True)
+    rel.add_argument("--owner", type=int, required=True)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "acquire":
+        waited = acquire(args.state, args.owner, args.phase,
+                         log=lambda m: print(m, file=sys.stderr, flush=True))
+        print(f"{waited:.3f}")
+    else:
+        release(args.state, args.owner)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""Benchmark the report pipeline on synthetic results.csv files.
+
+    bench_report.py [--sizes 1e3,1e4,1e5,1e6] [--out bench.json]
+                    [--baseline old.json] [--threshold 0.25]
+    bench_report.py COMPONENT [...]
+
+For each size a deterministic results.csv is generated once (cached under
+--workdir, keyed by row count and seed) with many tasks and agents, SKIP rows
+and unparseable Time(min) values, like a long nightly archive.  Each size is
+then built in a fresh subprocess so peak RSS is per size: first cold (no
+columnar sidecar, no run shards), then warm (sidecar present).  Phase times
+come from build_report.build(timings=...).
+
+The JSON written to --out looks like
+
+    {"meta": {...}, "sizes": {"1000": {"rows": 1000, "peak_rss_kb": ...,
+      "cold": {"parse": s, ..., "total": s}, "warm": {...}}}}
+
+With --baseline, every phase that took at least MIN_SECONDS in the baseline
+is compared against it and the exit status is 1 if any is slower (or peak RSS
+larger) by more than --threshold.
+
+The COMPONENT subcommands time parts of the harness instead, so that the
+modules themselves only carry the commands the harness runs:
+
+    admission    a CPU-bound job mix with and without admission.py
+    venvcache    venv + pip install against a cold and a warm venv cache
+    nodecache    npm ci against a cold and a warm node_modules store
+    logcap       tee against logcap.py on synthetic verbose agent output
+    transcripts  transcripts.py scan of synthetic Claude logs, serial and pooled
+    rusage       a trivial command run directly and under `rusage.py run`
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from results import HEADER, HEADER_V2, PHASES
+
+DEFAULT_SIZES = "1e3,1e4,1e5,1e6"
+DEFAULT_WORKDIR = os.path.join(tempfile.gettempdir(), "coding-agent-eval-bench")
+# Phases faster than this in the baseline are too noisy to compare.
+MIN_SECONDS = 0.05
+
+AGENTS = ("claude", "copilot", "gemini", "codex", "cursor", "aider", "opencode", "qwen")
+UNPARSEABLE = ("", "n/a", "timeout", "1:30", "-")
+
+
+def generate(path, rows, seed=0, schema=1):
+    """Write a deterministic synthetic results.csv with `rows` data rows.
+
+    Rows are emitted in harness order (run id, then task, then agent).  Task
+    count grows with size; each agent has its own pass rate and log-normal
+    duration.  About 4% of rows are SKIP and 2% have an unparseable time.
+    With schema=2 each row also carries per-phase seconds and exit codes.
+    """
+    rng = random.Random(seed)
+    n_tasks = min(64, 3 + len(str(rows)) * 4)
+    tasks = ["task%02d" % i for i in range(n_tasks)]
+    profile = {a: (rng.uniform(0.3, 0.95), rng.uniform(0.5, 2.0)) for a in AGENTS}
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        f.write(",".join(HEADER_V2 if schema == 2 else HEADER) + "\n")
+        no_phases = "," * (2 * len(PHASES)) if schema == 2 else ""
+        written, run_id = 0, 0
+        while written < rows:
+            run_id += 1
+            for task in tasks:
+                for agent in AGENTS:
+                    if written == rows:
+                        break
+                    p_pass, mu = profile[agent]
+                    r = rng.random()
+                    if r < 0.04:
+                        f.write(f"{task},{run_id},{agent},SKIP,0{no_phases}\n")
+                    else:
+                        status = "Y" if rng.random() < p_pass else "N"
+                        if r < 0.06:
+                            minutes = rng.choice(UNPARSEABLE)
+                        else:
+                            minutes = rng.lognormvariate(mu, 0.6)
+                            # v1 wrote $((dt/60)).$((dt%60))
+                            minutes = ("%.2f" % minutes if schema == 2
+                                       else "%d.%d" % divmod(int(minutes * 60), 60))
+                        phases = ""
+                        if schema == 2:
+                            phases = "".join(",%.3f,%d" % (rng.expovariate(1 / 30), rng.random() < 0.05)
+                                             for _ in PHASES)
+                        f.write(f"{task},{run_id},{agent},{status},{minutes}{phases}\n")
+                    written += 1
+    os.replace(tmp, path)
+
+
+def dataset(workdir, rows, seed, schema=1):
+    """Results directory holding the synthetic CSV for rows, generating it
+    on first use."""
+    d = os.path.join(workdir, "rows%d-seed%d%s" % (rows, seed, "-v2" if schema == 2 else ""))
+    csv_path = os.path.join(d, "results.csv")
+    if not os.path.exists(csv_path):
+        os.makedirs(d, exist_ok=True)
+        t0 = time.perf_counter()
+        generate(csv_path, rows, seed, schema)
+        print("generated %d rows in %.1fs: %s" % (rows, time.perf_counter() - t0, csv_path),
+              file=sys.stderr)
+    return d
+
+
+def peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure(results_dir, use_cache, resamples, jobs):
+    """Cold then warm build of results_dir in this process; returns the
+    size entry for the JSON output."""
+    import build_report
+
+    os.environ.pop("TASK", None)
+    shutil.rmtree(os.path.join(results_dir, "runs"), ignore_errors=True)
+    try:
+        os.unlink(os.path.join(results_dir, ".results.csv.cols"))
+    except FileNotFoundError:
+        pass
+    entry = {}
+    for label in ("cold", "warm"):
+        timings = {}
+        t0 = time.perf_counter()
+        build_report.build(results_dir, "bench", use_cache=use_cache, resamples=resamples,
+                           jobs=jobs, timings=timings, memo=False)
+        timings["total"] = time.perf_counter() - t0
+        entry[label] = {k: round(v, 4) for k, v in timings.items()}
+    entry["peak_rss_kb"] = peak_rss_kb()
+    entry["html_bytes"] = os.path.getsize(os.path.join(results_dir, "report.html"))
+    return entry
+
+
+def run_size(rows, args):
+    d = dataset(args.workdir, rows, args.seed, args.schema)
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", d,
+           "--bootstrap", str(args.bootstrap)]
+    if args.jobs:
+        cmd += ["--jobs", str(args.jobs)]
+    if args.no_cache:
+        cmd.append("--no-cache")
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    entry = json.loads(out)
+    entry["rows"] = rows
+    return entry
+
+
+def compare(result, baseline, threshold):
+    """Return a list of regression messages (empty when within threshold)."""
+    problems = []
+    for size, entry in result["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for label in ("cold", "warm"):
+            for name, secs in entry.get(label, {}).items():
+                old = base.get(label, {}).get(name)
+                if old is not None and old >= MIN_SECONDS and secs > old * (1 + threshold):
+                    problems.append("%s rows %s %s: %.3fs vs %.3fs baseline (+%.0f%%)"
+                                    % (size, label, name, secs, old, (secs / old - 1) * 100))
+        old_rss = base.get("peak_rss_kb")
+        if old_rss and entry["peak_rss_kb"] > old_rss * (1 + threshold):
+            problems.append("%s rows peak RSS: %d KB vs %d KB baseline"
+                            % (size, entry["peak_rss_kb"], old_rss))
+    return problems
+
+
+def _burn(work):
+    x = 0
+    for i in range(work):
+        x += i * i
+    return x
+
+
+def bench_admission(args):
+    """Per-job seconds and makespan for --jobs CPU-bound jobs started at
+    once, without and then with admission."""
+    import admission
+
+    if args.job:
+        if args.state:
+            admission.acquire(args.state, os.getpid(), "tests")
+        t0 = time.monotonic()
+        _burn(args.work)
+        print(f"{time.monotonic() - t0:.4f}")
+        return 0
+    for mode in ("free-for-all", "admitted"):
+        with tempfile.TemporaryDirectory() as d:
+            cmd = [sys.executable, os.path.abspath(__file__), "admission", "--job", "--work", str(args.work)]
+            if mode == "admitted":
+                cmd += ["--state", os.path.join(d, "ledger.json")]
+            t0 = time.monotonic()
+            procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) for _ in range(args.jobs)]
+            # Reap each job as it exits: a zombie still holds its reservation
+            with ThreadPoolExecutor(args.jobs) as pool:
+                times = [float(out) for out, _ in pool.map(lambda p: p.communicate(), procs)]
+            makespan = time.monotonic() - t0
+        q = statistics.quantiles(times, n=10)
+        print(f"{mode:>13}: per job mean {statistics.mean(times):.2f}s  p90 {q[-1]:.2f}s  "
+              f"stdev {statistics.pstdev(times):.2f}s  makespan {makespan:.2f}s", flush=True)
+    return 0
+
+
+def bench_venvcache(args):
+    """Seconds for a fresh venv and pip install of --requirements, then a
+    provision from a cold and from a warm cache."""
+    import venvcache
+
+    with tempfile.TemporaryDirectory() as d:
+        cache = args.cache or os.path.join(d, "cache")
+        reqs = os.path.abspath(args.requirements)
+        for label, fn in (
+                ("venv + pip install", lambda: venvcache.build(os.path.join(d, "fresh"), reqs)),
+                ("cold cache", lambda: venvcache.provision(reqs, os.path.join(d, "cold"), cache)),
+                ("warm cache", lambda: venvcache.provision(reqs, os.path.join(d, "warm"), cache))):
+            t0 = time.monotonic()
+            fn()
+            print(f"{label:>18}: {time.monotonic() - t0:.2f}s", flush=True)
+    return 0
+
+
+def _tree_bytes(tree):
+    """(bytes in tree, bytes in files not shared with another link)."""
+    total = own = 0
+    for root, _, names in os.walk(tree):
+        for name in names:
+            st = os.lstat(os.path.join(root, name))
+            total += st.st_size
+            if st.st_nlink == 1:
+                own += st.st_size
+    return total, own
+
+
+def bench_nodecache(args):
+    """Seconds and node_modules disk use for npm ci in a copy of --project,
+    then installs from a cold and from a warm store."""
+    import nodecache
+
+    with tempfile.TemporaryDirectory() as d:
+        cache = args.cache or os.path.join(d, "cache")
+        runs = []
+        for label in ("npm ci", "cold store", "warm store"):
+            work = os.path.join(d, label.replace(" ", "-"))
+            os.makedirs(work)
+            for name in nodecache.FILES:
+                if os.path.exists(os.path.join(args.project, name)):
+                    shutil.copy2(os.path.join(args.project, name), work)
+            t0 = time.monotonic()
+            if label == "npm ci":
+                nodecache.npm_ci(work, args.npm)
+            else:
+                nodecache.install(work, cache, args.npm)
+            runs.append((label, time.monotonic() - t0, _tree_bytes(os.path.join(work, "node_modules"))))
+        for label, took, (total, own) in runs:
+            print(f"{label:>10}: {took:6.2f}s  node_modules {total / 1e6:.1f} MB, "
+                  f"{own / 1e6:.1f} MB not shared", flush=True)
+    return 0
+
+
+def _agent_output(mb, seed=0):
+    """Verbose-agent-like output: JSON events with repetitive structure."""
+    rng = random.Random(seed)
+    words = "the agent reads file writes edits runs tests passes fails tool result".split()
+    lines, size = [], 0
+    while size < mb << 20:
+        text = " ".join(rng.choice(words) for _ in range(rng.randrange(5, 60)))
+        line = json.dumps({"type": rng.choice(("assistant", "tool_use", "tool_result")),
+                           "ts": 1760000000 + size, "text": text}) + "\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines).encode()
+
+
+def bench_logcap(args):
+    """Seconds and disk use for --mb MB of output through tee, through
+    logcap.py run with and without the default cap, then a 4 KB range read."""
+    import logcap
+
+    data = _agent_output(args.mb)
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "out.jsonl")
+        with open(src, "wb") as f:
+            f.write(data)
+        run = f"{sys.executable} {os.path.abspath(logcap.__file__)} run"
+        runs = (("tee", f"{d}/tee.log", f"cat {src} | tee {d}/tee.log"),
+                ("logcap", f"{d}/full.log.gz", f"{run} --cap-mb {2 * args.mb} {d}/full.log.gz -- cat {src}"),
+                ("logcap 64 MB cap", f"{d}/cap.log.gz", f"{run} {d}/cap.log.gz -- cat {src}"))
+        for label, path, cmd in runs:
+            t0 = time.monotonic()
+            subprocess.run(cmd + " > /dev/null", shell=True, check=True)
+            print(f"{label:>16}: {time.monotonic() - t0:5.2f}s, "
+                  f"{os.path.getsize(path) / 1e6:6.1f} MB on disk", flush=True)
+        # The retained stream starts with the separator line run writes
+        offset = len("=" * 32) + 1
+        mid = len(data) // 3
+        t0 = time.monotonic()
+        chunk = logcap.read_range(f"{d}/full.log.gz", offset + mid, offset + mid + 4096)
+        took = 1000 * (time.monotonic() - t0)
+        print(f"{'4 KB range read':>16}: {took:5.1f} ms, "
+              f"{'matches' if chunk == data[mid:mid + 4096] else 'MISMATCH'}")
+    return 0
+
+
+def _claude_transcript(mb, seed):
+    """Claude stream-json events with large tool results, like a real log."""
+    rng = random.Random(seed)
+    lines, size, turn = [], 0, 0
+    lines.append(json.dumps({"type": "system", "subtype": "init", "tools": ["Bash", "Read", "Write"]}) + "\n")
+    while size < mb << 20:
+        turn += 1
+        name = rng.choice(("Write", "Edit", "Read", "Bash", "Glob"))
+        msg = {"id": f"msg_{turn}", "content": [
+            {"type": "text", "text": "Let me look at the project. " * rng.randrange(1, 8)},
+            {"type": "tool_use", "id": f"tu_{turn}", "name": name,
+             "input": {"file_path": "game.py", "content": "print('x')\n" * rng.randrange(10, 400)}}],
+            "usage": {"input_tokens": 10, "output_tokens": 200}}
+        result = {"type": "user", "message": {"content": [{"type": "tool_result", "tool_use_id": f"tu_{turn}",
+                                                         "content": "line of output\n" * rng.randrange(50, 2000)}]}}
+        for ev in ({"type": "assistant", "message": msg}, result):
+            line = json.dumps(ev, separators=(",", ":")) + "\n"
+            lines.append(line)
+            size += len(line)
+    lines.append(json.dumps({"type": "result", "num_turns": turn, "total_cost_usd": 0.42,
+                             "usage": {"input_tokens": 1000, "cache_read_input_tokens": 50000,
+                                       "output_tokens": 9000}}) + "\n")
+    return "".join(lines).encode()
+
+
+def bench_transcripts(args):
+    """Parse rate of `transcripts.py scan` over --logs synthetic Claude
+    logs of --mb MB each, serially and on the process pool."""
+    import logcap
+    import transcripts
+
+    with tempfile.TemporaryDirectory() as d:
+        for i in range(args.logs):
+            ws = os.path.join(d, f"bench-claude-run{i + 1}")
+            os.makedirs(ws)
+            writer = logcap.LogWriter(os.path.join(ws, "claude_generation.log.gz"), cap=1 << 40)
+            data = _claude_transcript(args.mb, i)
+            for j in range(0, len(data), 1 << 16):
+                writer.write(data[j:j + (1 << 16)])
+            writer.close()
+        raw = args.logs * args.mb
+        for label, jobs in (("serial", 1), (f"{os.cpu_count()} processes", None)):
+            t0 = time.monotonic()
+            transcripts.scan([d], jobs, force=True)
+            took = time.monotonic() - t0
+            print(f"{label:>14}: {args.logs} logs ({raw} MB of output) in {took:.2f}s, "
+                  f"{raw / took:.0f} MB/s", flush=True)
+        metrics = transcripts.read_metrics(os.path.join(d, transcripts.METRICS_NAME))
+        turns = statistics.median(m["turns"] for m in metrics.values())
+        print(f"{'':>14}  median turns per log: {turns:.0f}")
+    return 0
+
+
+def bench_rusage(args):
+    """Milliseconds per run of `true`, directly and under the supervisor."""
+    import rusage
+
+    supervised = [sys.executable, os.path.abspath(rusage.__file__), "run", "--out", os.devnull, "--"]
+    for label, prefix in (("direct", []), ("supervised", supervised)):
+        t0 = time.monotonic()
+        for _ in range(args.runs):
+            subprocess.run(prefix + ["true"], check=True)
+        print(f"{label:>10}: {1000 * (time.monotonic() - t0) / args.runs:6.1f} ms per phase", flush=True)
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark build_report.py on synthetic data, "
+                                 "or a harness component")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES,
+                    help=f"comma-separated row counts, e.g. 1e3,1e7 (default: {DEFAULT_SIZES})")
+    ap.add_argument("--schema", type=int, choices=(1, 2), default=1,
+                    help="results.csv schema to generate; 2 adds phase timings (default: 1)")
+    ap.add_argument("--seed", type=int, default=0, help="generator seed (default: 0)")
+    ap.add_argument("--workdir", default=DEFAULT_WORKDIR,
+                    help=f"where synthetic datasets are cached (default: {DEFAULT_WORKDIR})")
+    ap.add_argument("--out", help="write JSON results here instead of stdout")
+    ap.add_argument("--baseline", help="JSON from an earlier run to check for regressions")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="allowed slowdown as a fraction of the baseline (default: 0.25)")
+    ap.add_argument("--no-cache", action="store_true", help="benchmark the streaming CSV path")
+    ap.add_argument("--bootstrap", type=int, default=10000, metavar="N",
+                    help="bootstrap resamples passed to the build (default: 10000)")
+    ap.add_argument("--jobs", type=int, default=None, metavar="N",
+                    help="bootstrap worker processes (default: CPU count)")
+    ap.add_argument("--child", metavar="DIR", help=argparse.SUPPRESS)
+    sub = ap.add_subparsers(dest="component", metavar="COMPONENT",
+                            help="benchmark a harness component instead of the report")
+    ad = sub.add_parser("admission", help="a CPU-bound job mix with and without admission")
+    ad.add_argument("--jobs", type=int, default=2 * (os.cpu_count() or 1) + 2)
+    ad.add_argument("--work", type=int, default=2_000_000, help="loop iterations per job")
+    ad.add_argument("--job", action="store_true", help=argparse.SUPPRESS)
+    ad.add_argument("--state", help=argparse.SUPPRESS)
+    ad.set_defaults(bench=bench_admission)
+    vc = sub.add_parser("venvcache", help="a fresh venv against a cold and a warm venv cache")
+    vc.add_argument("--cache", help="cache directory (default: a temporary one)")
+    vc.add_argument("requirements")
+    vc.set_defaults(bench=bench_venvcache)
+    nc = sub.add_parser("nodecache", help="npm ci against a cold and a warm node_modules store")
+    nc.add_argument("--cache", help="store directory (default: a temporary one)")
+    nc.add_argument("--npm", default=os.environ.get("NPM_BIN") or "npm")
+    nc.add_argument("project")
+    nc.set_defaults(bench=bench_nodecache)
+    lc = sub.add_parser("logcap", help="tee against logcap.py on synthetic verbose agent output")
+    lc.add_argument("--mb", type=int, default=100)
+    lc.set_defaults(bench=bench_logcap)
+    tr = sub.add_parser("transcripts", help="scan synthetic Claude logs serially and on the pool")
+    tr.add_argument("--logs", type=int, default=120)
+    tr.add_argument("--mb", type=int, default=8, help="output per log")
+    tr.set_defaults(bench=bench_transcripts)
+    ru = sub.add_parser("rusage", help="overhead of the resource-usage supervisor per phase")
+    ru.add_argument("--runs", type=int, default=50)
+    ru.set_defaults(bench=bench_rusage)
+    args = ap.parse_args(argv)
+
+    if args.component:
+        return args.bench(args)
+    if args.child:
+        json.dump(measure(args.child, not args.no_cache, args.bootstrap, args.jobs), sys.stdout)
+        return 0
+
+    try:
+        sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        ap.error(f"bad --sizes: {args.sizes}")
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    result = {"meta": {"python": platform.python_version(), "numpy": numpy_version,
+                       "platform": platform.platform(), "cpus": os.cpu_count(),
+                       "seed": args.seed, "schema": args.schema, "bootstrap": args.bootstrap,
+                       "cache": not args.no_cache,
+                       "date": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "sizes": {}}
+    for rows in sizes:
+        entry = run_size(rows, args)
+        result["sizes"][str(rows)] = entry
+        print("%9d rows  cold %7.2fs  warm %7.2fs  peak RSS %7.1f MB"
+              % (rows, entry["cold"]["total"], entry["warm"]["total"], entry["peak_rss_kb"] / 1024),
+              file=sys.stderr)
+
+    text = json.dumps(result, indent=2) + "\n"
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(result, json.load(f), args.threshold)
+        for p in problems:
+            print("REGRESSION:", p, file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
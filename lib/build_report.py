@@ -0,0 +1,1080 @@
+#!/usr/bin/env python3
+"""Build report.html for an evaluation results directory.
+
+    build_report.py [--force] [RESULTS_DIR ...]
+    build_report.py --watch [--port PORT] RESULTS_DIR
+    build_report.py --diff [--out HTML] OLD_DIR NEW_DIR
+    build_report.py --db INDEX [--task T] [--agent A] [--since D] [--until D] OUT_DIR
+
+The report summarizes results.csv per agent and per task x agent, lists
+every run, and shows whatever else the harness left next to it:
+timeline.csv, metrics.csv and the generation logs of failed runs.
+--watch serves a live page instead (live.py), --diff compares two
+directories (difftest.py), and --db reads runs from the archive index
+(results_index.py).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import bootstrap
+import colcache
+import difftest
+import groupby
+import live
+import logcap
+import reportcache
+import results_index
+import rusage
+import timeline
+import transcripts
+from results import PHASES, iter_runs
+from runshards import RunShardWriter
+from sketch import TDigest
+
+QUANTILES = (0.5, 0.9, 0.99)
+LOG_TAIL = 4096        # bytes of each failed run's log shown in the report
+FAILED_LOGS = 50       # failed runs whose log tails are shown, latest first
+
+
+class GroupStats:
+    """Counts and duration sketch for one group of runs."""
+
+    __slots__ = ("total", "passed", "skipped", "times")
+
+    def __init__(self):
+        self.total = 0      # runs that were not skipped
+        self.passed = 0
+        self.skipped = 0
+        self.times = TDigest()
+
+    def add(self, run):
+        if run.status == "SKIP":
+            self.skipped += 1
+            return
+        self.total += 1
+        if run.status == "Y":
+            self.passed += 1
+        if run.minutes is not None:
+            self.times.add(run.minutes)
+
+    def merge(self, other):
+        self.total += other.total
+        self.passed += other.passed
+        self.skipped += other.skipped
+        self.times.merge(other.times)
+        return self
+
+    @property
+    def success_rate(self):
+        return (self.passed / self.total * 100.0) if self.total else 0.0
+
+    def quantile(self, q):
+        return self.times.quantile(q)
+
+
+class Aggregator:
+    """Streaming per-(task, agent) aggregation of Run records."""
+
+    def __init__(self):
+        self.groups = {}
+        self.run_ids = set()
+        self.phases = {}    # (agent, phase index) -> [TDigest, runs, failed]
+
+    def add(self, run):
+        key = (run.task, run.agent)
+        g = self.groups.get(key)
+        if g is None:
+            g = self.groups[key] = GroupStats()
+        g.add(run)
+        self.run_ids.add(run.run_id)
+        if run.phases is not None and run.status != "SKIP":
+            for i, (secs, ec) in enumerate(run.phases):
+                if secs is None:
+                    continue
+                p = self.phases.get((run.agent, i))
+                if p is None:
+                    p = self.phases[(run.agent, i)] = [TDigest(), 0, 0]
+                p[0].add(secs)
+                p[1] += 1
+                p[2] += bool(ec)
+
+    def tasks(self):
+        return sorted({t for t, _ in self.groups})
+
+    def agents(self):
+        return sorted({a for _, a in self.groups})
+
+    def by_agent(self):
+        out = {}
+        for (_, agent), g in sorted(self.groups.items()):
+            out.setdefault(agent, GroupStats()).merge(g)
+        return out
+
+    def phase_summary(self):
+        out = {}
+        for (agent, i), (times, runs, failed) in sorted(self.phases.items()):
+            out.setdefault(agent, {})[PHASES[i]] = groupby.PhaseStats(times.quantile(0.5), runs, failed)
+        return out
+
+    def summary(self):
+        return groupby.Summary(tasks=self.tasks(), agents=self.agents(), by_agent=self.by_agent(),
+                               cells=dict(self.groups), run_ids=len(self.run_ids),
+                               phases=self.phase_summary())
+
+
+def esc(x): return (str(x).replace("&","&amp;").replace("<","&lt;").replace(">","&gt;"))
+
+
+def fmt_min(v, suffix=""):
+    return "—" if v is None else f"{v:.2f}{suffix}"
+
+
+def bar_chart_svg(values, labels, width=560, height=200, unit="", errors=None):
+    if not values: return "<svg/>"
+    errors = errors or [None] * len(values)
+    maxv = max(list(values) + [e[1] for e in errors if e]) or 1
+    bar_h = max(12, int(height / (len(values)*1.5)))
+    gap = bar_h // 2
+    scale = (width - 160) / maxv
+    svg = [f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    y = gap
+    for v, lab, err in zip(values, labels, errors):
+        w = int(v * scale)
+        end = 120 + w
+        svg.append(f'<text x="6" y="{y+bar_h-4}" font-size="12" font-family="system-ui">{esc(lab)}</text>')
+        svg.append(f'<rect x="120" y="{y}" width="{w}" height="{bar_h}" fill="#4F46E5" rx="4"></rect>')
+        if err:
+            x0, x1, cy = 120 + int(err[0] * scale), 120 + int(err[1] * scale), y + bar_h // 2
+            svg.append(f'<path d="M{x0} {cy}H{x1}M{x0} {cy-4}V{cy+4}M{x1} {cy-4}V{cy+4}" stroke="#0f172a" stroke-width="1.5" fill="none"></path>')
+            end = max(end, x1)
+        svg.append(f'<text x="{end+6}" y="{y+bar_h-4}" font-size="12" font-family="system-ui">{v:.1f}{unit}</text>')
+        y += bar_h + gap
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+
+def ci_html(ci, fmt="{:.1f}"):
+    """Muted '[lo–hi]' suffix for a (lo, hi) interval, or nothing."""
+    if not ci:
+        return ""
+    return f' <span class="muted">[{fmt.format(ci[0])}–{fmt.format(ci[1])}]</span>'
+
+
+def rate_color(rate):
+    """Red (0%) through amber to green (100%) cell fill."""
+    return f"hsl({rate * 1.2:.0f}, 70%, 85%)"
+
+
+def heatmap_svg(tasks, agents, cells, cell_w=130, cell_h=44):
+    """Task x agent grid coloured by pass rate, labelled with rate and median."""
+    left, top = 120, 24
+    width = left + cell_w * len(agents) + 8
+    height = top + cell_h * len(tasks) + 8
+    svg = [f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    for j, agent in enumerate(agents):
+        x = left + j * cell_w + cell_w // 2
+        svg.append(f'<text x="{x}" y="16" font-size="12" font-family="system-ui" text-anchor="middle">{esc(agent)}</text>')
+    for i, task in enumerate(tasks):
+        y = top + i * cell_h
+        svg.append(f'<text x="6" y="{y + cell_h // 2 + 4}" font-size="12" font-family="system-ui">{esc(task)}</text>')
+        for j, agent in enumerate(agents):
+            x = left + j * cell_w
+            s = cells.get((task, agent))
+            fill = "#e5e7eb" if s is None or not s.total else rate_color(s.success_rate)
+            svg.append(f'<rect x="{x + 2}" y="{y + 2}" width="{cell_w - 4}" height="{cell_h - 4}" fill="{fill}" rx="4"></rect>')
+            if s is None or not s.total:
+                continue
+            cx = x + cell_w // 2
+            svg.append(f'<text x="{cx}" y="{y + 19}" font-size="12" font-family="system-ui" text-anchor="middle">'
+                       f'{s.success_rate:.0f}% (n={s.total})</text>')
+            svg.append(f'<text x="{cx}" y="{y + 34}" font-size="11" font-family="system-ui" text-anchor="middle" fill="#475569">'
+                       f'p50 {fmt_min(s.quantile(0.5), "m")}</text>')
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+
+def task_tables_html(summary, cis):
+    parts = []
+    for task in summary.tasks:
+        rows = []
+        for agent in summary.agents:
+            s = summary.cells.get((task, agent))
+            if s is None:
+                continue
+            ci = cis.get((task, agent), {})
+            rows.append(f"<tr><td>{esc(agent)}</td><td>{s.passed}/{s.total}</td>"
+                        f"<td>{s.success_rate:.1f}%{ci_html(ci.get('rate'))}</td>"
+                        f"<td>{fmt_min(s.quantile(0.5), ' m')}{ci_html(ci.get('median'), '{:.2f}')}</td>"
+                        f"<td>{fmt_min(s.quantile(0.9), ' m')}</td>"
+                        f"<td>{s.total + s.skipped}</td></tr>")
+        body = "\n      ".join(rows)
+        parts.append(f"""  <h3 class="mono">{esc(task)}</h3>
+  <table>
+    <thead><tr><th>Agent</th><th>Pass</th><th>Success Rate</th><th>Median Time</th><th>p90 Time</th><th>Runs</th></tr></thead>
+    <tbody>
+      {body}
+    </tbody>
+  </table>""")
+    return "\n".join(parts)
+
+
+PHASE_COLORS = ("#94a3b8", "#4F46E5", "#0ea5e9", "#f59e0b", "#10b981", "#ec4899")
+
+
+def phases_html(phases, width=560, bar_h=18):
+    """Stacked bars of median seconds per phase for each agent, plus a table
+    with failure counts.  Empty for schema v1 results."""
+    if not phases:
+        return ""
+    names = [p for p in PHASES if any(p in v for v in phases.values())]
+    color = dict(zip(PHASES, PHASE_COLORS))
+    totals = [sum(s.median for s in v.values() if s.median is not None) for v in phases.values()]
+    scale = (width - 200) / (max(totals) or 1)
+    height = (bar_h + 10) * len(phases) + 30
+    svg = [f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    y = 6
+    for (agent, stats), total in zip(phases.items(), totals):
+        svg.append(f'<text x="6" y="{y + bar_h - 4}" font-size="12" font-family="system-ui">{esc(agent)}</text>')
+        x = 120
+        for name in names:
+            s = stats.get(name)
+            if s is None or not s.median:
+                continue
+            w = s.median * scale
+            svg.append(f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{bar_h}" fill="{color[name]}">'
+                       f'<title>{name}: {s.median:.1f}s</title></rect>')
+            x += w
+        svg.append(f'<text x="{x + 6:.1f}" y="{y + bar_h - 4}" font-size="12" font-family="system-ui">{total:.0f}s</text>')
+        y += bar_h + 10
+    lx = 120
+    for name in names:
+        svg.append(f'<rect x="{lx}" y="{y + 4}" width="10" height="10" fill="{color[name]}"></rect>'
+                   f'<text x="{lx + 14}" y="{y + 13}" font-size="11" font-family="system-ui">{name}</text>')
+        lx += 24 + 7 * len(name)
+    svg.append('</svg>')
+    chart = "\n".join(svg)
+
+    head = "".join(f"<th>{name.capitalize()}</th>" for name in names)
+    rows = []
+    for agent, stats in phases.items():
+        cells = []
+        for name in names:
+            s = stats.get(name)
+            if s is None:
+                cells.append("<td>—</td>")
+                continue
+            failed = f' <span class="muted">({s.failed}/{s.runs} failed)</span>' if s.failed else ""
+            cells.append(f"<td>{'—' if s.median is None else f'{s.median:.1f} s'}{failed}</td>")
+        rows.append(f"<tr><td>{esc(agent)}</td>{''.join(cells)}</tr>")
+    body = "\n      ".join(rows)
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>Median Time by Phase (seconds)</h2>
+  {chart}
+  <table>
+    <thead><tr><th>Agent</th>{head}</tr></thead>
+    <tbody>
+      {body}
+    </tbody>
+  </table>
+</div>"""
+
+
+def timeline_html(cells, util, width=720, lane_h=14):
+    """Gantt chart of cells on their slots with phase segments, the number
+    of busy slots over time, and the utilization figures.  Empty when the
+    run left no timeline.csv."""
+    if util is None:
+        return ""
+    left, right = 60, 12
+    span = util.makespan or 1
+    scale = (width - left - right) / span
+    color = dict(zip(PHASES, PHASE_COLORS))
+    lanes = timeline.assign_slots(cells)
+    on_path = {id(c) for c in util.critical}
+    gantt_h = (lane_h + 2) * (max(lanes) + 1) + 24
+    svg = [f'<svg width="{width}" height="{gantt_h}" viewBox="0 0 {width} {gantt_h}">']
+    for c, lane in zip(cells, lanes):
+        y = 4 + lane * (lane_h + 2)
+        label = f"{c.task} #{c.run_id} {c.agent}: {c.end - c.start:.0f}s"
+        for p in c.phases:
+            x = left + (p.start - util.start) * scale
+            w = max((p.end - p.start) * scale, 0.5)
+            svg.append(f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{lane_h}" '
+                       f'fill="{color.get(p.phase, "#cbd5e1")}"><title>{esc(label)} • {esc(p.phase)} '
+                       f'{p.end - p.start:.0f}s</title></rect>')
+        if id(c) in on_path:
+            x = left + (c.start - util.start) * scale
+            svg.append(f'<rect x="{x:.1f}" y="{y}" width="{(c.end - c.start) * scale:.1f}" height="{lane_h}" '
+                       f'fill="none" stroke="#111827" stroke-width="1.5"></rect>')
+    for frac in (0, 0.5, 1):
+        x = left + (width - left - right) * frac
+        svg.append(f'<text x="{x:.1f}" y="{gantt_h - 6}" font-size="11" font-family="system-ui" '
+                   f'text-anchor="middle" fill="#64748b">{span * frac / 60:.0f}m</text>')
+    svg.append('</svg>')
+    gantt = "\n".join(svg)
+
+    steps = timeline.busy_steps(cells)
+    step_h = 80
+
+    def y_of(n):
+        return 4 + (step_h - 8) * (1 - n / util.slots)
+
+    path = [f"M{left} {y_of(0):.1f}"]
+    for t, n in steps:
+        x = left + (t - util.start) * scale
+        path.append(f"H{x:.1f} V{y_of(n):.1f}")
+    busy = (f'<svg width="{width}" height="{step_h}" viewBox="0 0 {width} {step_h}">'
+            f'<text x="{left - 6}" y="{y_of(util.slots) + 8:.1f}" font-size="11" font-family="system-ui" '
+            f'text-anchor="end" fill="#64748b">{util.slots}</text>'
+            f'<text x="{left - 6}" y="{y_of(0):.1f}" font-size="11" font-family="system-ui" '
+            f'text-anchor="end" fill="#64748b">0</text>'
+            f'<path d="{" ".join(path)}" stroke="#4F46E5" stroke-width="1.5" fill="none"></path></svg>')
+
+    saving = util.makespan - util.ideal
+    rows = [("Makespan", fmt_min(util.makespan / 60, " m")),
+            ("Slots (peak concurrency)", util.slots),
+            ("Busy slot-time", fmt_min(util.busy / 60, " m")),
+            ("Idle fraction", f"{util.idle_fraction * 100:.1f}%"),
+            ("Waiting at task barriers", fmt_min(util.barrier_wait / 60, " m")),
+            ("Critical path", f"{len(util.critical)} cells, {fmt_min(util.critical_work / 60, ' m')} of work"),
+            ("Ideal makespan", f"{fmt_min(util.ideal / 60, ' m')} "
+                               f'<span class="muted">({fmt_min(saving / 60, " m")} to gain)</span>')]
+    body = "\n      ".join(f"<tr><td>{name}</td><td>{value}</td></tr>" for name, value in rows)
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>Execution Timeline</h2>
+  <p class="muted">One row per slot; outlined cells form the critical path.</p>
+  {gantt}
+  <h2>Busy Slots</h2>
+  {busy}
+  <table>
+    <tbody>
+      {body}
+    </tbody>
+  </table>
+</div>"""
+
+
+def resources_html(summary):
+    """Median CPU, memory and I/O per agent and phase, and the host-wide
+    peaks (rusage.summarize).  Empty when no phase was supervised."""
+    if summary is None:
+        return ""
+    rows = []
+    for r in summary["rows"]:
+        cores = "—" if r["cores"] is None else f"{r['cores']:.2f}"
+        rows.append(f"<tr><td>{esc(r['agent'])}</td><td>{esc(r['phase'])}</td><td>{r['runs']}</td>"
+                    f"<td>{r['cpu_s']:.1f} s</td><td>{cores}</td>"
+                    f"<td>{r['rss_kb'] / 1024:.0f} MB <span class=\"muted\">(max {r['rss_max_kb'] / 1024:.0f})</span></td>"
+                    f"<td>{r['read_b'] / 1e6:.1f} / {r['written_b'] / 1e6:.1f} MB</td>"
+                    f"<td>{r['vol_ctx']:.0f} / {r['invol_ctx']:.0f}</td></tr>")
+    body = "\n      ".join(rows)
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>Resources by Phase</h2>
+  <p>CPU: <b>{summary['mean_cores']:.2f}</b> cores busy on average, <b>{summary['peak_cores']:.2f}</b> at peak
+  ({summary['cpu_s'] / 60:.1f} CPU minutes) • Memory: <b>{summary['peak_rss_kb'] / 1024:.0f} MB</b> at peak</p>
+  <p class="muted">Medians per run. Cores is CPU time over wall time. Peak memory sums the peak RSS of
+  phases running at the same time, so it is an upper bound. Context switches are voluntary / involuntary.</p>
+  <table>
+    <thead><tr><th>Agent</th><th>Phase</th><th>Runs</th><th>CPU</th><th>Cores</th><th>Peak RSS</th>
+    <th>Read / Written</th><th>Context Switches</th></tr></thead>
+    <tbody>
+      {body}
+    </tbody>
+  </table>
+</div>"""
+
+
+def timeline_fragment(results_dir):
+    """How the run used its parallel slots (timeline.py) and, for phases run
+    under the wait4 supervisor, what they used of the host (rusage.py)."""
+    path = os.path.join(results_dir, "timeline.csv")
+    if not os.path.isfile(path):
+        return ""
+    phases = timeline.read_timeline(path)
+    cells = timeline.cells(phases)
+    return timeline_html(cells, timeline.utilization(cells)) + resources_html(rusage.summarize(phases))
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def _fmt_count(v):
+    if v is None:
+        return "—"
+    return f"{v / 1e6:.2f}M" if v >= 1e6 else f"{v / 1e3:.1f}k" if v >= 1e4 else f"{v:.0f}"
+
+
+def efficiency_html(metrics, status):
+    """Per-agent medians of the transcript metrics (transcripts.py) and
+    tokens and cost per passing run; status maps cells to "Y"/"N"/"SKIP".
+    Empty when the run left no metrics.csv."""
+    by_agent = {}
+    for cell, m in sorted(metrics.items(), key=lambda item: item[0][2]):
+        if status.get(cell, "N") != "SKIP":
+            by_agent.setdefault(cell[2], []).append((m, status.get(cell) == "Y"))
+    if not by_agent:
+        return ""
+    rows = []
+    for agent, ms in by_agent.items():
+        med = {k: _median(m[k] for m, _ in ms) for k in transcripts.FIELDS}
+        passed = sum(ok for _, ok in ms)
+        tokens = [m["input_tokens"] + m["output_tokens"] for m, _ in ms if m["input_tokens"] is not None]
+        costs = [m["cost_usd"] for m, _ in ms if m["cost_usd"] is not None]
+        per_pass_tokens = _fmt_count(sum(tokens) / passed) if tokens and passed else "—"
+        per_pass_cost = f"${sum(costs) / passed:.2f}" if costs and passed else "—"
+        kinds = "/".join(_fmt_count(med[k]) for k in ("writes", "reads", "shell"))
+        first = "—" if med["first_write_s"] is None else f"{med['first_write_s']:.0f} s"
+        rows.append(f"<tr><td>{esc(agent)}</td><td>{len(ms)}</td><td>{_fmt_count(med['turns'])}</td>"
+                    f"<td>{_fmt_count(med['tool_calls'])} <span class=\"muted\">({kinds})</span></td>"
+                    f"<td>{_fmt_count(med['input_tokens'])} / {_fmt_count(med['output_tokens'])}</td>"
+                    f"<td>{first}</td><td>{per_pass_tokens}</td><td>{per_pass_cost}</td></tr>")
+    body = "\n      ".join(rows)
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>Agent Efficiency</h2>
+  <p class="muted">Medians per run from the generation logs; tool calls are broken down as writes/reads/shell.
+  Per-pass figures divide everything spent by the number of passing runs.</p>
+  <table>
+    <thead><tr><th>Agent</th><th>Runs</th><th>Turns</th><th>Tool Calls</th><th>Tokens In / Out</th>
+    <th>First Write</th><th>Tokens per Pass</th><th>Cost per Pass</th></tr></thead>
+    <tbody>
+      {body}
+    </tbody>
+  </table>
+</div>"""
+
+
+def efficiency_fragment(results_dir):
+    """Efficiency table for the cells in metrics.csv (transcripts.py)."""
+    metrics = transcripts.read_metrics(os.path.join(results_dir, transcripts.METRICS_NAME))
+    if not metrics:
+        return ""
+    status = {}
+    for run in iter_runs(os.path.join(results_dir, "results.csv")):
+        cell = (run.task, run.run_id, run.agent)
+        if cell in metrics:
+            status[cell] = run.status
+    return efficiency_html(metrics, status)
+
+
+def failed_logs_html(tails):
+    """<details> with the log tail of each failed run; tails holds (run,
+    path of the log relative to the report, bytes of output, tail)."""
+    if not tails:
+        return ""
+    items = []
+    for run, rel, seen, tail in tails:
+        text = tail.decode("utf-8", "replace")
+        items.append(f"""<details>
+    <summary class="mono">{esc(run.task)} · {esc(run.agent)} · run {run.run_id} <span class="muted">— {_fmt_count(seen)}B of output, <a href="{esc(rel)}">full log</a></span></summary>
+    <pre class="mono log">{esc(text)}</pre>
+  </details>""")
+    body = "\n  ".join(items)
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>Failed Runs <span class="muted">({len(tails)})</span></h2>
+  <p class="muted">The last {LOG_TAIL // 1024} KB of each generation log. <span class="mono">logcap.py cat --range</span>
+  or the <span class="mono">/log</span> view of <span class="mono">build_report.py --watch</span> show any other part.</p>
+  {body}
+</div>"""
+
+
+def failed_logs_fragment(results_dir):
+    """Last LOG_TAIL bytes of the latest failed runs' generation logs, read
+    through each log's block index (logcap.py) so that only the blocks
+    holding them are decompressed."""
+    failed = deque((run for run in iter_runs(os.path.join(results_dir, "results.csv")) if run.status == "N"),
+                   maxlen=FAILED_LOGS)
+    tails = []
+    for run in reversed(failed):
+        log = transcripts.cell_log(results_dir, run.task, run.run_id, run.agent)
+        if log is None or not log.endswith(".gz"):
+            continue
+        try:
+            index = logcap.load_index(log)
+            end = logcap.retained(index)
+            tail = logcap.read_range(log, max(0, end - LOG_TAIL), end, index)
+        except (OSError, ValueError):
+            continue
+        tails.append((run, os.path.relpath(log, results_dir), index["seen"], tail))
+    return failed_logs_html(tails)
+
+
+# Fragments read from files other than results.csv, each memoized on its
+# own inputs (reportcache.PARTS)
+FILE_FRAGMENTS = {"timeline": timeline_fragment, "efficiency": efficiency_fragment,
+                  "failed_logs": failed_logs_fragment}
+
+
+def summary_rows_html(by_agent, cis):
+    rows = []
+    for agent, s in by_agent.items():
+        ci = cis.get(agent, {})
+        cells = "".join(f"<td>{fmt_min(s.quantile(q), ' m')}"
+                        f"{ci_html(ci.get('median'), '{:.2f}') if q == 0.5 else ''}</td>" for q in QUANTILES)
+        rows.append(f"<tr><td>{esc(agent)}</td><td>{s.passed}/{s.total}</td>"
+                    f"<td>{s.success_rate:.1f}%{ci_html(ci.get('rate'))}</td>{cells}</tr>")
+    return "\n".join(rows)
+
+
+STYLE = """<style>
+  :root { --fg:#0f172a; --muted:#64748b; --card:#f8fafc; --accent:#4F46E5; }
+  body { font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; color:var(--fg); margin:24px; }
+  h1 { margin: 0 0 4px 0; }
+  .muted { color: var(--muted); }
+  .grid { display:grid; grid-template-columns: 1fr 1fr; gap: 24px; }
+  .card { background:var(--card); padding:16px; border-radius:12px; box-shadow:0 1px 2px rgba(0,0,0,.06); }
+  table { width:100%; border-collapse: collapse; }
+  th, td { padding:8px 10px; border-bottom:1px solid #e5e7eb; text-align:left; }
+  th { font-weight:600; }
+  .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; }
+  .vt { height:480px; overflow:auto; }
+  .vt th { position:sticky; top:0; background:var(--card); cursor:pointer; user-select:none; }
+  .vt td { white-space:nowrap; }
+  input.filter { margin:0 0 8px 0; padding:6px 8px; width:280px; border:1px solid #e5e7eb; border-radius:6px; }
+  details { margin:6px 0; }
+  pre.log { max-height:360px; overflow:auto; white-space:pre-wrap; font-size:12px; background:#fff; padding:8px; }
+</style>"""
+
+# Virtualized "All Runs" table: renders only the rows in view, pulling the
+# shards they live in via <script> tags.  Sorting or filtering loads every
+# shard once and then works on an index array.
+RUNS_SCRIPT = """<script>
+(function () {
+  var M = RUNS_MANIFEST, shards = {}, pending = {}, waiting = null;
+  var view = null, sortCol = -1, sortDir = 1, rowH = 34, queued = false;
+  var box = document.getElementById('runs-scroll'), body = box.querySelector('tbody');
+  var count = document.getElementById('runs-count'), filter = document.getElementById('runs-filter');
+  function esc(x) { return String(x).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;'); }
+  function pad(i) { return ('0000' + i).slice(-5); }
+  function load(i) {
+    if (shards[i] || pending[i]) return;
+    pending[i] = true;
+    var s = document.createElement('script');
+    s.src = 'runs/' + pad(i) + '.js?v=' + M.v;
+    document.head.appendChild(s);
+  }
+  window.loadRunShard = function (i, d) {
+    shards[i] = d; delete pending[i];
+    if (waiting && Object.keys(shards).length === M.shards) { var f = waiting; waiting = null; f(); }
+    schedule();
+  };
+  function row(k) {
+    var d = shards[Math.floor(k / M.shard)];
+    if (!d) return null;
+    var j = k % M.shard, m = d.m[j];
+    return [M.tasks[d.t[j]], d.r[j], M.agents[d.a[j]], M.statuses[d.s[j]], m < 0 ? '—' : (m / 100).toFixed(2)];
+  }
+  function render() {
+    queued = false;
+    var n = view ? view.length : M.rows;
+    var first = Math.max(0, Math.floor(box.scrollTop / rowH) - 10);
+    var last = Math.min(n, first + Math.ceil(box.clientHeight / rowH) + 20);
+    var html = '<tr style="height:' + first * rowH + 'px"></tr>';
+    for (var k = first; k < last; k++) {
+      var idx = view ? view[k] : k, r = row(idx);
+      if (!r) { load(Math.floor(idx / M.shard)); html += '<tr><td colspan="5" class="muted">…</td></tr>'; continue; }
+      html += '<tr><td>' + r.map(esc).join('</td><td>') + '</td></tr>';
+    }
+    html += '<tr style="height:' + (n - last) * rowH + 'px"></tr>';
+    body.innerHTML = html;
+    if (last > first && body.rows[1].offsetHeight) rowH = body.rows[1].offsetHeight;
+    count.textContent = '(' + n + (view ? ' of ' + M.rows : '') + ')';
+  }
+  function schedule() { if (!queued) { queued = true; requestAnimationFrame(render); } }
+  function loadAll(then) {
+    if (Object.keys(shards).length === M.shards) return then();
+    waiting = then;
+    for (var i = 0; i < M.shards; i++) load(i);
+  }
+  function apply() {
+    var f = filter.value.trim().toLowerCase();
+    if (!f && sortCol < 0) { view = null; return schedule(); }
+    loadAll(function () {
+      var v = [];
+      for (var k = 0; k < M.rows; k++) {
+        if (!f || row(k).slice(0, 4).join(' ').toLowerCase().indexOf(f) >= 0) v.push(k);
+      }
+      if (sortCol >= 0) {
+        v.sort(function (a, b) {
+          var x = row(a)[sortCol], y = row(b)[sortCol];
+          if (sortCol === 1 || sortCol === 4) { x = parseFloat(x); y = parseFloat(y); x = isNaN(x) ? -1 : x; y = isNaN(y) ? -1 : y; }
+          return x < y ? -sortDir : x > y ? sortDir : a - b;
+        });
+      }
+      view = v; box.scrollTop = 0; schedule();
+    });
+  }
+  var timer;
+  filter.addEventListener('input', function () { clearTimeout(timer); timer = setTimeout(apply, 200); });
+  Array.prototype.forEach.call(box.querySelectorAll('th'), function (th, i) {
+    th.addEventListener('click', function () { sortDir = sortCol === i ? -sortDir : 1; sortCol = i; apply(); });
+  });
+  box.addEventListener('scroll', schedule);
+  schedule();
+})();
+</script>
+"""
+
+
+def runs_card_html(manifest):
+    """The "All Runs" table.  Runs are not inlined: a small virtualized table
+    loads the shards described by manifest (runshards.py) on scroll, so the
+    page stays the same size however many runs there are."""
+    data = json.dumps(manifest, separators=(",", ":")).replace("</", "<\\/")
+    return f"""<div class="card" style="margin-top:24px">
+  <h2>All Runs <span class="muted" id="runs-count">({manifest['rows']})</span></h2>
+  <noscript><p class="muted">The run table needs JavaScript. Raw data: <a href="results.csv">results.csv</a>.</p></noscript>
+  <input id="runs-filter" class="filter" placeholder="Filter by task, agent or status…">
+  <div id="runs-scroll" class="vt">
+    <table class="mono">
+      <thead><tr><th>Task</th><th>RunId</th><th>Agent</th><th>Success</th><th>Time (min)</th></tr></thead>
+      <tbody></tbody>
+    </table>
+  </div>
+</div>
+<script>var RUNS_MANIFEST = {data};</script>
+{RUNS_SCRIPT}"""
+
+
+LIVE_SCRIPT = """<script>
+(function () {
+  function esc(x) { return String(x).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;'); }
+  function min(v) { return v === null || v === undefined ? '—' : v.toFixed(2) + 'm'; }
+  function row(cells) { return '<tr><td>' + cells.join('</td><td>') + '</td></tr>'; }
+  function rate(s) {
+    return '<span style="background:hsl(' + Math.round(s.rate * 1.2) + ',70%,85%);padding:2px 6px;border-radius:4px">'
+      + s.rate.toFixed(1) + '%</span>';
+  }
+  var status = document.getElementById('live-status');
+  var src = new EventSource('events');
+  src.onopen = function () { status.textContent = 'live'; };
+  src.onerror = function () { status.textContent = 'reconnecting…'; };
+  src.onmessage = function (e) {
+    var d = JSON.parse(e.data);
+    document.getElementById('live-rows').textContent = d.rows;
+    document.getElementById('live-agents').innerHTML = Object.keys(d.agents).map(function (a) {
+      var s = d.agents[a];
+      return row([esc(a), s.passed + '/' + s.total, rate(s), min(s.p50), min(s.p90), s.skipped]);
+    }).join('');
+    document.getElementById('live-cells').innerHTML = d.cells.map(function (s) {
+      return row([esc(s.task), esc(s.agent), s.passed + '/' + s.total, rate(s), min(s.p50)]);
+    }).join('');
+    document.getElementById('live-recent').innerHTML = d.recent.map(function (r) {
+      var cell = encodeURIComponent(r.task + '-' + r.agent + '-run' + r.run_id);
+      return row([esc(r.task), r.run_id, '<a href="log?cell=' + cell + '">' + esc(r.agent) + '</a>',
+                  esc(r.status), min(r.minutes)]);
+    }).join('');
+  };
+})();
+</script>
+"""
+
+
+def live_page_html(results_dir):
+    """Page served by --watch; filled in from the /events stream."""
+    return f"""<!doctype html>
+<meta charset="utf-8">
+<title>CLI Coding Agents — Live Results</title>
+{STYLE}
+
+<h1>CLI Coding Agents — Live Results</h1>
+<p class="muted"><span class="mono">{esc(results_dir)}</span> • Rows: <b id="live-rows">0</b> • <span id="live-status">connecting…</span></p>
+
+<div class="card">
+  <h2>Per-agent Summary</h2>
+  <table>
+    <thead><tr><th>Agent</th><th>Pass</th><th>Success Rate</th><th>p50 Time</th><th>p90 Time</th><th>Skipped</th></tr></thead>
+    <tbody id="live-agents"></tbody>
+  </table>
+</div>
+
+<div class="grid" style="margin-top:24px">
+  <div class="card">
+    <h2>Task × Agent</h2>
+    <table>
+      <thead><tr><th>Task</th><th>Agent</th><th>Pass</th><th>Success Rate</th><th>p50 Time</th></tr></thead>
+      <tbody id="live-cells"></tbody>
+    </table>
+  </div>
+  <div class="card">
+    <h2>Latest Runs</h2>
+    <p class="muted">Agent names link to the end of the run's generation log.</p>
+    <table class="mono">
+      <thead><tr><th>Task</th><th>RunId</th><th>Agent</th><th>Success</th><th>Time (min)</th></tr></thead>
+      <tbody id="live-recent"></tbody>
+    </table>
+  </div>
+</div>
+{LIVE_SCRIPT}"""
+
+
+def render_fragments(summary, cis=None):
+    """The parts of the page that depend only on the statistics, keyed by
+    name; cis maps agent and (task, agent) keys to {"rate": ci, "median": ci}."""
+    cis = cis or {}
+    by_agent = summary.by_agent
+    labels = list(by_agent)
+    return {
+        "success_svg": bar_chart_svg([s.success_rate for s in by_agent.values()], labels, unit="%",
+                                     errors=[cis.get(a, {}).get("rate") for a in labels]),
+        "time_svg": bar_chart_svg([s.quantile(0.5) or 0.0 for s in by_agent.values()], labels, unit="m",
+                                  errors=[cis.get(a, {}).get("median") for a in labels]),
+        "summary_rows": summary_rows_html(by_agent, cis),
+        "breakdown": heatmap_svg(summary.tasks, summary.agents, summary.cells) + "\n"
+                     + task_tables_html(summary, cis),
+        "phases": phases_html(summary.phases),
+    }
+
+
+def assemble_report(task_label, tasks, run_ids, fragments, runs_card):
+    qheads = "".join(f"<th>p{int(q * 100)} Time</th>" for q in QUANTILES)
+    return f"""<!doctype html>
+<meta charset="utf-8">
+<title>CLI Coding Agents — Evaluation Report</title>
+{STYLE}
+
+<h1>CLI Coding Agents — Evaluation Report</h1>
+<p class="muted">Task: <b class="mono">{esc(task_label or ", ".join(tasks)) or 'n/a'}</b> • Runs per agent: <b>{run_ids}</b></p>
+
+<div class="grid">
+  <div class="card">
+    <h2>Success Rate</h2>
+    {fragments["success_svg"]}
+  </div>
+  <div class="card">
+    <h2>Median Time (minutes)</h2>
+    {fragments["time_svg"]}
+  </div>
+</div>
+
+<div class="card" style="margin-top:24px">
+  <h2>Per-agent Summary</h2>
+  <table>
+    <thead><tr><th>Agent</th><th>Pass</th><th>Success Rate</th>{qheads}</tr></thead>
+    <tbody>
+      {fragments["summary_rows"]}
+    </tbody>
+  </table>
+</div>
+
+<div class="card" style="margin-top:24px">
+  <h2>Task × Agent Breakdown</h2>
+  {fragments["breakdown"]}
+</div>
+{fragments.get("efficiency", "")}
+{fragments["phases"]}
+{fragments.get("timeline", "")}
+{fragments.get("failed_logs", "")}
+
+{runs_card}"""
+
+
+def render_report(summary, task_label, manifest, cis=None):
+    return assemble_report(task_label, summary.tasks, summary.run_ids,
+                           render_fragments(summary, cis), runs_card_html(manifest))
+
+
+def aggregate(runs, shards=None):
+    """Single pass over runs: fold each into an Aggregator and, when given,
+    a RunShardWriter.  Per-(task, agent) state is a handful of counters plus
+    a t-digest of durations, so memory stays constant however many runs
+    there are."""
+    agg = Aggregator()
+    for run in runs:
+        agg.add(run)
+        if shards is not None:
+            shards.add(run)
+    return agg
+
+
+def write_report(html_path, html):
+    tmp_path = html_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp_path, html_path)
+
+
+@contextmanager
+def phase(timings, name):
+    """Add the wall time of the block to timings[name] (if timings is a dict)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+
+
+def _compute(cols, runs, shards, stats, resamples, jobs, timings):
+    """Summary and confidence intervals from cols, or from runs when there
+    is no sidecar.  Runs are also fed to shards unless it is None; with
+    stats False only the shards are written and (None, None) returned.
+
+    With NumPy, statistics from cols are exact vectorized group-bys
+    (groupby.py), and pass rate and median time get percentile-bootstrap
+    confidence intervals (bootstrap.py)."""
+    cis = None
+    if cols is None:
+        with phase(timings, "aggregate"):
+            return aggregate(runs, shards).summary(), cis
+    if shards is not None:
+        with phase(timings, "shards"):
+            shards.add_columns(cols)
+    if not stats:
+        return None, cis
+    if groupby.np is None:
+        with phase(timings, "aggregate"):
+            return aggregate(cols.runs()).summary(), cis
+    with phase(timings, "aggregate"):
+        summary = groupby.summarize(cols, QUANTILES)
+    if resamples:
+        with phase(timings, "bootstrap"):
+            by_agent, cells = groupby.samples(cols)
+            cis = bootstrap.confidence_intervals({**by_agent, **cells}, resamples, jobs=jobs)
+    return summary, cis
+
+
+def build(results_dir, task_label="", use_cache=True, runs=None, resamples=10000, jobs=None,
+          timings=None, memo=True):
+    """Write results_dir/report.html from `runs`, or from
+    results_dir/results.csv when runs is None.  Unless use_cache is False,
+    rows come from the columnar sidecar (colcache.py), so an unchanged CSV
+    is not parsed again.  Confidence intervals need NumPy and the sidecar;
+    resamples=0 turns them off.
+
+    Builds from results.csv are memoized by content hash (reportcache.py)
+    unless memo is False: unchanged inputs skip the build, and only the
+    stale parts of the page are recomputed otherwise.
+
+    When timings is a dict, seconds spent in each phase are added to it:
+    memo, parse, shards, aggregate, bootstrap, render and write.  Without
+    the sidecar, parsing is fused into aggregate."""
+    html_path = os.path.join(results_dir, "report.html")
+    csv_path = os.path.join(results_dir, "results.csv")
+    from_csv = runs is None
+    cache = keys = data = manifest = None
+    parts = {}
+    if runs is None and memo:
+        with phase(timings, "memo"):
+            cache = reportcache.ReportCache(results_dir)
+            keys = cache.keys(csv_path, task_label, groupby.np is not None, resamples)
+            if cache.page_fresh(keys, html_path):
+                return html_path
+            data, manifest, parts = cache.data(keys), cache.manifest(keys), cache.parts(keys)
+
+    if data is None or manifest is None:
+        cols = None
+        if runs is None:
+            with phase(timings, "parse"):
+                cols = colcache.load(csv_path) if use_cache else None
+            if cols is None:
+                runs = iter_runs(csv_path)
+        shards = RunShardWriter(os.path.join(results_dir, "runs")) if manifest is None else None
+        try:
+            summary, cis = _compute(cols, runs, shards, data is None, resamples, jobs, timings)
+        finally:
+            if cols is not None:
+                cols.close()
+        if shards is not None:
+            with phase(timings, "shards"):
+                manifest = shards.close()
+        if data is None:
+            with phase(timings, "render"):
+                data = {"tasks": summary.tasks, "run_ids": summary.run_ids,
+                        "fragments": render_fragments(summary, cis)}
+    with phase(timings, "render"):
+        for name in reportcache.PARTS:
+            if name not in parts:
+                parts[name] = FILE_FRAGMENTS[name](results_dir) if from_csv else ""
+        html = assemble_report(task_label, data["tasks"], data["run_ids"], {**data["fragments"], **parts},
+                               runs_card_html(manifest))
+    with phase(timings, "write"):
+        write_report(html_path, html)
+        if cache is not None:
+            cache.save(keys, html_path, data, manifest, parts)
+    return html_path
+
+
+REGRESSED, IMPROVED = "#fee2e2", "#dcfce7"
+
+
+def fmt_p(p):
+    return "—" if p is None else ("<0.001" if p < 0.001 else f"{p:.3f}")
+
+
+def diff_rows_html(rows, alpha, label):
+    """Table rows for difftest.compare() output; label(key) gives the
+    leading cells.  Significant (q < alpha) changes are shaded red when
+    worse and green when better."""
+    out = []
+    for key, r in rows.items():
+        old_rate = r["old_passed"] / r["old_total"] * 100 if r["old_total"] else None
+        new_rate = r["new_passed"] / r["new_total"] * 100 if r["new_total"] else None
+        shade = {}
+        if r["q_rate"] is not None and r["q_rate"] < alpha:
+            shade["rate"] = REGRESSED if new_rate < old_rate else IMPROVED
+        if r["q_time"] is not None and r["q_time"] < alpha:
+            shade["time"] = REGRESSED if r["new_median"] > r["old_median"] else IMPROVED
+        d_rate = "—" if old_rate is None or new_rate is None else f"{new_rate - old_rate:+.1f} pts"
+        d_time = ("—" if r["old_median"] is None or r["new_median"] is None
+                  else f"{r['new_median'] - r['old_median']:+.2f} m")
+        rate_bg = f' style="background:{shade["rate"]}"' if "rate" in shade else ""
+        time_bg = f' style="background:{shade["time"]}"' if "time" in shade else ""
+        out.append(f"<tr>{label(key)}"
+                   f"<td>{r['old_passed']}/{r['old_total']}</td><td>{r['new_passed']}/{r['new_total']}</td>"
+                   f"<td{rate_bg}>{d_rate}</td><td>{fmt_p(r['p_rate'])}</td><td>{fmt_p(r['q_rate'])}</td>"
+                   f"<td>{fmt_min(r['old_median'], ' m')}</td><td>{fmt_min(r['new_median'], ' m')}</td>"
+                   f"<td{time_bg}>{d_time}</td><td>{fmt_p(r['p_time'])}</td><td>{fmt_p(r['q_time'])}</td></tr>")
+    return "\n      ".join(out)
+
+
+def render_diff(old_label, new_label, agent_rows, cell_rows, alpha):
+    head = ("<th>Pass (old)</th><th>Pass (new)</th><th>Δ Rate</th><th>Fisher p</th><th>q</th>"
+            "<th>Median (old)</th><th>Median (new)</th><th>Δ Median</th><th>Perm. p</th><th>q</th>")
+    regressions = sum(1 for r in cell_rows.values() for q, worse in (
+        (r["q_rate"], r["new_total"] and r["old_total"]
+         and r["new_passed"] / r["new_total"] < r["old_passed"] / r["old_total"]),
+        (r["q_time"], r["new_median"] is not None and r["old_median"] is not None
+         and r["new_median"] > r["old_median"])) if q is not None and q < alpha and worse)
+    return f"""<!doctype html>
+<meta charset="utf-8">
+<title>CLI Coding Agents — Evaluation Diff</title>
+{STYLE}
+
+<h1>CLI Coding Agents — Evaluation Diff</h1>
+<p class="muted">Old: <b class="mono">{esc(old_label)}</b> • New: <b class="mono">{esc(new_label)}</b> •
+Significant regressions: <b>{regressions}</b> (BH q &lt; {alpha:g}; red = worse, green = better)</p>
+
+<div class="card">
+  <h2>Per-agent</h2>
+  <table>
+    <thead><tr><th>Agent</th>{head}</tr></thead>
+    <tbody>
+      {diff_rows_html(agent_rows, alpha, lambda a: f"<td>{esc(a)}</td>")}
+    </tbody>
+  </table>
+</div>
+
+<div class="card" style="margin-top:24px">
+  <h2>Task × Agent</h2>
+  <table>
+    <thead><tr><th>Task</th><th>Agent</th>{head}</tr></thead>
+    <tbody>
+      {diff_rows_html(cell_rows, alpha, lambda k: f"<td>{esc(k[0])}</td><td>{esc(k[1])}</td>")}
+    </tbody>
+  </table>
+</div>
+"""
+
+
+def _samples(results_dir, use_cache=True):
+    csv_path = os.path.join(results_dir, "results.csv")
+    cols = colcache.load(csv_path) if use_cache else None
+    if cols is None:
+        return groupby.samples_from_runs(iter_runs(csv_path))
+    try:
+        by_agent, cells = groupby.samples(cols)
+        # Copy out of the mapping before it is closed
+        return ({k: (p.copy(), m.copy()) for k, (p, m) in by_agent.items()},
+                {k: (p.copy(), m.copy()) for k, (p, m) in cells.items()})
+    finally:
+        cols.close()
+
+
+def build_diff(old_dir, new_dir, out_path, use_cache=True, permutations=10000, jobs=None, alpha=0.05):
+    """Compare two results directories cell by cell (difftest.py) and write
+    an HTML diff.  Needs NumPy."""
+    old_agents, old_cells = _samples(old_dir, use_cache)
+    new_agents, new_cells = _samples(new_dir, use_cache)
+    html = render_diff(old_dir, new_dir,
+                       difftest.compare(old_agents, new_agents, permutations, jobs),
+                       difftest.compare(old_cells, new_cells, permutations, jobs), alpha)
+    write_report(out_path, html)
+    return out_path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build report.html from results.csv")
+    ap.add_argument("results_dirs", nargs="*", default=["."], metavar="RESULTS_DIR",
+                    help="directories containing results.csv (default: .)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="parse results.csv directly instead of using the columnar sidecar")
+    ap.add_argument("--force", action="store_true",
+                    help="rebuild even when the inputs are unchanged since the last build")
+    ap.add_argument("--bootstrap", type=int, default=10000, metavar="N",
+                    help="bootstrap resamples for confidence intervals; 0 disables (default: 10000)")
+    ap.add_argument("--jobs", type=int, default=None, metavar="N",
+                    help="worker processes for bootstrapping (default: CPU count)")
+    ap.add_argument("--diff", action="store_true",
+                    help="compare two RESULTS_DIRs (old, new) with significance tests; needs NumPy")
+    ap.add_argument("--out", metavar="HTML", help="--diff output (default: NEW/diff.html)")
+    ap.add_argument("--permutations", type=int, default=10000, metavar="N",
+                    help="--diff permutations per duration test (default: 10000)")
+    ap.add_argument("--alpha", type=float, default=0.05,
+                    help="--diff false discovery rate for highlighting (default: 0.05)")
+    ap.add_argument("--watch", action="store_true",
+                    help="tail RESULTS_DIR/results.csv and serve a live page instead of writing report.html")
+    ap.add_argument("--host", default="127.0.0.1", help="--watch listen address (default: 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=8765, help="--watch port; 0 picks a free one (default: 8765)")
+    ap.add_argument("--interval", type=float, default=1.0, metavar="SEC",
+                    help="--watch polling interval (default: 1)")
+    ap.add_argument("--db", metavar="INDEX",
+                    help="read runs from a results_index.py database; RESULTS_DIR is then "
+                         "only where report.html is written")
+    results_index.add_filter_args(ap)
+    args = ap.parse_args(argv)
+    task_label = os.environ.get("TASK", "")
+    if args.diff:
+        if len(args.results_dirs) != 2:
+            ap.error("--diff takes two results directories: OLD NEW")
+        if groupby.np is None:
+            ap.error("--diff needs NumPy (pip install numpy)")
+        old_dir, new_dir = args.results_dirs
+        out = args.out or os.path.join(new_dir, "diff.html")
+        print("Wrote", build_diff(old_dir, new_dir, out, not args.no_cache, args.permutations,
+                                  args.jobs, args.alpha))
+        return 0
+    if args.watch:
+        if len(args.results_dirs) != 1:
+            ap.error("--watch takes exactly one results directory")
+        results_dir = args.results_dirs[0]
+        live.serve(os.path.join(results_dir, "results.csv"), Aggregator, live_page_html(results_dir),
+                   args.host, args.port, args.interval)
+        return 0
+    if args.db:
+        if not os.path.exists(args.db):
+            ap.error(f"index database not found: {args.db}")
+        conn = results_index.connect(args.db, readonly=True)
+        filters = results_index.filter_args(args)
+        runs = results_index.query_runs(conn, **filters)
+        filters = [f"{k.replace('_', '-')}={v}" for k, v in filters.items() if v is not None]
+        task_label = task_label or " ".join(filters) or "all indexed runs"
+        if len(args.results_dirs) != 1:
+            ap.error("--db takes exactly one output directory")
+        os.makedirs(args.results_dirs[0], exist_ok=True)
+        print("Wrote", build(args.results_dirs[0], task_label, runs=runs))
+        conn.close()
+        return 0
+    status = 0
+    for results_dir in args.results_dirs:
+        if not os.path.exists(os.path.join(results_dir, "results.csv")):
+            print(f"Skipping {results_dir}: no results.csv", file=sys.stderr)
+            status = 1
+            continue
+        timings = {}
+        html_path = build(results_dir, task_label, use_cache=not args.no_cache,
+                          resamples=args.bootstrap, jobs=args.jobs, timings=timings,
+                          memo=not args.force)
+        print("Wrote" if "write" in timings else "Up to date:", html_path)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
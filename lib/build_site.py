@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""Generate the docs site from docs/results.
+
+    build_site.py [--force] [--jobs N] [DOCS_DIR]
+
+docs/results/<date>/ holds a results.csv, a report.html and one directory
+per run, <task>-<agent>-run<N>/, with the prompt and what the agent wrote.
+This writes DOCS_DIR/index.html (the latest evaluations, the tasks and a
+link to every run) and a run.html inside each run directory with the
+prompt, the file tree and every source file.  A generation log captured by
+logcap.py is shown by its last LOG_TAIL bytes, read through its block
+index, with a link to the whole (gzipped) log.
+
+The tree is walked once with os.scandir.  `.site-cache.json` keeps the
+graph of which inputs each page was built from: every input file's size,
+mtime and SHA-256 (re-hashed only when size or mtime change) and a key per
+page derived from them, the results.csv row and this generator's own
+source.  Only pages whose key changed are rendered, in a process pool when
+there are enough of them, so publishing one more night writes that night's
+run pages and the index and leaves every other page alone.
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+import logcap
+from reportcache import digest, file_sha256
+from results import iter_runs
+from results_index import REPO_DIR
+
+CACHE_NAME = ".site-cache.json"
+RUN_PAGE = "run.html"
+RUN_DIR = re.compile(r"(?P<task>.+)-(?P<agent>[^-]+)-run(?P<run_id>\d+)")
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__", ".pytest_cache"}
+MAX_LISTING = 256 * 1024
+LOG_TAIL = 16 * 1024
+POOL_MIN_PAGES = 16
+
+with open(os.path.abspath(__file__), "rb") as _f:
+    GENERATOR_VERSION = digest("site", _f.read())
+
+STYLE = """<style>
+  :root { --primary: #2563eb; --secondary: #64748b; --background: #f8fafc; --card: #ffffff;
+          --border: #e2e8f0; --text: #1e293b; --text-muted: #64748b; }
+  * { margin: 0; padding: 0; box-sizing: border-box; }
+  body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', system-ui, sans-serif;
+         line-height: 1.6; color: var(--text); background: var(--background); }
+  .container { max-width: 1200px; margin: 0 auto; padding: 2rem; }
+  .header { text-align: center; margin-bottom: 3rem; }
+  .header h1 { font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;
+               background: linear-gradient(135deg, var(--primary), #7c3aed);
+               -webkit-background-clip: text; background-clip: text; -webkit-text-fill-color: transparent; }
+  .header p { font-size: 1.25rem; color: var(--text-muted); max-width: 600px; margin: 0 auto; }
+  .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+                gap: 1.5rem; margin-bottom: 3rem; }
+  .stat-card, .results-section { background: var(--card); border-radius: 12px;
+                                 box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1); border: 1px solid var(--border); }
+  .stat-card { padding: 1.5rem; text-align: center; }
+  .stat-number { font-size: 2rem; font-weight: 700; color: var(--primary); }
+  .stat-label { color: var(--text-muted); font-size: 0.875rem; text-transform: uppercase;
+                letter-spacing: 0.05em; margin-top: 0.5rem; }
+  .results-section { padding: 2rem; margin-bottom: 2rem; }
+  .results-section h2 { font-size: 1.5rem; margin-bottom: 1rem; }
+  .results-section h3 { margin: 1.5rem 0 1rem; font-size: 1.125rem; }
+  .results-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1.5rem; }
+  .result-card { border: 1px solid var(--border); border-radius: 8px; overflow: hidden; }
+  .result-header { background: var(--background); padding: 1rem; border-bottom: 1px solid var(--border); }
+  .result-title { font-weight: 600; font-size: 1.125rem; }
+  .result-date { color: var(--text-muted); font-size: 0.875rem; margin-top: 0.25rem; }
+  .result-body { padding: 1rem; }
+  .success-badge, .fail-badge { padding: 0.25rem 0.75rem; border-radius: 9999px; font-size: 0.875rem;
+                                font-weight: 500; display: inline-block; margin-bottom: 0.5rem; }
+  .success-badge { background: #dcfce7; color: #166534; }
+  .fail-badge { background: #fee2e2; color: #991b1b; }
+  .btn { display: inline-block; padding: 0.75rem 1.5rem; background: var(--primary); color: white;
+         text-decoration: none; border-radius: 8px; font-weight: 500; transition: background 0.2s;
+         margin-right: 0.5rem; margin-bottom: 0.5rem; }
+  .btn:hover { background: #1d4ed8; }
+  .btn-secondary { background: var(--secondary); }
+  .btn-secondary:hover { background: #475569; }
+  .tasks-overview { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+                    gap: 1.5rem; margin-top: 2rem; }
+  .task-card { background: var(--card); padding: 1.5rem; border-radius: 8px; border: 1px solid var(--border); }
+  .task-title { font-size: 1.125rem; font-weight: 600; margin-bottom: 0.5rem; }
+  .task-description, .muted { color: var(--text-muted); font-size: 0.875rem; }
+  pre { background: #0f172a; color: #e2e8f0; padding: 1rem; border-radius: 8px; overflow-x: auto;
+        font-size: 0.8125rem; line-height: 1.5; white-space: pre-wrap; }
+  details { margin-bottom: 0.75rem; }
+  summary { cursor: pointer; font-family: ui-monospace, SFMono-Regular, Menlo, monospace; font-size: 0.875rem; }
+  .footer { text-align: center; padding: 2rem 0; color: var(--text-muted);
+            border-top: 1px solid var(--border); margin-top: 3rem; }
+  .github-link { color: var(--primary); text-decoration: none; font-weight: 500; }
+  .github-link:hover { text-decoration: underline; }
+</style>"""
+
+PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>$title</title>
+$style
+</head>
+<body>
+<div class="container">
+$body
+<footer class="footer">
+  <p>Evaluation framework available on
+    <a href="https://github.com/halton/coding-agent-eval" class="github-link">GitHub</a>
+    • Results updated $updated</p>
+</footer>
+</div>
+</body>
+</html>
+""")
+
+INDEX_BODY = Template("""<header class="header">
+  <h1>AI Coding Agent Evaluation</h1>
+  <p>Evaluation framework comparing $agent_names across diverse coding tasks</p>
+</header>
+
+<div class="stats-grid">
+  <div class="stat-card"><div class="stat-number">$n_agents</div><div class="stat-label">AI Agents</div></div>
+  <div class="stat-card"><div class="stat-number">$n_tasks</div><div class="stat-label">Coding Tasks</div></div>
+  <div class="stat-card"><div class="stat-number">$success_rate</div><div class="stat-label">Success Rate</div></div>
+  <div class="stat-card"><div class="stat-number">$n_runs</div><div class="stat-label">Total Implementations</div></div>
+</div>
+
+<section class="results-section">
+  <h2>Evaluation Results</h2>
+  <div class="results-grid">
+$date_cards
+  </div>
+</section>
+
+<section class="results-section">
+  <h2>Evaluation Tasks</h2>
+  <div class="tasks-overview">
+$task_cards
+  </div>
+</section>
+
+<section class="results-section">
+  <h2>Explore Individual Results</h2>
+  <p>Prompt, file tree and full source of every agent's implementation:</p>
+$run_links
+</section>
+
+<section class="results-section">
+  <h2>About This Evaluation</h2>
+  <p>This evaluation framework provides objective assessment of AI coding agents across diverse programming challenges. Key features:</p>
+  <ul style="margin: 1rem 0; padding-left: 2rem;">
+    <li><strong>Parallel Execution:</strong> All agents work simultaneously for fair comparison</li>
+    <li><strong>Acceptance Testing:</strong> Each implementation is validated against specific criteria</li>
+    <li><strong>Multiple Technologies:</strong> Tests span web development, game development, and system programming</li>
+    <li><strong>Reproducible Results:</strong> Automated testing ensures consistent evaluation standards</li>
+    <li><strong>Open Source:</strong> Full framework and results available for inspection and extension</li>
+  </ul>
+</section>""")
+
+RUN_BODY = Template("""<header class="header">
+  <h1>$task • $agent</h1>
+  <p>Run $run_id • $date</p>
+</header>
+
+<section class="results-section">
+  $badge
+  <div style="margin-top: 1rem;">
+    <a href="$home" class="btn">All Results</a>
+$buttons
+  </div>
+</section>
+
+<section class="results-section">
+  <h2>Prompt</h2>
+  <pre>$prompt</pre>
+</section>
+
+<section class="results-section">
+  <h2>Files</h2>
+  <pre>$tree</pre>
+</section>
+
+<section class="results-section">
+  <h2>Source</h2>
+$listings
+</section>""")
+
+
+def esc(x):
+    return str(x).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def pretty_date(date):
+    try:
+        d = datetime.date.fromisoformat(date)
+    except ValueError:
+        return date
+    return f"{d:%B} {d.day}, {d.year}"
+
+
+def _walk(path, rel, out):
+    with os.scandir(path) as it:
+        for e in it:
+            r = f"{rel}{e.name}"
+            if e.is_dir(follow_symlinks=False):
+                if e.name not in SKIP_DIRS:
+                    _walk(e.path, r + "/", out)
+            elif e.is_file(follow_symlinks=False) and r != RUN_PAGE:
+                st = e.stat(follow_symlinks=False)
+                out[r] = (st.st_size, st.st_mtime_ns)
+
+
+def scan(results_root):
+    """{date: {"files": {name: (size, mtime_ns)}, "runs": {dir: {rel: (size,
+    mtime_ns)}}}} for every dated directory, from one pass over the tree."""
+    dates = {}
+    if not os.path.isdir(results_root):
+        return dates
+    with os.scandir(results_root) as it:
+        for d in it:
+            if not d.is_dir() or d.name.startswith("."):
+                continue
+            files, runs = {}, {}
+            with os.scandir(d.path) as entries:
+                for e in entries:
+                    if e.is_dir(follow_symlinks=False) and RUN_DIR.fullmatch(e.name):
+                        runs[e.name] = {}
+                        _walk(e.path, "", runs[e.name])
+                    elif e.is_file(follow_symlinks=False):
+                        st = e.stat(follow_symlinks=False)
+                        files[e.name] = (st.st_size, st.st_mtime_ns)
+            dates[d.name] = {"files": files, "runs": runs}
+    return dates
+
+
+class SiteCache:
+    """Input hashes, parsed results.csv rows and page keys from the last
+    build of a docs directory."""
+
+    def __init__(self, docs_dir):
+        self.path = os.path.join(docs_dir, CACHE_NAME)
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        self.files = self.state.setdefault("files", {})
+        self.rows = self.state.setdefault("rows", {})
+        self.pages = self.state.setdefault("pages", {})
+        self.seen = set()
+
+    def hash(self, path, stat):
+        """sha256 of path, re-read only when (size, mtime_ns) changed."""
+        self.seen.add(path)
+        f = self.files.get(path)
+        if f is None or (f[0], f[1]) != tuple(stat):
+            f = self.files[path] = [stat[0], stat[1], file_sha256(path)]
+        return f[2]
+
+    def results(self, csv_path, sha):
+        """{"task,agent,run_id": [status, minutes]} for a results.csv."""
+        cached = self.rows.get(csv_path)
+        if cached is None or cached["sha"] != sha:
+            rows = {f"{r.task},{r.agent},{r.run_id}": [r.status, r.minutes] for r in iter_runs(csv_path)}
+            cached = self.rows[csv_path] = {"sha": sha, "rows": rows}
+        return cached["rows"]
+
+    def stale(self, page, key, force=False):
+        return force or self.pages.get(page) != key or not os.path.exists(page)
+
+    def save(self, built):
+        self.pages.update(built)
+        for path in [p for p in self.files if p not in self.seen]:
+            del self.files[path]
+        for path in [p for p in self.rows if p not in self.seen]:
+            del self.rows[path]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only checkout: pages are written, just not memoized
+
+
+def write_page(path, html):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, path)
+
+
+def _read_text(path, size):
+    """File contents for a listing, or None for binaries and oversized files."""
+    if size > MAX_LISTING:
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def _log_tail(path):
+    """(last LOG_TAIL bytes, bytes of output) of a logcap log, or None when
+    its index cannot be read."""
+    try:
+        index = logcap.load_index(path)
+        end = logcap.retained(index)
+        return logcap.read_range(path, max(0, end - LOG_TAIL), end, index), index["seen"]
+    except (OSError, ValueError):
+        return None
+
+
+def tree_text(rels):
+    """An indented file tree from sorted relative paths."""
+    lines, shown = [], set()
+    for rel in rels:
+        parts = rel.split("/")
+        for depth in range(len(parts) - 1):
+            d = "/".join(parts[:depth + 1])
+            if d not in shown:
+                shown.add(d)
+                lines.append("  " * depth + esc(parts[depth]) + "/")
+        lines.append("  " * (len(parts) - 1) + f'<a href="#f-{esc(rel)}" style="color:inherit">{esc(parts[-1])}</a>')
+    return "\n".join(lines)
+
+
+def render_run(job):
+    """Write one run.html.  job is plain data so it can cross to a worker."""
+    run_path, date, name, files, row = job
+    m = RUN_DIR.fullmatch(name)
+    rels = sorted(rel for rel in files if not rel.endswith(".log.gz.idx"))
+    listings, apps = [], []
+    for rel in rels:
+        if rel == "prompt.txt":
+            continue
+        if rel.endswith("index.html") and "/tests/" not in f"/{rel}":
+            apps.append(rel)
+        path = os.path.join(run_path, rel)
+        tail = _log_tail(path) if rel + ".idx" in files else None
+        text = _read_text(path, files[rel][0]) if tail is None else None
+        if tail is not None:
+            data, seen = tail
+            body = (f'<p class="muted">The last {len(data)} of {seen} bytes of output; '
+                    f'<a href="{esc(rel)}">whole log</a> (gzip)</p>'
+                    f'<pre>{esc(data.decode("utf-8", errors="replace"))}</pre>')
+        elif text is None:
+            body = f'<p class="muted"><a href="{esc(rel)}">{esc(rel)}</a> ({files[rel][0]} bytes, not shown)</p>'
+        else:
+            body = f"<pre>{esc(text)}</pre>"
+        listings.append(f'<details id="f-{esc(rel)}"><summary>{esc(rel)}</summary>{body}</details>')
+    prompt = _read_text(os.path.join(run_path, "prompt.txt"), files["prompt.txt"][0]) if "prompt.txt" in files else None
+    if row is None:
+        badge = '<span class="muted">Not in results.csv</span>'
+    else:
+        status, minutes = row
+        cls = "success-badge" if status == "Y" else "fail-badge"
+        label = {"Y": "Passed", "SKIP": "Skipped"}.get(status, "Failed")
+        took = "" if minutes is None else f" in {minutes:.2f} min"
+        badge = f'<div class="{cls}">{label}{took}</div>'
+    buttons = "\n".join(f'    <a href="{esc(os.path.dirname(rel) or ".")}/" class="btn btn-secondary">'
+                        f'Open {esc(os.path.dirname(rel) or "app")}</a>' for rel in apps)
+    buttons += '\n    <a href="../report.html" class="btn btn-secondary">Report</a>'
+    body = RUN_BODY.substitute(
+        task=esc(m["task"]), agent=esc(m["agent"]), run_id=m["run_id"], date=esc(pretty_date(date)),
+        badge=badge, home="../../../index.html", buttons=buttons,
+        prompt=esc(prompt or "(no prompt.txt)"), tree=tree_text(rels), listings="\n".join(listings))
+    out = os.path.join(run_path, RUN_PAGE)
+    write_page(out, PAGE.substitute(title=esc(f"{m['task']} • {m['agent']} • run {m['run_id']}"),
+                                    style=STYLE, body=body, updated=esc(pretty_date(date))))
+    return out
+
+
+def task_blurb(prompts_dir, task):
+    path = os.path.join(prompts_dir, f"{task}.txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return ""
+
+
+def render_index(dated, blurbs, updated):
+    """dated: [(date, files, {run dir: row or None})] newest first."""
+    agents, tasks, n_runs = set(), set(), 0
+    for _, _, runs in dated:
+        for name in runs:
+            m = RUN_DIR.fullmatch(name)
+            agents.add(m["agent"])
+            tasks.add(m["task"])
+            n_runs += 1
+    rate = "—"
+    for _, _, runs in dated:
+        graded = [r for r in runs.values() if r is not None and r[0] != "SKIP"]
+        if graded:
+            rate = f"{100 * sum(r[0] == 'Y' for r in graded) / len(graded):.0f}%"
+            break
+
+    cards = []
+    for date, files, runs in dated:
+        graded = [r for r in runs.values() if r is not None and r[0] != "SKIP"]
+        badge = ""
+        if graded:
+            pct = 100 * sum(r[0] == "Y" for r in graded) / len(graded)
+            badge = f'<div class="{"success-badge" if pct >= 50 else "fail-badge"}">{pct:.0f}% Success Rate</div>'
+        names = [RUN_DIR.fullmatch(n) for n in runs]
+        summary = (f"{len(runs)} runs of {', '.join(sorted({m['task'] for m in names})) or 'no tasks'} "
+                   f"by {', '.join(sorted({m['agent'] for m in names})) or 'no agents'}.")
+        links = []
+        if "report.html" in files:
+            links.append(f'<a href="results/{esc(date)}/report.html" class="btn">View Full Report</a>')
+        if "results.csv" in files:
+            links.append(f'<a href="results/{esc(date)}/results.csv" class="btn btn-secondary">Download CSV</a>')
+        cards.append(f"""    <div class="result-card">
+      <div class="result-header">
+        <div class="result-title">{esc(pretty_date(date))} Evaluation</div>
+        <div class="result-date">{len({m['task'] for m in names})} Tasks • {len({m['agent'] for m in names})} Agents</div>
+      </div>
+      <div class="result-body">
+        {badge}
+        <p>{esc(summary)}</p>
+        <div style="margin-top: 1rem;">{"".join(links)}</div>
+      </div>
+    </div>""")
+
+    task_cards = "\n".join(f"""    <div class="task-card">
+      <div class="task-title">{esc(t)}</div>
+      <div class="task-description">{esc(blurbs.get(t, ""))}</div>
+    </div>""" for t in sorted(tasks))
+
+    sections = []
+    for date, _, runs in dated:
+        by_task = {}
+        for name in sorted(runs, key=lambda n: (RUN_DIR.fullmatch(n)["task"], RUN_DIR.fullmatch(n)["agent"],
+                                                int(RUN_DIR.fullmatch(n)["run_id"]))):
+            by_task.setdefault(RUN_DIR.fullmatch(name)["task"], []).append(name)
+        for task, names in by_task.items():
+            links = "\n".join(
+                f'  <a href="results/{esc(date)}/{esc(n)}/{RUN_PAGE}" class="btn">'
+                f'{esc(RUN_DIR.fullmatch(n)["agent"])} run {RUN_DIR.fullmatch(n)["run_id"]}</a>' for n in names)
+            sections.append(f"<h3>{esc(pretty_date(date))} • {esc(task)}</h3>\n{links}")
+
+    body = INDEX_BODY.substitute(
+        agent_names=esc(", ".join(sorted(agents)) or "AI coding agents"),
+        n_agents=len(agents), n_tasks=len(tasks), success_rate=rate, n_runs=n_runs,
+        date_cards="\n".join(cards), task_cards=task_cards, run_links="\n".join(sections))
+    return PAGE.substitute(title="AI Coding Agent Evaluation", style=STYLE, body=body, updated=esc(updated))
+
+
+def build(docs_dir, force=False, jobs=None, prompts_dir=None):
+    """Bring docs_dir's pages up to date; returns the paths written."""
+    prompts_dir = prompts_dir or os.path.join(REPO_DIR, "prompts")
+    results_root = os.path.join(docs_dir, "results")
+    cache = SiteCache(docs_dir)
+    tree = scan(results_root)
+    dates = sorted(tree, reverse=True)
+    updated = pretty_date(dates[0]) if dates else "never"
+
+    jobs_todo, built, dated, index_inputs = [], {}, [], [GENERATOR_VERSION, updated]
+    for date in dates:
+        files, runs = tree[date]["files"], tree[date]["runs"]
+        date_dir = os.path.join(results_root, date)
+        rows = {}
+        if "results.csv" in files:
+            csv_path = os.path.join(date_dir, "results.csv")
+            rows = cache.results(csv_path, cache.hash(csv_path, files["results.csv"]))
+        run_rows = {}
+        for name, run_files in sorted(runs.items()):
+            m = RUN_DIR.fullmatch(name)
+            row = rows.get(f"{m['task']},{m['agent']},{int(m['run_id'])}")
+            run_rows[name] = row
+            run_path = os.path.join(date_dir, name)
+            hashes = [f"{rel}:{cache.hash(os.path.join(run_path, rel), st)}" for rel, st in sorted(run_files.items())]
+            page = os.path.join(run_path, RUN_PAGE)
+            key = digest(GENERATOR_VERSION, date, name, json.dumps(row), *hashes)
+            if cache.stale(page, key, force):
+                jobs_todo.append((run_path, date, name, run_files, row))
+                built[page] = key
+        dated.append((date, files, run_rows))
+        index_inputs += [date, sorted(files), json.dumps(run_rows, sort_keys=True)]
+
+    tasks = {RUN_DIR.fullmatch(n)["task"] for _, _, runs in dated for n in runs}
+    blurbs = {t: task_blurb(prompts_dir, t) for t in sorted(tasks)}
+    index = os.path.join(docs_dir, "index.html")
+    index_key = digest(*index_inputs, json.dumps(blurbs, sort_keys=True))
+
+    written = []
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(jobs_todo) >= POOL_MIN_PAGES:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            written += pool.map(render_run, jobs_todo, chunksize=max(1, len(jobs_todo) // (4 * jobs)))
+    else:
+        written += [render_run(job) for job in jobs_todo]
+    if cache.stale(index, index_key, force):
+        write_page(index, render_index(dated, blurbs, updated))
+        built[index] = index_key
+        written.append(index)
+    cache.save(built)
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate docs/index.html and per-run pages from docs/results")
+    ap.add_argument("docs_dir", nargs="?", default=os.path.join(REPO_DIR, "docs"),
+                    help="docs directory holding results/<date>/ (default: docs/)")
+    ap.add_argument("--force", action="store_true", help="rebuild every page")
+    ap.add_argument("--jobs", type=int, default=None, help="render processes (default: all CPUs)")
+    args = ap.parse_args(argv)
+    written = build(args.docs_dir, force=args.force, jobs=args.jobs)
+    print(f"Wrote {len(written)} pages" if written else f"Up to date: {args.docs_dir}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
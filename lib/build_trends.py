@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Build a cross-date trend report from published results directories.
+
+    build_trends.py [--out docs/trends.html] [RESULTS_DIR ...]
+
+RESULTS_DIR defaults to every docs/results/<date>/ holding a results.csv.
+Each directory gets a small `.trend.json` aggregate: counts plus a t-digest
+of durations per (task, agent).  It is recomputed only when that
+directory's results.csv changes size or mtime (or the aggregate format
+changes), so adding a night costs one directory's work however long the
+history is.  Per-agent series are then assembled by merging those
+aggregates: pass rate and median time per date, overall and per task.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+from build_report import STYLE, GroupStats, aggregate, esc, fmt_min
+from results import iter_runs
+from results_index import REPO_DIR, source_date
+from sketch import TDigest
+
+AGGREGATE_NAME = ".trend.json"
+FORMAT = 1
+COLORS = ("#4F46E5", "#0ea5e9", "#f59e0b", "#10b981", "#ec4899", "#64748b", "#ef4444", "#84cc16")
+
+
+def _cell_stats(cell):
+    g = GroupStats()
+    g.total, g.passed, g.skipped = cell["total"], cell["passed"], cell["skipped"]
+    g.times = TDigest.from_dict(cell["times"])
+    return g
+
+
+def load_aggregate(results_dir):
+    """{"date", "cells": {(task, agent): GroupStats}} for results_dir,
+    recomputing its .trend.json when the CSV has changed."""
+    csv_path = os.path.join(results_dir, "results.csv")
+    agg_path = os.path.join(results_dir, AGGREGATE_NAME)
+    st = os.stat(csv_path)
+    try:
+        with open(agg_path) as f:
+            saved = json.load(f)
+        if (saved.get("v"), saved.get("size"), saved.get("mtime_ns")) != (FORMAT, st.st_size, st.st_mtime_ns):
+            saved = None
+    except (OSError, ValueError):
+        saved = None
+    if saved is None:
+        agg = aggregate(iter_runs(csv_path))
+        saved = {"v": FORMAT, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 "date": source_date(csv_path),
+                 "cells": [{"task": t, "agent": a, "total": g.total, "passed": g.passed,
+                            "skipped": g.skipped, "times": g.times.to_dict()}
+                           for (t, a), g in sorted(agg.groups.items())]}
+        tmp = agg_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(saved, f, separators=(",", ":"))
+            os.replace(tmp, agg_path)
+        except OSError:
+            pass  # read-only checkout: use the aggregate without saving it
+    return {"date": saved["date"],
+            "cells": {(c["task"], c["agent"]): _cell_stats(c) for c in saved["cells"]}}
+
+
+def series(dated, task=None):
+    """{agent: [GroupStats or None per date]} merged over tasks (or for one
+    task)."""
+    out = {}
+    for i, d in enumerate(dated):
+        for (t, agent), g in d["cells"].items():
+            if task is not None and t != task:
+                continue
+            row = out.setdefault(agent, [None] * len(dated))
+            if row[i] is None:
+                row[i] = GroupStats()
+            row[i].merge(g)
+    return dict(sorted(out.items()))
+
+
+def line_chart_svg(dates, lines, unit="", width=720, height=220):
+    """One polyline per agent; None values break the line."""
+    left, right, top, bottom = 48, 120, 12, 36
+    values = [v for vs in lines.values() for v in vs if v is not None]
+    if not dates or not values:
+        return "<svg/>"
+    maxv = max(values) or 1
+    step = (width - left - right) / max(len(dates) - 1, 1)
+
+    def xy(i, v):
+        return left + i * step, top + (height - top - bottom) * (1 - v / maxv)
+
+    svg = [f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    for frac in (0, 0.5, 1):
+        y = top + (height - top - bottom) * (1 - frac)
+        svg.append(f'<line x1="{left}" x2="{width - right}" y1="{y:.1f}" y2="{y:.1f}" stroke="#e5e7eb"></line>')
+        svg.append(f'<text x="{left - 6}" y="{y + 4:.1f}" font-size="11" font-family="system-ui" '
+                   f'text-anchor="end" fill="#64748b">{maxv * frac:.0f}{unit}</text>')
+    for i in sorted({0, len(dates) - 1, len(dates) // 2}):
+        svg.append(f'<text x="{left + i * step:.1f}" y="{height - 12}" font-size="11" font-family="system-ui" '
+                   f'text-anchor="middle" fill="#64748b">{esc(dates[i])}</text>')
+    for k, (agent, vs) in enumerate(lines.items()):
+        color = COLORS[k % len(COLORS)]
+        path, pen = [], "M"
+        for i, v in enumerate(vs):
+            if v is None:
+                pen = "M"
+                continue
+            x, y = xy(i, v)
+            path.append(f"{pen}{x:.1f} {y:.1f}")
+            pen = "L"
+            svg.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{color}">'
+                       f'<title>{esc(agent)} {esc(dates[i])}: {v:.1f}{unit}</title></circle>')
+        if path:
+            svg.append(f'<path d="{" ".join(path)}" stroke="{color}" stroke-width="2" fill="none"></path>')
+        svg.append(f'<text x="{width - right + 10}" y="{top + 14 + k * 16}" font-size="12" '
+                   f'font-family="system-ui" fill="{color}">{esc(agent)}</text>')
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+
+def charts_html(dates, by_agent):
+    rate = {a: [None if g is None or not g.total else g.success_rate for g in gs] for a, gs in by_agent.items()}
+    median = {a: [None if g is None else g.quantile(0.5) for g in gs] for a, gs in by_agent.items()}
+    return f"""<div class="grid">
+  <div class="card">
+    <h2>Success Rate</h2>
+    {line_chart_svg(dates, rate, "%")}
+  </div>
+  <div class="card">
+    <h2>Median Time (minutes)</h2>
+    {line_chart_svg(dates, median, "m")}
+  </div>
+</div>"""
+
+
+def latest_table_html(dates, by_agent):
+    """Latest date against the one before it, per agent."""
+    rows = []
+    for agent, gs in by_agent.items():
+        seen = [(d, g) for d, g in zip(dates, gs) if g is not None and g.total]
+        if not seen:
+            continue
+        date, g = seen[-1]
+        delta = ""
+        if len(seen) > 1:
+            diff = g.success_rate - seen[-2][1].success_rate
+            delta = f' <span class="muted">({diff:+.1f} pts vs {esc(seen[-2][0])})</span>'
+        rows.append(f"<tr><td>{esc(agent)}</td><td>{esc(date)}</td><td>{g.passed}/{g.total}</td>"
+                    f"<td>{g.success_rate:.1f}%{delta}</td><td>{fmt_min(g.quantile(0.5), ' m')}</td>"
+                    f"<td>{len(seen)}</td></tr>")
+    body = "\n      ".join(rows)
+    return f"""<table>
+    <thead><tr><th>Agent</th><th>Latest</th><th>Pass</th><th>Success Rate</th><th>Median Time</th><th>Dates</th></tr></thead>
+    <tbody>
+      {body}
+    </tbody>
+  </table>"""
+
+
+def render_trends(dated):
+    dates = [d["date"] for d in dated]
+    overall = series(dated)
+    tasks = sorted({t for d in dated for t, _ in d["cells"]})
+    per_task = "\n".join(f"""<div class="card" style="margin-top:24px">
+  <h2 class="mono">{esc(task)}</h2>
+  {charts_html(dates, series(dated, task))}
+</div>""" for task in tasks)
+    span = f"{dates[0]} – {dates[-1]}" if dates else "no results"
+    return f"""<!doctype html>
+<meta charset="utf-8">
+<title>CLI Coding Agents — Trends</title>
+{STYLE}
+
+<h1>CLI Coding Agents — Trends</h1>
+<p class="muted">{esc(span)} • Dates: <b>{len(dates)}</b> • Tasks: <b>{len(tasks)}</b></p>
+
+{charts_html(dates, overall)}
+
+<div class="card" style="margin-top:24px">
+  <h2>Latest Results</h2>
+  {latest_table_html(dates, overall)}
+</div>
+
+{per_task}
+"""
+
+
+def main(argv=None):
+    default_dirs = os.path.join(REPO_DIR, "docs", "results", "*")
+    ap = argparse.ArgumentParser(description="Build a cross-date trend report")
+    ap.add_argument("results_dirs", nargs="*", metavar="RESULTS_DIR",
+                    help=f"dated results directories (default: {default_dirs})")
+    ap.add_argument("--out", default=os.path.join(REPO_DIR, "docs", "trends.html"),
+                    help="output HTML (default: docs/trends.html)")
+    args = ap.parse_args(argv)
+
+    dirs = args.results_dirs or sorted(glob.glob(default_dirs))
+    dirs = [d for d in dirs if os.path.isfile(os.path.join(d, "results.csv"))]
+    dated = sorted((load_aggregate(d) for d in dirs), key=lambda d: d["date"])
+    # Several directories for one date (re-runs) are merged into one point
+    merged = []
+    for d in dated:
+        if merged and merged[-1]["date"] == d["date"]:
+            cells = merged[-1]["cells"]
+            for key, g in d["cells"].items():
+                cells.setdefault(key, GroupStats()).merge(g)
+        else:
+            merged.append(d)
+
+    tmp = args.out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_trends(merged))
+    os.replace(tmp, args.out)
+    print(f"Wrote {args.out} ({len(merged)} dates)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
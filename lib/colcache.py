@@ -0,0 +1,217 @@
+"""Binary columnar sidecar cache for results.csv.
+
+The first report build writes `.results.csv.cols` next to the CSV; later
+builds mmap it instead of re-parsing text, and it is rebuilt only when the
+CSV's size or mtime changes.  Layout (native byte order, recorded in the
+header):
+
+    header   magic, version, byteorder, csv size, csv mtime_ns, rows, dict len
+    dict     JSON {"tasks": [...], "agents": [...], "phases": [...]}, padded to 8 bytes
+    run_id   int32[rows]
+    task     uint16[rows]     index into dict["tasks"] (no sidecar beyond 65536)
+    agent    uint16[rows]     index into dict["agents"]
+    status   uint8[rows]      see STATUS_CODES, padded to 4 bytes
+    minutes  float32[rows]    NaN when Time(min) was unparseable
+
+and, only when some row has schema v2 phase timings (dict["phases"] lists
+results.PHASES, otherwise it is empty):
+
+    phase_s  float32[rows * len(phases)]  row-major seconds, NaN if not recorded
+    phase_ec int16[rows * len(phases)]    exit codes, -1 if not recorded
+"""
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+from results import PHASES, Run, iter_runs
+
+MAGIC = b"AERC"
+VERSION = 3
+HEADER = struct.Struct("=4sHcxQQQI")
+CODE_MAX = 0xFFFF   # task and agent codes are uint16
+STATUS_CODES = ("N", "Y", "SKIP")
+CHUNK_ROWS = 1 << 16
+
+
+def sidecar_path(csv_path):
+    d, name = os.path.split(csv_path)
+    return os.path.join(d, "." + name + ".cols")
+
+
+def _pad(n, align):
+    return (align - n % align) % align
+
+
+class Columns:
+    """Zero-copy column views over a sidecar mapping."""
+
+    def __init__(self, buf, tasks, agents, n, offset, phases=()):
+        self.tasks, self.agents, self.n, self.phases = tasks, agents, n, phases
+        mv = memoryview(buf)
+        self.run_id = mv[offset:offset + 4 * n].cast("i")
+        offset += 4 * n
+        self.task = mv[offset:offset + 2 * n].cast("H")
+        offset += 2 * n
+        self.agent = mv[offset:offset + 2 * n].cast("H")
+        offset += 2 * n
+        self.status = mv[offset:offset + n]
+        offset += n + _pad(n, 4)
+        self.minutes = mv[offset:offset + 4 * n].cast("f")
+        offset += 4 * n
+        self.phase_s = self.phase_ec = None
+        if phases:
+            cells = n * len(phases)
+            self.phase_s = mv[offset:offset + 4 * cells].cast("f")
+            offset += 4 * cells
+            self.phase_ec = mv[offset:offset + 2 * cells].cast("h")
+        self._buf = buf
+
+    def __len__(self):
+        return self.n
+
+    def runs(self):
+        tasks, agents = self.tasks, self.agents
+        rows = zip(self.run_id, self.task, self.agent, self.status, self.minutes)
+        if not self.phases:
+            for rid, t, a, s, m in rows:
+                yield Run(tasks[t], rid, agents[a], STATUS_CODES[s], None if m != m else m)
+            return
+        k = len(self.phases)
+        for i, (rid, t, a, s, m) in enumerate(rows):
+            secs, ecs = self.phase_s[i * k:(i + 1) * k], self.phase_ec[i * k:(i + 1) * k]
+            phases = tuple((None if x != x else x, None if e < 0 else e) for x, e in zip(secs, ecs))
+            if all(x is None and e is None for x, e in phases):
+                phases = None
+            yield Run(tasks[t], rid, agents[a], STATUS_CODES[s], None if m != m else m, phases)
+
+    def close(self):
+        for name in ("run_id", "task", "agent", "status", "minutes", "phase_s", "phase_ec"):
+            view = getattr(self, name)
+            if view is not None:
+                view.release()
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+
+def _open(path, st):
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+    if len(buf) < HEADER.size:
+        buf.close()
+        return None
+    magic, version, order, size, mtime_ns, n, dict_len = HEADER.unpack_from(buf, 0)
+    if (magic != MAGIC or version != VERSION or order != sys.byteorder[0].encode()
+            or size != st.st_size or mtime_ns != st.st_mtime_ns):
+        buf.close()
+        return None
+    offset = HEADER.size
+    try:
+        d = json.loads(bytes(buf[offset:offset + dict_len]))
+        tasks, agents, phases = d["tasks"], d["agents"], tuple(d["phases"])
+    except (ValueError, KeyError, TypeError):
+        buf.close()
+        return None
+    offset += dict_len + _pad(HEADER.size + dict_len, 8)
+    if len(buf) < offset + n * (13 + 6 * len(phases)) + _pad(n, 4):   # truncated
+        buf.close()
+        return None
+    return Columns(buf, tasks, agents, n, offset, phases)
+
+
+def _write(csv_path, path, st):
+    """Parse csv_path once into per-column spool files, then stitch them
+    together behind a header.  Memory use is bounded by CHUNK_ROWS.
+    Returns False, writing nothing, when there are more distinct tasks or
+    agents than a uint16 code can tell apart."""
+    tasks, agents = {}, {}
+    spools = [tempfile.TemporaryFile() for _ in range(7)]
+    cols = [array("i"), array("H"), array("H"), array("B"), array("f"), array("f"), array("h")]
+    status_code = {s: i for i, s in enumerate(STATUS_CODES)}
+    no_phases = [(None, None)] * len(PHASES)
+    n = 0
+    has_phases = False
+
+    def flush():
+        for col, spool in zip(cols, spools):
+            col.tofile(spool)
+            del col[:]
+
+    try:
+        for run in iter_runs(csv_path):
+            task = tasks.setdefault(run.task, len(tasks))
+            agent = agents.setdefault(run.agent, len(agents))
+            if task > CODE_MAX or agent > CODE_MAX:
+                return False
+            cols[0].append(run.run_id)
+            cols[1].append(task)
+            cols[2].append(agent)
+            cols[3].append(status_code[run.status])
+            cols[4].append(math.nan if run.minutes is None else run.minutes)
+            if run.phases is not None:
+                has_phases = True
+            for secs, ec in run.phases or no_phases:
+                cols[5].append(math.nan if secs is None else secs)
+                cols[6].append(-1 if ec is None else min(ec, 0x7FFF))
+            n += 1
+            if n % CHUNK_ROWS == 0:
+                flush()
+        flush()
+
+        blob = json.dumps({"tasks": list(tasks), "agents": list(agents),
+                           "phases": list(PHASES) if has_phases else []}).encode()
+        fd, tmp = tempfile.mkstemp(prefix=".cols-", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(),
+                                      st.st_size, st.st_mtime_ns, n, len(blob)))
+                out.write(blob + b"\0" * _pad(HEADER.size + len(blob), 8))
+                for i, spool in enumerate(spools if has_phases else spools[:5]):
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, out)
+                    if i == 3:
+                        out.write(b"\0" * _pad(n, 4))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return True
+    finally:
+        for spool in spools:
+            spool.close()
+
+
+def load(csv_path, rebuild=True):
+    """Return Columns for csv_path, (re)writing the sidecar if it is stale.
+
+    Returns None when the sidecar is stale and cannot be written (read-only
+    directory, the CSV changed while it was being parsed, or it has more
+    than CODE_MAX + 1 distinct tasks or agents); callers then fall back to
+    streaming the CSV.  A corrupt or truncated sidecar counts as stale.
+    """
+    path = sidecar_path(csv_path)
+    st = os.stat(csv_path)
+    if os.path.exists(path):
+        cols = _open(path, st)
+        if cols is not None:
+            return cols
+    if not rebuild:
+        return None
+    try:
+        if not _write(csv_path, path, st):
+            return None
+    except OSError:
+        return None
+    after = os.stat(csv_path)
+    if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+        return None
+    return _open(path, after)
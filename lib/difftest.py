@@ -0,0 +1,168 @@
+"""Significance tests for comparing two result sets cell by cell.
+
+Pass counts are compared with Fisher's exact test (two-sided, summing every
+table at most as likely as the observed one).  All cells are tested at once:
+hypergeometric log-probabilities come from one log-factorial table and are
+evaluated over a (cells x support) matrix.
+
+Durations are compared on the difference in medians with a Monte Carlo
+permutation test.  A batch of permutations is a matrix of shuffled group
+masks over the pooled, sorted sample; cumulative counts along each row give
+the positions of both groups' medians without sorting again.  Sampling stops
+early once STOP_HITS permuted statistics reach the observed one (the p-value
+is clearly large by then), so only cells that look significant pay for every
+permutation.  Cells larger than PERMUTE_MAX_N use the normal limit of the
+same statistic instead, with the density at the median estimated from
+pooled quantiles.  Cells are spread over a ProcessPoolExecutor when there is
+enough work.
+
+p-values are also reported as Benjamini-Hochberg q-values, since a diff
+tests hundreds of cells at once.
+
+Requires NumPy; callers check groupby.np first.
+"""
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from groupby import np
+
+BATCH = 1000
+STOP_HITS = 50
+PERMUTE_MAX_N = 200
+POOL_MIN_CELLS = 1 << 24
+FISHER_BLOCK = 1 << 22
+
+
+def fisher_exact(a, n1, c, n2):
+    """Two-sided Fisher p-values for arrays of 2x2 tables: a of n1 passed on
+    one side, c of n2 on the other.  NaN where a side is empty."""
+    a, n1, c, n2 = (np.asarray(v, dtype=np.int64) for v in (a, n1, c, n2))
+    out = np.full(a.shape, np.nan)
+    if not a.size:
+        return out
+    k, n = a + c, n1 + n2
+    lf = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, max(int(n.max()), 1) + 1)))))
+
+    def logp(x, rows):
+        return (lf[n1[rows, None]] - lf[x] - lf[n1[rows, None] - x]
+                + lf[n2[rows, None]] - lf[k[rows, None] - x] - lf[n2[rows, None] - k[rows, None] + x]
+                - lf[n[rows, None]] + lf[k[rows, None]] + lf[n[rows, None] - k[rows, None]])
+
+    lo = np.maximum(0, k - n2)
+    hi = np.minimum(n1, k)
+    valid = (n1 > 0) & (n2 > 0)
+    idx = np.flatnonzero(valid)
+    width = int((hi - lo)[idx].max()) + 1 if idx.size else 1
+    step = max(1, FISHER_BLOCK // width)
+    for s in range(0, idx.size, step):
+        rows = idx[s:s + step]
+        xs = lo[rows, None] + np.arange(width)[None, :]
+        inside = xs <= hi[rows, None]
+        xs = np.where(inside, xs, lo[rows, None])
+        lp = logp(xs, rows)
+        obs = logp(a[rows, None], rows)
+        keep = inside & (lp <= obs + 1e-7)
+        out[rows] = np.minimum(1.0, np.where(keep, np.exp(lp), 0.0).sum(axis=1))
+    return out
+
+
+def _median_at(pooled, counts, n):
+    """Median of the n members whose running counts along each row are
+    `counts`, as values of the sorted pooled sample."""
+    lo = np.argmax(counts > (n - 1) // 2, axis=1)
+    hi = np.argmax(counts > n // 2, axis=1)
+    return (pooled[lo] + pooled[hi]) / 2
+
+
+def permutation_median(x, y, permutations, rng):
+    """Two-sided p-value for a difference in medians between samples x and
+    y (1-d arrays).  None when either side is empty."""
+    n1, n2 = x.size, y.size
+    if not n1 or not n2:
+        return None
+    pooled = np.sort(np.concatenate((x, y)))
+    n = n1 + n2
+    obs = abs(np.median(y) - np.median(x))
+    if n > PERMUTE_MAX_N:
+        h = min(0.25, n ** (-1 / 3))
+        q = np.quantile(pooled, (0.5 - h, 0.5 + h))
+        sparsity = (q[1] - q[0]) / (2 * h)   # 1 / density at the median
+        if sparsity <= 0:
+            return 1.0 if obs == 0 else 0.0
+        se = sparsity / 2 * math.sqrt(1 / n1 + 1 / n2)
+        return 2 * (1 - NormalDist().cdf(obs / se))
+    base = np.zeros(n, dtype=np.int32)
+    base[:n1] = 1
+    ranks = np.arange(1, n + 1)
+    hits = done = 0
+    while done < permutations and hits < STOP_HITS:
+        b = min(BATCH, permutations - done)
+        masks = rng.permuted(np.tile(base, (b, 1)), axis=1)
+        c1 = np.cumsum(masks, axis=1)
+        stat = np.abs(_median_at(pooled, ranks - c1, n2) - _median_at(pooled, c1, n1))
+        hits += int((stat >= obs - 1e-9).sum())
+        done += b
+    return (hits + 1) / (done + 1)
+
+
+def _median_job(job):
+    key, x, y, permutations, seed = job
+    return key, permutation_median(x, y, permutations, np.random.default_rng(seed))
+
+
+def median_tests(pairs, permutations=10000, jobs=None, seed=0):
+    """pairs: {key: (x, y)} -> {key: p or None}.  Seeds derive from each key
+    so results do not depend on order or worker count."""
+    work = [(k, x, y, permutations, zlib.crc32(repr(k).encode()) ^ seed) for k, (x, y) in pairs.items()]
+    cells = permutations * sum(x.size + y.size for _, x, y, *_ in work if x.size + y.size <= PERMUTE_MAX_N)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(work) > 1 and cells >= POOL_MIN_CELLS:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            results = list(pool.map(_median_job, work, chunksize=max(1, len(work) // (4 * jobs))))
+    else:
+        results = [_median_job(w) for w in work]
+    return dict(results)
+
+
+def bh_qvalues(pvalues):
+    """Benjamini-Hochberg adjusted p-values; None entries stay None."""
+    idx = [i for i, p in enumerate(pvalues) if p is not None and p == p]
+    out = [None] * len(pvalues)
+    if not idx:
+        return out
+    p = np.array([pvalues[i] for i in idx])
+    order = np.argsort(p)
+    ranked = p[order] * len(p) / np.arange(1, len(p) + 1)
+    q = np.minimum.accumulate(ranked[::-1])[::-1]
+    for j, i in enumerate(order):
+        out[idx[i]] = float(min(1.0, q[j]))
+    return out
+
+
+def compare(old, new, permutations=10000, jobs=None):
+    """old, new: {key: (passed 0/1 array, minutes array)} as returned by
+    groupby.samples.  Returns {key: row} for keys on either side, where row
+    has old/new pass counts and medians, p and q for both tests."""
+    keys = sorted(set(old) | set(new), key=repr)
+    empty = (np.zeros(0), np.zeros(0))
+    side = {k: (old.get(k, empty), new.get(k, empty)) for k in keys}
+    a = [int(o[0].sum()) for o, _ in side.values()]
+    n1 = [o[0].size for o, _ in side.values()]
+    c = [int(w[0].sum()) for _, w in side.values()]
+    n2 = [w[0].size for _, w in side.values()]
+    p_rate = [None if v != v else float(v) for v in fisher_exact(a, n1, c, n2)]
+    p_time = median_tests({k: (o[1], w[1]) for k, (o, w) in side.items()}, permutations, jobs)
+    p_time = [p_time[k] for k in keys]
+    q_rate, q_time = bh_qvalues(p_rate), bh_qvalues(p_time)
+    rows = {}
+    for i, (k, (o, w)) in enumerate(side.items()):
+        rows[k] = {
+            "old_passed": a[i], "old_total": n1[i], "new_passed": c[i], "new_total": n2[i],
+            "old_median": float(np.median(o[1])) if o[1].size else None,
+            "new_median": float(np.median(w[1])) if w[1].size else None,
+            "p_rate": p_rate[i], "q_rate": q_rate[i], "p_time": p_time[i], "q_time": q_time[i],
+        }
+    return rows
@@ -0,0 +1,181 @@
+"""NumPy group-by reductions over columnar results (see colcache.py).
+
+Rows are grouped by integer key with np.unique's inverse indices; counts come
+from np.bincount and quantiles from one lexsort by (group, minutes) followed by
+per-segment index arithmetic, so cost is a few vectorized passes regardless of
+how many groups there are.  NumPy is optional: callers check `np` and fall
+back to the streaming t-digest aggregates in build_report.py.
+"""
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# by_agent: {agent: stats}; cells: {(task, agent): stats}; where stats has
+# total/passed/skipped/success_rate/quantile(q) like build_report.GroupStats.
+# phases: {agent: {phase: PhaseStats}} for schema v2 results, else empty.
+Summary = namedtuple("Summary", "tasks agents by_agent cells run_ids phases", defaults=({},))
+
+# Median wall seconds of a phase, how many runs recorded it and how many of
+# those exited non-zero.
+PhaseStats = namedtuple("PhaseStats", "median runs failed")
+
+
+class ExactStats:
+    """Counts plus precomputed exact quantiles for one group."""
+
+    __slots__ = ("total", "passed", "skipped", "_quantiles")
+
+    def __init__(self, total, passed, skipped, quantiles):
+        self.total, self.passed, self.skipped = total, passed, skipped
+        self._quantiles = quantiles
+
+    @property
+    def success_rate(self):
+        return (self.passed / self.total * 100.0) if self.total else 0.0
+
+    def quantile(self, q):
+        return self._quantiles.get(q)
+
+
+def arrays(cols):
+    """Zero-copy NumPy views of a colcache.Columns."""
+    return (np.frombuffer(cols.task, dtype=np.uint16),
+            np.frombuffer(cols.agent, dtype=np.uint16),
+            np.frombuffer(cols.status, dtype=np.uint8),
+            np.frombuffer(cols.minutes, dtype=np.float32),
+            np.frombuffer(cols.run_id, dtype=np.int32))
+
+
+def reduce_groups(keys, status, minutes, quantiles):
+    """Per-group counts and linearly interpolated quantiles.
+
+    keys are integer group ids per row; status uses colcache.STATUS_CODES
+    (0=N, 1=Y, 2=SKIP); minutes is NaN where unknown.  Returns
+    (unique_keys, total, passed, skipped, {q: array}) with NaN quantiles for
+    groups that have no timed runs.
+    """
+    uniq, inv = np.unique(keys, return_inverse=True)
+    n_groups = len(uniq)
+    skipped = np.bincount(inv, weights=(status == 2), minlength=n_groups).astype(np.int64)
+    passed = np.bincount(inv, weights=(status == 1), minlength=n_groups).astype(np.int64)
+    total = np.bincount(inv, minlength=n_groups) - skipped
+
+    timed = (status != 2) & np.isfinite(minutes)
+    g = inv[timed]
+    m = minutes[timed].astype(np.float64)
+    # Sort by minutes, then stably by group: the second pass is a radix
+    # sort when group ids fit in 16 bits, which beats np.lexsort handily.
+    order = np.argsort(m)
+    gk = g[order]
+    if n_groups <= 0xFFFF:
+        gk = gk.astype(np.uint16)
+    m = m[order[np.argsort(gk, kind="stable")]]
+    counts = np.bincount(g, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    out = {}
+    has = counts > 0
+    for q in quantiles:
+        pos = starts + q * np.maximum(counts - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + counts - 1)
+        frac = pos - lo
+        vals = np.full(n_groups, np.nan)
+        if m.size:
+            lo_c, hi_c = np.clip(lo, 0, m.size - 1), np.clip(hi, 0, m.size - 1)
+            vals[has] = (m[lo_c] + (m[hi_c] - m[lo_c]) * frac)[has]
+        out[q] = vals
+    return uniq, total, passed, skipped, out
+
+
+def _stats(i, total, passed, skipped, qs):
+    return ExactStats(int(total[i]), int(passed[i]), int(skipped[i]),
+                      {q: (None if np.isnan(v[i]) else float(v[i])) for q, v in qs.items()})
+
+
+def summarize(cols, quantiles):
+    """Exact per-agent and per-(task, agent) statistics for a Columns."""
+    task, agent, status, minutes, run_id = arrays(cols)
+    n_agents = max(len(cols.agents), 1)
+
+    keys = task.astype(np.int64) * n_agents + agent
+    uniq, total, passed, skipped, qs = reduce_groups(keys, status, minutes, quantiles)
+    cells = {}
+    for i, k in enumerate(uniq.tolist()):
+        cells[(cols.tasks[k // n_agents], cols.agents[k % n_agents])] = _stats(i, total, passed, skipped, qs)
+
+    uniq, total, passed, skipped, qs = reduce_groups(agent, status, minutes, quantiles)
+    by_agent = {cols.agents[k]: _stats(i, total, passed, skipped, qs) for i, k in enumerate(uniq.tolist())}
+    by_agent = dict(sorted(by_agent.items()))
+
+    return Summary(tasks=sorted({t for t, _ in cells}), agents=list(by_agent),
+                   by_agent=by_agent, cells=cells, run_ids=int(np.unique(run_id).size),
+                   phases=phase_summary(cols, agent, status))
+
+
+def phase_summary(cols, agent, status):
+    """{agent: {phase: PhaseStats}} from the sidecar's phase columns."""
+    if not cols.phases:
+        return {}
+    k = len(cols.phases)
+    secs = np.frombuffer(cols.phase_s, dtype=np.float32).reshape(-1, k)
+    ecs = np.frombuffer(cols.phase_ec, dtype=np.int16).reshape(-1, k)
+    out = {}
+    for j, name in enumerate(cols.phases):
+        recorded = np.isfinite(secs[:, j]) & (status != 2)
+        if not recorded.any():
+            continue
+        uniq, _, _, _, qs = reduce_groups(agent, status, secs[:, j], (0.5,))
+        runs = np.bincount(agent, weights=recorded, minlength=len(cols.agents))
+        failed = np.bincount(agent, weights=recorded & (ecs[:, j] > 0), minlength=len(cols.agents))
+        for i, a in enumerate(uniq.tolist()):
+            if runs[a]:
+                out.setdefault(cols.agents[a], {})[name] = PhaseStats(
+                    float(qs[0.5][i]), int(runs[a]), int(failed[a]))
+    return dict(sorted(out.items()))
+
+
+def samples(cols):
+    """Raw per-group samples for resampling, as two dicts keyed like
+    Summary.by_agent and Summary.cells: {key: (passed, minutes)} where
+    passed is 0/1 per non-skipped run and minutes holds the timed ones."""
+    task, agent, status, minutes, _ = arrays(cols)
+    keep = status != 2
+    n_agents = max(len(cols.agents), 1)
+    groupings = (
+        (agent, lambda k: cols.agents[k]),
+        (task.astype(np.int64) * n_agents + agent,
+         lambda k: (cols.tasks[k // n_agents], cols.agents[k % n_agents])),
+    )
+    out = []
+    for keys, name in groupings:
+        k = keys[keep]
+        order = np.argsort(k, kind="stable")
+        k = k[order]
+        passed = (status[keep][order] == 1).astype(np.float64)
+        mins = minutes[keep][order].astype(np.float64)
+        uniq, starts = np.unique(k, return_index=True)
+        ends = np.append(starts[1:], k.size)
+        groups = {}
+        for u, lo, hi in zip(uniq.tolist(), starts.tolist(), ends.tolist()):
+            m = mins[lo:hi]
+            groups[name(u)] = (passed[lo:hi], m[np.isfinite(m)])
+        out.append(groups)
+    return out[0], out[1]
+
+
+def samples_from_runs(runs):
+    """samples() for a stream of Runs, when there is no sidecar."""
+    by_agent, cells = {}, {}
+    for run in runs:
+        if run.status == "SKIP":
+            continue
+        for groups, key in ((by_agent, run.agent), (cells, (run.task, run.agent))):
+            passed, mins = groups.setdefault(key, ([], []))
+            passed.append(1.0 if run.status == "Y" else 0.0)
+            if run.minutes is not None:
+                mins.append(run.minutes)
+    return tuple({k: (np.array(p), np.array(m, dtype=np.float64)) for k, (p, m) in groups.items()}
+                 for groups in (by_agent, cells))
@@ -0,0 +1,192 @@
+"""Live report for a results.csv that is still being written.
+
+    build_report.py --watch [--port 8765] RESULTS_DIR
+
+A background thread tails results.csv with results.CsvTail and folds new
+rows into a build_report.Aggregator, so each poll costs O(new rows).  A
+localhost HTTP server serves a small page at / that subscribes to /events,
+a Server-Sent Events stream carrying a JSON snapshot of the aggregates
+whenever they change (plus a comment line every HEARTBEAT seconds to keep
+proxies from closing the connection).  /snapshot returns the current
+snapshot once, for scripts.
+
+/log?cell=TASK-AGENT-runN[&start=S][&end=E] returns bytes S..E of that
+cell's generation log, by default its last LOG_VIEW bytes and never more
+than LOG_VIEW_MAX at once.  Only the gzip members holding the range are
+decompressed (logcap.read_range); the X-Log-Range header gives the range
+served and the length of the retained stream, "S-E/TOTAL".
+"""
+import json
+import os
+import threading
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logcap
+import transcripts
+from results import CsvTail
+
+HEARTBEAT = 15
+RECENT = 20
+LOG_VIEW = 64 << 10
+LOG_VIEW_MAX = 1 << 20
+
+
+class LiveState:
+    """Aggregates plus a version counter that SSE clients wait on."""
+
+    def __init__(self, aggregator_factory):
+        self._factory = aggregator_factory
+        self.cond = threading.Condition()
+        self.version = 0
+        self.rows = 0
+        self.agg = aggregator_factory()
+        self.recent = deque(maxlen=RECENT)
+        self._snapshot = self._build_snapshot()
+
+    def apply(self, runs, reset=False):
+        if not runs and not reset:
+            return
+        with self.cond:
+            if reset:
+                self.agg, self.rows = self._factory(), 0
+                self.recent.clear()
+            for run in runs:
+                self.agg.add(run)
+                self.recent.append(run)
+            self.rows += len(runs)
+            self.version += 1
+            self._snapshot = self._build_snapshot()
+            self.cond.notify_all()
+
+    def snapshot(self):
+        with self.cond:
+            return self.version, self._snapshot
+
+    def wait(self, version, timeout):
+        """Block until the version moves past `version` or timeout passes."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self._snapshot
+
+    def _build_snapshot(self):
+        def stats(g):
+            p50, p90 = g.quantile(0.5), g.quantile(0.9)
+            return {"total": g.total, "passed": g.passed, "skipped": g.skipped,
+                    "rate": round(g.success_rate, 1),
+                    "p50": None if p50 is None else round(p50, 2),
+                    "p90": None if p90 is None else round(p90, 2)}
+        return json.dumps({
+            "rows": self.rows,
+            "agents": {a: stats(g) for a, g in self.agg.by_agent().items()},
+            "cells": [dict(stats(g), task=t, agent=a) for (t, a), g in sorted(self.agg.groups.items())],
+            "recent": [r._asdict() for r in reversed(self.recent)],
+        }, separators=(",", ":"))
+
+
+def tail_loop(state, tail, interval, stop):
+    while not stop.is_set():
+        runs = tail.poll()
+        state.apply(runs, tail.reset)
+        stop.wait(interval)
+
+
+def make_handler(state, page, results_dir):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, body, ctype, headers=()):
+            if isinstance(body, str):
+                body = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            if path == "/":
+                self._send(page, "text/html; charset=utf-8")
+            elif path == "/snapshot":
+                self._send(state.snapshot()[1], "application/json")
+            elif path == "/events":
+                self._events()
+            elif path == "/log":
+                self._log(urllib.parse.parse_qs(query))
+            else:
+                self.send_error(404)
+
+        def _log(self, query):
+            cell = query.get("cell", [""])[0]
+            m = transcripts.WORKSPACE_RE.match(cell)
+            if not m or os.path.basename(cell) != cell:
+                self.send_error(400, "cell must be TASK-AGENT-runN")
+                return
+            log = os.path.join(results_dir, cell, m.group(2) + "_generation.log.gz")
+            try:
+                index = logcap.load_index(log)
+            except (OSError, ValueError):
+                self.send_error(404, "no indexed generation log for this cell")
+                return
+            total = logcap.retained(index)
+            try:
+                start = max(0, int(query["start"][0])) if "start" in query else max(0, total - LOG_VIEW)
+                end = min(int(query["end"][0]) if "end" in query else total, total, start + LOG_VIEW_MAX)
+            except ValueError:
+                self.send_error(400, "start and end are byte offsets")
+                return
+            try:
+                data = logcap.read_range(log, start, end, index)
+            except OSError:
+                self.send_error(404)
+                return
+            self._send(data, "text/plain; charset=utf-8",
+                       [("X-Log-Range", f"{start}-{start + len(data)}/{total}")])
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            version, snap = state.snapshot()
+            try:
+                while True:
+                    self.wfile.write(f"id: {version}\ndata: {snap}\n\n".encode())
+                    self.wfile.flush()
+                    while True:
+                        new, snap = state.wait(version, HEARTBEAT)
+                        if new != version:
+                            version = new
+                            break
+                        self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def serve(csv_path, aggregator_factory, page, host="127.0.0.1", port=8765, interval=1.0):
+    """Tail csv_path and serve the live page until interrupted."""
+    state = LiveState(aggregator_factory)
+    stop = threading.Event()
+    tail = CsvTail(csv_path)
+    state.apply(tail.poll())
+    poller = threading.Thread(target=tail_loop, args=(state, tail, interval, stop), daemon=True)
+    poller.start()
+    server = ThreadingHTTPServer((host, port), make_handler(state, page, os.path.dirname(csv_path)))
+    server.daemon_threads = True
+    print(f"Live report for {csv_path} at http://{host}:{server.server_address[1]}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
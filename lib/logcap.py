@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Bounded, compressed capture of agent output.
+
+    logcap.py run [--cap-mb N] [--tail-kb N] [--label NAME] [--header LINE ...] LOG -- CMD ...
+    logcap.py cat [--range START:END] LOG
+    logcap.py stats LOG
+
+Agents used to run as `CMD 2>&1 | tee -a LOG`, so `claude --verbose` logs
+grew without limit and stayed uncompressed.  `run` starts CMD with its
+stdout and stderr on pipes, reads both with non-blocking I/O as data
+arrives, copies it to the console, and writes LOG as a series of gzip
+members of about BLOCK raw bytes each.  Concatenated members are a valid
+gzip file, so `zcat LOG` still works.  Next to it, LOG.idx records where
+each member starts in the raw stream and in the file:
+
+    {"blocks": [[raw_offset, file_offset, raw_len, file_len], ...],
+     "seen": bytes CMD wrote, "omitted": [raw_offset, bytes] or null,
+     "marks": [[seen_offset, seconds since start], ...],
+     "complete": true once CMD has exited}
+
+read_range() uses it to decompress only the members a byte range touches;
+the report's failed-run log tails and the /log view of `build_report.py
+--watch` read logs through it.  elapsed() tells when a retained byte arrived: a mark is taken when
+output arrives at least MARK_S after the previous one (transcripts.py
+uses them for time to first write).
+A member is written once BLOCK bytes are buffered or FLUSH_S seconds after
+the last one, and the index is rewritten with it.  A crash therefore loses
+at most a few seconds of output.
+
+At most --cap-mb MB of raw output is kept: the head, up to cap minus
+--tail-kb, and the tail, which is held in a ring buffer of the last
+--tail-kb KB.  When output overflows the head, the ring keeps rolling.
+When CMD exits, a one-line "[... N bytes omitted ...]" marker and the ring
+are appended.  While CMD runs, the ring is also written uncompressed to
+LOG.tail at each flush for live display; LOG.tail is removed at the end.
+"""
+import argparse
+import bisect
+import fcntl
+import gzip
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+
+BLOCK = 256 << 10
+FLUSH_S = 5.0
+LEVEL = 3   # about 2.5x faster than 6 for 20% more bytes on agent logs
+MARK_S = 1.0
+
+
+class LogWriter:
+    """Compressed, size-capped log with a block index; see the module
+    docstring for the layout."""
+
+    def __init__(self, path, cap=64 << 20, tail=1 << 20):
+        self.path = path
+        self.tail = min(tail, cap)
+        self.head = cap - self.tail
+        self.f = open(path, "wb")
+        self.blocks = []
+        self.buf = bytearray()
+        self.ring = deque()   # chunks holding at least the last `tail` bytes
+        self.ring_len = 0
+        self.raw = 0          # raw bytes written to blocks
+        self.seen = 0         # raw bytes received
+        self.omitted = None
+        self.marks = []
+        self.t0 = self.last_flush = time.monotonic()
+
+    def write(self, data):
+        now = time.monotonic() - self.t0
+        if not self.marks or now - self.marks[-1][1] >= MARK_S:
+            self.marks.append([self.seen, round(now, 3)])
+        self.seen += len(data)
+        self.ring.append(data)
+        self.ring_len += len(data)
+        while len(self.ring) > 1 and self.ring_len - len(self.ring[0]) >= self.tail:
+            self.ring_len -= len(self.ring.popleft())
+        room = self.head - self.raw - len(self.buf)
+        if room > 0:
+            self.buf += data[:room]
+        if len(self.buf) >= BLOCK:
+            self.flush()
+
+    def due(self):
+        return time.monotonic() - self.last_flush >= FLUSH_S
+
+    def _block(self, data):
+        comp = gzip.compress(bytes(data), compresslevel=LEVEL, mtime=0)
+        self.blocks.append([self.raw, self.f.tell(), len(data), len(comp)])
+        self.f.write(comp)
+        self.raw += len(data)
+
+    def flush(self, complete=False):
+        for i in range(0, len(self.buf), BLOCK):
+            self._block(self.buf[i:i + BLOCK])
+        self.buf.clear()
+        self.f.flush()
+        self._write_index(complete)
+        if not complete and self.ring:
+            _replace(self.path + ".tail", self._tail(self.tail))
+        self.last_flush = time.monotonic()
+
+    def _tail(self, n):
+        """The last n received bytes (fewer if not held)."""
+        data = b"".join(self.ring)
+        return data[-n:] if n else b""
+
+    def _write_index(self, complete):
+        index = {"blocks": self.blocks, "seen": self.seen, "omitted": self.omitted,
+                 "marks": self.marks, "complete": complete}
+        _replace(self.path + ".idx", json.dumps(index, separators=(",", ":")).encode())
+
+    def close(self):
+        kept = self.raw + len(self.buf)
+        if self.seen > kept:
+            tail = self._tail(min(self.tail, self.seen - kept))
+            skipped = self.seen - kept - len(tail)
+            if skipped:
+                self.flush()
+                self.omitted = [self.raw, skipped]
+                self.buf += _omitted_line(skipped)
+            self.buf += tail
+        self.flush(complete=True)
+        self.f.close()
+        try:
+            os.remove(self.path + ".tail")
+        except FileNotFoundError:
+            pass
+
+
+def _omitted_line(n):
+    return f"\n[... {n} bytes omitted ...]\n".encode()
+
+
+def _replace(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def capture(cmd, writer, echo=None):
+    """Run cmd, copying its stdout and stderr to writer (and echo) as they
+    arrive; returns its exit status, 128 + N for signal N."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def forward(signum, _frame):
+        try:
+            proc.send_signal(signum)
+        except ProcessLookupError:
+            pass
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, forward)
+
+    sel = selectors.DefaultSelector()
+    for stream in (proc.stdout, proc.stderr):
+        fd = stream.fileno()
+        fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+        sel.register(fd, selectors.EVENT_READ)
+    open_fds = len(sel.get_map())
+    while open_fds:
+        for key, _ in sel.select(timeout=FLUSH_S):
+            try:
+                data = os.read(key.fd, 1 << 16)
+            except BlockingIOError:
+                continue
+            if not data:
+                sel.unregister(key.fd)
+                open_fds -= 1
+                continue
+            writer.write(data)
+            if echo:
+                echo.write(data)
+                echo.flush()
+        if writer.due():
+            writer.flush()
+    sel.close()
+    ec = proc.wait()
+    return 128 - ec if ec < 0 else ec
+
+
+def load_index(path):
+    with open(path + ".idx") as f:
+        return json.load(f)
+
+
+def elapsed(index, pos):
+    """Seconds after the start of capture at which byte pos of the retained
+    stream arrived (to within MARK_S), or None without marks."""
+    marks = index.get("marks")
+    if not marks:
+        return None
+    omitted = index.get("omitted")
+    if omitted and pos >= omitted[0]:
+        pos = max(omitted[0], pos - len(_omitted_line(omitted[1]))) + omitted[1]
+    i = bisect.bisect_right([m[0] for m in marks], pos) - 1
+    return marks[max(i, 0)][1]
+
+
+def retained(index):
+    """Length of the retained stream the index describes."""
+    blocks = index["blocks"]
+    return blocks[-1][0] + blocks[-1][2] if blocks else 0
+
+
+def read_range(path, start=0, end=None, index=None):
+    """Bytes start..end of the log's retained stream, decompressing only the
+    blocks that overlap it."""
+    index = index or load_index(path)
+    blocks = index["blocks"]
+    total = retained(index)
+    end = total if end is None else min(end, total)
+    if start >= end:
+        return b""
+    out = bytearray()
+    i = max(0, bisect.bisect_right([b[0] for b in blocks], start) - 1)
+    with open(path, "rb") as f:
+        for raw_off, file_off, raw_len, file_len in blocks[i:]:
+            if raw_off >= end:
+                break
+            f.seek(file_off)
+            data = gzip.decompress(f.read(file_len))
+            out += data[max(0, start - raw_off):end - raw_off]
+    return bytes(out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bounded, compressed capture of agent output")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rn = sub.add_parser("run", help="run CMD, logging its output to LOG")
+    rn.add_argument("--cap-mb", type=float, default=64, help="raw output kept (default: %(default)s)")
+    rn.add_argument("--tail-kb", type=int, default=1024, help="tail kept past the cap (default: %(default)s)")
+    rn.add_argument("--label", default="Command", help="name in the closing line")
+    rn.add_argument("--header", action="append", default=[], help="line written before the output")
+    rn.add_argument("log")
+    rn.add_argument("command", nargs=argparse.REMAINDER)
+    ct = sub.add_parser("cat", help="print LOG, or a byte range of it")
+    ct.add_argument("--range", default=":", help="START:END of the retained stream")
+    ct.add_argument("log")
+    stt = sub.add_parser("stats", help="sizes and blocks of LOG")
+    stt.add_argument("log")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        command = args.command[1:] if args.command[:1] == ["--"] else args.command
+        if not command:
+            ap.error("run needs a command after --")
+        writer = LogWriter(args.log, int(args.cap_mb * (1 << 20)), args.tail_kb << 10)
+        out = sys.stdout.buffer
+        intro = "".join(line + "\n" for line in args.header + ["=" * 32]).encode()
+        writer.write(intro)
+        out.write(intro)
+        ec = capture(command, writer, out)
+        outro = f"{'=' * 32}\n{args.label} finished with exit code: {ec}\n".encode()
+        writer.write(outro)
+        out.write(outro)
+        out.flush()
+        writer.close()
+        return ec
+    if args.cmd == "cat":
+        start, _, end = args.range.partition(":")
+        sys.stdout.buffer.write(read_range(args.log, int(start or 0), int(end) if end else None))
+    elif args.cmd == "stats":
+        index = load_index(args.log)
+        print(f"{index['seen']} bytes of output, {retained(index)} kept, {os.path.getsize(args.log)} on disk "
+              f"in {len(index['blocks'])} blocks; omitted: {index['omitted']}; complete: {index['complete']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Shared node_modules store for npm acceptance runs.
+
+    nodecache.py install [--cache DIR] [--npm NPM] [PROJECT]
+    nodecache.py key [PROJECT]
+
+The package.json acceptance path ran `npm ci` in every workspace, so jest
+and http-server were downloaded and unpacked again for each neon run.
+`install` gives PROJECT the node_modules `npm ci` would, from a store keyed
+by
+
+    key = sha256(package-lock.json, .npmrc, node version, platform)
+
+The first run with a key runs `npm ci` once in CACHE/KEY on a copy of the
+project's package.json and lockfile; the locking, publishing and clean-up
+are venvcache.populate's, so parallel runs share one fill.  Every run then
+gets node_modules as a hardlink copy of CACHE/KEY/node_modules (.bin links
+are relative and carry over as they are), which needs no network and next
+to no disk.  Like `npm ci`, it replaces any node_modules already there.
+
+Projects without a lockfile, with their own install scripts (preinstall,
+install, postinstall, prepare) or with local file: or link dependencies
+depend on more than the lockfile, so they run `npm ci` directly.
+
+The store defaults to $XDG_CACHE_HOME/coding-agent-eval/node_modules;
+NODE_CACHE_DIR overrides it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+from venvcache import COMPLETE, clone, populate
+
+INSTALL_SCRIPTS = ("preinstall", "install", "postinstall", "prepare")
+FILES = ("package.json", "package-lock.json", ".npmrc")
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("NODE_CACHE_DIR") or os.path.join(base, "coding-agent-eval", "node_modules")
+
+
+def node_version():
+    try:
+        return subprocess.run(["node", "--version"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def cache_key(project):
+    """The store key for project, or None when its node_modules depend on
+    more than its lockfile."""
+    try:
+        with open(os.path.join(project, "package-lock.json"), "rb") as f:
+            lock = f.read()
+        with open(os.path.join(project, "package.json"), "rb") as f:
+            scripts = json.loads(f.read()).get("scripts") or {}
+    except (OSError, ValueError):
+        return None
+    if any(s in scripts for s in INSTALL_SCRIPTS) or b'"link": true' in lock or b'"file:' in lock:
+        return None
+    h = hashlib.sha256(lock)
+    try:
+        with open(os.path.join(project, ".npmrc"), "rb") as f:
+            h.update(b"\0npmrc\0" + f.read())
+    except OSError:
+        pass
+    for part in (node_version(), sys.platform, platform.machine()):
+        h.update(b"\0" + part.encode())
+    return h.hexdigest()[:32]
+
+
+def npm_ci(project, npm="npm"):
+    subprocess.run([npm, "ci", "--no-audit", "--no-fund"], cwd=project, check=True)
+
+
+def fill(path, project, npm="npm"):
+    """Run `npm ci` on a copy of project's manifests in path."""
+    os.makedirs(path)
+    for name in FILES:
+        if os.path.exists(os.path.join(project, name)):
+            shutil.copy2(os.path.join(project, name), path)
+    npm_ci(path, npm)
+
+
+def install(project=".", cache=None, npm="npm", log=None):
+    """Give project its node_modules.  Returns "hit", "miss" or "uncached"."""
+    cache = cache or default_cache_dir()
+    key = cache_key(project)
+    if key is None:
+        if log:
+            log("node_modules depend on more than package-lock.json; running npm ci")
+        npm_ci(project, npm)
+        return "uncached"
+    hit = os.path.exists(os.path.join(cache, key, COMPLETE))
+    entry = populate(cache, key, lambda path: fill(path, project, npm), log)
+    dest = os.path.join(project, "node_modules")
+    if os.path.lexists(dest):
+        shutil.rmtree(dest)
+    src = os.path.join(entry, "node_modules")
+    files = clone(src, dest, rewrite=None) if os.path.isdir(src) else 0
+    if log:
+        log(f"node_modules cache {'hit' if hit else 'miss'} {key[:12]}: {files} files linked")
+    return "hit" if hit else "miss"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Shared node_modules store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ins = sub.add_parser("install", help="give PROJECT its node_modules from the store")
+    ky = sub.add_parser("key", help="print the store key for PROJECT")
+    ins.add_argument("--cache", help="store directory (default: $NODE_CACHE_DIR or "
+                     "~/.cache/coding-agent-eval/node_modules)")
+    ins.add_argument("--npm", default=os.environ.get("NPM_BIN") or "npm")
+    for p in (ins, ky):
+        p.add_argument("project", nargs="?", default=".")
+    args = ap.parse_args(argv)
+    log = lambda m: print(m, flush=True)
+
+    if args.cmd == "key":
+        print(cache_key(args.project) or "uncacheable")
+    else:
+        install(args.project, args.cache, args.npm, log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Run every (task, agent, run) cell of an evaluation from one work queue.
+
+    orchestrate.py --script coding-agent-eval.sh --base-dir DIR
+                   --tasks T1,T2 --agents A1,A2 [--runs N]
+                   [--jobs N] [--agent-jobs AGENT=N ...] [--resume]
+
+coding-agent-eval.sh parses its flags, prepares BASE_DIR and hands the run
+to this module.  All cells are expanded up front, task-major as the old
+driver ran them, and started as soon as a slot is free: at most --jobs
+cells run at once and at most --agent-jobs N cells of one agent (for CLIs
+with tight rate limits).  Without --jobs, every agent is capped at one
+cell, as the old driver ran one process per agent.  A cell whose agent is
+at its cap does not hold up the cells behind it.
+
+Each cell is `coding-agent-eval.sh --cell TASK RUN_ID AGENT`, which does
+exactly what one iteration of the old run_agent loop did: generate, run the
+acceptance steps, and append its row to results.csv.  Cells run as asyncio
+subprocesses in their own process groups; their output is streamed to the
+console line by line, prefixed with the cell, and a summary line is printed
+as each one finishes.  SIGINT or SIGTERM terminates every running cell and
+everything it started.
+
+With --resume, BASE_DIR holds an interrupted run of the same matrix, and
+only the cells that did not finish are queued.  A cell has finished when
+its row is in results.csv.  Each cell also leaves its row in a DONE_MARKER
+file in its workspace, which puts back rows missing from a results.csv that
+was replaced or cut short.  Timeline rows of unfinished cells are dropped.
+Their workspaces are wiped when the cell starts again, as usual.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+import results_writer
+
+OUTCOME = re.compile(rb"SUCCESS=(\w+)")
+DONE_MARKER = ".cell-done"
+
+
+def parse_caps(items):
+    """["claude=2", ...] -> {"claude": 2}."""
+    caps = {}
+    for item in items:
+        agent, sep, n = item.partition("=")
+        if not sep or not n.isdigit() or int(n) < 1:
+            raise argparse.ArgumentTypeError(f"--agent-jobs expects AGENT=N, got {item!r}")
+        caps[agent] = int(n)
+    return caps
+
+
+def descendants(pid):
+    """Every process below pid.  GNU timeout moves itself into its own
+    process group, so killing a cell's group alone would leave the agent
+    running."""
+    try:
+        out = subprocess.run(["ps", "-A", "-o", "pid=,ppid="], capture_output=True, text=True).stdout
+    except OSError:
+        return []
+    children = {}
+    for line in out.splitlines():
+        p, pp = line.split()
+        children.setdefault(int(pp), []).append(int(p))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def terminate(pid):
+    """SIGTERM a cell's process group and everything it started."""
+    tree = descendants(pid)
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    for p in tree:
+        try:
+            os.kill(p, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def expand(tasks, agents, runs):
+    """Cells as (task, run_id, agent), task-major."""
+    return [(t, r, a) for t in tasks for r in range(1, runs + 1) for a in agents]
+
+
+def workspace(base_dir, cell):
+    task, run_id, agent = cell
+    return os.path.join(base_dir, f"{task}-{agent}-run{run_id}")
+
+
+def _cell_of(fields):
+    """(task, run_id, agent) from the first three fields of a results.csv
+    or timeline.csv row, or None for a malformed row."""
+    try:
+        task, run_id, agent = fields[:3]
+        return task, int(run_id), agent
+    except ValueError:
+        return None
+
+
+def resume(base_dir, cells):
+    """The cells of an interrupted run in base_dir that still have to run."""
+    results = os.path.join(base_dir, "results.csv")
+    try:
+        with open(results, newline="") as f:
+            header = f.readline().rstrip("\r\n")
+            done = {_cell_of(row) for row in csv.reader(f)}
+    except OSError:
+        header, done = "", set()
+    for cell in cells:
+        marker = os.path.join(workspace(base_dir, cell), DONE_MARKER)
+        if cell not in done and os.path.exists(marker):
+            with open(marker) as f:
+                results_writer.append(results, [f.read().strip()], header or None)
+            done.add(cell)
+    timeline = os.path.join(base_dir, "timeline.csv")
+    try:
+        with open(timeline, newline="") as f:
+            lines = f.readlines()
+    except OSError:
+        lines = []
+    if lines:
+        keep = [line for line in lines[1:] if _cell_of(line.split(",")) in done]
+        with open(timeline + ".tmp", "w", newline="") as f:
+            f.writelines(lines[:1] + keep)
+        os.replace(timeline + ".tmp", timeline)
+    return [cell for cell in cells if cell not in done]
+
+
+class Orchestrator:
+    def __init__(self, script, base_dir, cells, jobs, caps=None, agent_cap=None, out=sys.stdout.buffer):
+        self.script = script
+        self.base_dir = base_dir
+        self.pending = list(cells)
+        self.jobs = max(1, jobs)
+        self.caps = caps or {}
+        self.agent_cap = agent_cap or self.jobs   # for agents without a cap of their own
+        self.out = out
+        self.total = len(cells)
+        self.done = 0
+        self.failed = []
+        self.running = {}   # agent -> cells in flight
+        self.procs = set()
+
+    def _startable(self):
+        """Index of the first pending cell whose agent is under its cap."""
+        for i, (_, _, agent) in enumerate(self.pending):
+            if self.running.get(agent, 0) < self.caps.get(agent, self.agent_cap):
+                return i
+        return None
+
+    def _emit(self, prefix, line):
+        self.out.write(prefix + line)
+        if not line.endswith(b"\n"):
+            self.out.write(b"\n")
+        self.out.flush()
+
+    async def _pump(self, stream, prefix):
+        """Copy stream to out line by line; returns the last SUCCESS= value."""
+        outcome, buf = None, b""
+        while True:
+            chunk = await stream.read(1 << 16)
+            if not chunk:
+                break
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                m = OUTCOME.search(line)
+                if m:
+                    outcome = m.group(1).decode()
+                self._emit(prefix, line + b"\n")
+        if buf:
+            self._emit(prefix, buf)
+        return outcome
+
+    async def run_cell(self, cell):
+        task, run_id, agent = cell
+        label = f"{task}/{agent}#{run_id}"
+        t0 = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            "bash", self.script, "--cell", task, str(run_id), agent, "--base-dir", self.base_dir,
+            stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT, start_new_session=True)
+        self.procs.add(proc)
+        try:
+            outcome = await self._pump(proc.stdout, f"[{label}] ".encode())
+            ec = await proc.wait()
+        finally:
+            self.procs.discard(proc)
+        self.done += 1
+        if ec != 0:
+            self.failed.append(label)
+        took = (time.monotonic() - t0) / 60
+        status = outcome or f"cell exited {ec}"
+        self._emit(b"", f"==> [{self.done}/{self.total}] {label}: {status} in {took:.1f}m".encode())
+
+    async def run(self):
+        """Run every cell; returns the labels of cells that exited
+        abnormally.  SIGINT or SIGTERM cancels the run."""
+        loop, me = asyncio.get_running_loop(), asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, me.cancel)
+        tasks = {}
+        try:
+            while self.pending or tasks:
+                while len(tasks) < self.jobs:
+                    i = self._startable()
+                    if i is None:
+                        break
+                    cell = self.pending.pop(i)
+                    self.running[cell[2]] = self.running.get(cell[2], 0) + 1
+                    tasks[asyncio.ensure_future(self.run_cell(cell))] = cell
+                finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for fut in finished:
+                    cell = tasks.pop(fut)
+                    self.running[cell[2]] -= 1
+                    fut.result()
+        finally:
+            for proc in list(self.procs):
+                terminate(proc.pid)
+            for fut in tasks:
+                fut.cancel()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+        return self.failed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run evaluation cells from one work queue")
+    ap.add_argument("--script", required=True, help="coding-agent-eval.sh, run once per cell")
+    ap.add_argument("--base-dir", required=True)
+    ap.add_argument("--tasks", required=True, help="comma-separated task names")
+    ap.add_argument("--agents", required=True, help="comma-separated agent names")
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="cells running at once (default: one per agent, each agent capped at one)")
+    ap.add_argument("--agent-jobs", action="append", default=[], metavar="AGENT=N",
+                    help="cap on cells of one agent running at once (repeatable)")
+    ap.add_argument("--resume", action="store_true",
+                    help="queue only the cells an interrupted run in BASE_DIR did not finish")
+    args = ap.parse_args(argv)
+    try:
+        caps = parse_caps(args.agent_jobs)
+    except argparse.ArgumentTypeError as e:
+        ap.error(str(e))
+
+    tasks = [t for t in args.tasks.split(",") if t]
+    agents = [a for a in args.agents.split(",") if a]
+    cells = expand(tasks, agents, args.runs)
+    if args.resume:
+        remaining = resume(args.base_dir, cells)
+        print(f"Resuming: {len(cells) - len(remaining)} of {len(cells)} cells already finished", flush=True)
+        cells = remaining
+    jobs = args.jobs or len(agents) or 1
+    print(f"Queued {len(cells)} cells ({len(tasks)} tasks x {len(agents)} agents x {args.runs} runs), "
+          f"{jobs} at a time", flush=True)
+    orch = Orchestrator(args.script, args.base_dir, cells, jobs, caps, agent_cap=None if args.jobs else 1)
+    try:
+        failed = asyncio.run(orch.run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("Interrupted; running cells were terminated", flush=True)
+        return 130
+    if failed:
+        print(f"Warning: {len(failed)} cells exited abnormally: {', '.join(failed)}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
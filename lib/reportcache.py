@@ -0,0 +1,167 @@
+"""Content-hash memoization for report builds.
+
+A results directory's `.report-cache.json` records the inputs of the last
+build and the rendered fragments they produced:
+
+    {"files": {name: {"size", "mtime_ns", "sha256"}},  # stat fast path for hashes
+     "page": {"key", "size", "mtime_ns"},     # report.html as last written
+     "data": {"key", "tasks", "run_ids", "fragments": {name: html}},
+     "parts": {name: {"key", "html"}},        # fragments read from other files
+     "runs": {"key", "manifest"}}
+
+Keys are SHA-256 digests over the CSV bytes, BUILDER_VERSION (a hash of the
+builder's own sources, so editing them invalidates every cache) and the
+inputs each part depends on:
+
+    runs         CSV                          -> shards under runs/ and the manifest
+    data         CSV, NumPy or not, resamples -> charts, summary, breakdown and
+                                                 phases HTML
+    timeline     timeline.csv                 -> timeline and resources HTML
+    efficiency   CSV, metrics.csv             -> efficiency HTML
+    failed_logs  CSV, generation logs         -> failed-run log tails HTML
+    page         all of the above, TASK label -> report.html
+
+A build whose page key matches and whose report.html is untouched does no
+work at all; otherwise only the stale parts are recomputed.  Input files
+are only re-hashed when their size or mtime changed.  Generation logs are
+not hashed either: their sizes and mtimes (and those of their logcap.py
+index and tail) stand in for their contents.
+"""
+import hashlib
+import json
+import os
+
+import transcripts
+
+CACHE_NAME = ".report-cache.json"
+PARTS = ("timeline", "efficiency", "failed_logs")
+BUILDER_MODULES = ("build_report.py", "bootstrap.py", "colcache.py", "groupby.py",
+                   "results.py", "runshards.py", "sketch.py", "timeline.py", "reportcache.py",
+                   "transcripts.py", "logcap.py", "rusage.py")
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _builder_version():
+    h = hashlib.sha256()
+    for name in BUILDER_MODULES:
+        with open(os.path.join(_LIB_DIR, name), "rb") as f:
+            h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+
+BUILDER_VERSION = _builder_version()
+
+
+def digest(*parts):
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def logs_digest(results_dir):
+    """Digest of the size and mtime of each cell's generation log and its
+    index and tail, which the failed-run log tails are read from."""
+    h = hashlib.sha256()
+    for _, log, _ in transcripts.cell_logs(results_dir):
+        for path in (log, log + ".idx", log + ".tail"):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ReportCache:
+    """The memo for one results directory.  Keys are computed up front by
+    keys(); lookups return None when that part is stale."""
+
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+        self.path = os.path.join(results_dir, CACHE_NAME)
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _hash(self, path):
+        """sha256 of path, or "" when it does not exist."""
+        files = self.state.setdefault("files", {})
+        name = os.path.basename(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            files.pop(name, None)
+            return ""
+        f = files.get(name, {})
+        if (f.get("size"), f.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+            f = files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_sha256(path)}
+        return f["sha256"]
+
+    def keys(self, csv_path, task_label, use_numpy, resamples):
+        results_dir = os.path.dirname(csv_path)
+        csv = self._hash(csv_path)
+        timeline = self._hash(os.path.join(results_dir, "timeline.csv"))
+        metrics = self._hash(os.path.join(results_dir, transcripts.METRICS_NAME))
+        keys = {
+            "runs": digest("runs", BUILDER_VERSION, csv),
+            "data": digest("data", BUILDER_VERSION, csv, bool(use_numpy), resamples),
+            "timeline": digest("timeline", BUILDER_VERSION, timeline),
+            "efficiency": digest("efficiency", BUILDER_VERSION, csv, metrics),
+            "failed_logs": digest("failed_logs", BUILDER_VERSION, csv, logs_digest(results_dir)),
+        }
+        keys["page"] = digest("page", *(keys[k] for k in ("runs", "data") + PARTS), task_label)
+        return keys
+
+    def page_fresh(self, keys, html_path):
+        page = self.state.get("page", {})
+        if page.get("key") != keys["page"]:
+            return False
+        try:
+            st = os.stat(html_path)
+        except OSError:
+            return False
+        return (page.get("size"), page.get("mtime_ns")) == (st.st_size, st.st_mtime_ns)
+
+    def data(self, keys):
+        data = self.state.get("data", {})
+        return data if data.get("key") == keys["data"] else None
+
+    def parts(self, keys):
+        """{name: html} of the PARTS that are still fresh."""
+        parts = self.state.get("parts", {})
+        return {name: parts[name]["html"] for name in PARTS
+                if parts.get(name, {}).get("key") == keys[name]}
+
+    def manifest(self, keys):
+        """The cached run-table manifest, if its shards are still on disk."""
+        runs = self.state.get("runs", {})
+        if runs.get("key") != keys["runs"]:
+            return None
+        manifest = runs["manifest"]
+        if manifest["shards"]:
+            last = os.path.join(self.results_dir, "runs", "%05d.js" % (manifest["shards"] - 1))
+            if not os.path.exists(last):
+                return None
+        return manifest
+
+    def save(self, keys, html_path, data, manifest, parts):
+        st = os.stat(html_path)
+        self.state["page"] = {"key": keys["page"], "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self.state["data"] = dict(data, key=keys["data"])
+        self.state["parts"] = {name: {"key": keys[name], "html": parts[name]} for name in PARTS}
+        self.state["runs"] = {"key": keys["runs"], "manifest": manifest}
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only results directory: build without memoizing
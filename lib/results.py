@@ -0,0 +1,136 @@
+"""Reading results.csv as a stream of Run records.
+
+The harness appends one line per (task, agent, run) cell.  Schema v1 is
+
+    Task,RunId,Agent,Success(Y/N),Time(min)
+
+where Time(min) was written as minutes.seconds ("1.5" for 1m05s).  Schema
+v2 writes Time(min) as decimal minutes and appends wall seconds and an exit
+code for each phase of the cell, in PHASES order:
+
+    ...,Time(min),Setup(s),Setup(ec),Generation(s),Generation(ec),...
+
+Phases that did not run (a Node project has no venv) are left empty.  v1
+files are told apart by their header, which has no phase columns; their
+Time(min) is decoded from minutes.seconds, and they read as Runs with
+phases None, so every reader handles both.
+
+Rows are yielded one at a time so callers can aggregate without holding the
+whole file in memory.
+"""
+import csv
+import os
+from collections import namedtuple
+
+HEADER = ["Task", "RunId", "Agent", "Success(Y/N)", "Time(min)"]
+PHASES = ("setup", "generation", "venv", "install", "tests", "headless")
+PHASE_COLUMNS = [(p.capitalize() + "(s)", p.capitalize() + "(ec)") for p in PHASES]
+HEADER_V2 = HEADER + [c for pair in PHASE_COLUMNS for c in pair]
+
+# status is one of "Y", "N" or "SKIP"; minutes is None when unparseable.
+# phases is None for v1 rows, else a (seconds, exit_code) pair per PHASES
+# entry with None for whatever was not recorded.
+Run = namedtuple("Run", "task run_id agent status minutes phases", defaults=(None,))
+
+
+def parse_status(s):
+    s = s.strip().upper()
+    if s in ("Y", "SKIP"):
+        return s
+    return "N"
+
+
+def parse_minutes(s):
+    try:
+        return float(s)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_v1_minutes(s):
+    """Minutes from a v1 Time(min), written as $((dt/60)).$((dt%60)): "1.5"
+    is 1m05s and "1.50" is 1m50s."""
+    m, _, sec = (s or "").strip().partition(".")
+    if not m.isdigit() or not (sec.isdigit() or sec == ""):
+        return None
+    return int(m) + int(sec or 0) / 60
+
+
+def parse_exit_code(s):
+    s = (s or "").strip()
+    return int(s) if s.isdigit() else None
+
+
+def is_v1(row):
+    return row.get(PHASE_COLUMNS[1][0]) is None   # no Generation(s) column
+
+
+def parse_phases(row):
+    if is_v1(row):
+        return None
+    phases = tuple((parse_minutes(row.get(sec)), parse_exit_code(row.get(ec)))
+                   for sec, ec in PHASE_COLUMNS)
+    return phases if any(s is not None or e is not None for s, e in phases) else None
+
+
+def parse_row(row):
+    """Turn a results.csv DictReader row into a Run."""
+    run_id = (row.get("RunId") or "").strip()
+    return Run(
+        task=(row.get("Task") or "").strip(),
+        run_id=int(run_id) if run_id.isdigit() else 0,
+        agent=(row.get("Agent") or "").strip(),
+        status=parse_status(row.get("Success(Y/N)") or ""),
+        minutes=(parse_v1_minutes if is_v1(row) else parse_minutes)(row.get("Time(min)")),
+        phases=parse_phases(row),
+    )
+
+
+def iter_runs(csv_path):
+    """Yield a Run for every data row of csv_path, in file order."""
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield parse_row(row)
+
+
+class CsvTail:
+    """Follow a results.csv that is still being appended to.
+
+    poll() returns the Runs completed since the last call, reading only the
+    bytes after the saved offset.  A partial last line (a concurrent
+    append_to_csv mid-write) is left for the next poll.  If the file is
+    replaced or truncated, as when the harness rewrites the header at the
+    start of a run, reading restarts from the top and `reset` is set so the
+    caller can drop what it aggregated so far.
+    """
+
+    def __init__(self, csv_path):
+        self.path = csv_path
+        self.offset = 0
+        self.header = None
+        self.ino = None
+        self.reset = False
+
+    def poll(self):
+        self.reset = False
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self.ino or st.st_size < self.offset:
+                self.reset = self.ino is not None
+                self.ino, self.offset, self.header = st.st_ino, 0, None
+            if st.st_size == self.offset:
+                return []
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return []
+        self.offset += end
+        lines = chunk[:end].decode("utf-8").splitlines()
+        if self.header is None:
+            self.header = next(csv.reader([lines.pop(0)])) if lines else None
+        return [parse_row(row) for row in csv.DictReader(lines, fieldnames=self.header or HEADER)]
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Incremental SQLite index over every results.csv in the archive.
+
+    results_index.py [--db PATH] update [ROOT ...]
+    results_index.py [--db PATH] query [--task T] [--agent A] [--since D] [--until D]
+                                       [--status S] [--min-minutes M] [--max-minutes M]
+
+`update` scans each ROOT (default: the repository) for
+eval_results_*/results.csv and docs/results/*/results.csv, leaving out the
+eval_results_*_backup_HHMMSS copies the harness keeps of replaced runs.
+Sources under a scanned ROOT whose file is gone (a backup deleted by the
+retention policy, a removed run) are dropped with their rows in the same
+transaction.  For every file it
+remembers the byte offset it has ingested up to plus a hash of the bytes
+around it, so re-running only reads rows appended since last time.  A file
+whose prefix no longer matches (rewritten by a new run) is re-ingested from
+scratch, and so is everything when the database was written by a version
+that parsed rows differently (SCHEMA_VERSION, kept in PRAGMA user_version).
+
+The report builder reads slices back with query_runs(), see
+`build_report.py --db`.  Queries open the database read-only and take only
+typed filters, bound as SQL parameters.
+"""
+import argparse
+import csv
+import datetime
+import glob
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import sys
+import urllib.parse
+
+from results import HEADER, Run, parse_row
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(REPO_DIR, "eval_results_index.sqlite")
+SOURCE_GLOBS = ("eval_results_*/results.csv", "docs/results/*/results.csv")
+BACKUP_RE = re.compile(r"_backup_\d{6}$")   # coding-agent-eval.sh's backup dirs
+STATUSES = ("Y", "N", "SKIP")
+HASH_SPAN = 64 * 1024
+SCHEMA_VERSION = 2   # 2: v1 Time(min) decoded from minutes.seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+  id INTEGER PRIMARY KEY,
+  path TEXT UNIQUE NOT NULL,
+  date TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  offset INTEGER NOT NULL,
+  prefix_hash TEXT NOT NULL,
+  header TEXT NOT NULL,
+  next_line INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+  source_id INTEGER NOT NULL REFERENCES sources(id),
+  line INTEGER NOT NULL,
+  date TEXT NOT NULL,
+  task TEXT NOT NULL,
+  agent TEXT NOT NULL,
+  run_id INTEGER NOT NULL,
+  status TEXT NOT NULL,
+  minutes REAL
+);
+CREATE INDEX IF NOT EXISTS runs_slice ON runs(task, agent, date, run_id);
+CREATE INDEX IF NOT EXISTS runs_source ON runs(source_id, line);
+"""
+
+
+def connect(db_path=DEFAULT_DB, readonly=False):
+    if readonly:
+        return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        with conn:
+            conn.execute("DELETE FROM runs")
+            conn.execute("DELETE FROM sources")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def source_date(csv_path):
+    """Evaluation date for a results.csv, from its directory name when it
+    follows eval_results_YYMMDD or docs/results/YYYY-MM-DD."""
+    name = os.path.basename(os.path.dirname(os.path.abspath(csv_path)))
+    m = re.match(r"eval_results_(\d\d)(\d\d)(\d\d)", name)
+    if m:
+        return "20%s-%s-%s" % m.groups()
+    if re.fullmatch(r"\d{4}-\d\d-\d\d", name):
+        return name
+    return datetime.date.fromtimestamp(os.path.getmtime(csv_path)).isoformat()
+
+
+def _prefix_hash(f, offset):
+    """Hash of the first and last HASH_SPAN bytes before offset."""
+    h = hashlib.sha256()
+    f.seek(0)
+    h.update(f.read(min(offset, HASH_SPAN)))
+    if offset > HASH_SPAN:
+        f.seek(max(HASH_SPAN, offset - HASH_SPAN))
+        h.update(f.read(offset - max(HASH_SPAN, offset - HASH_SPAN)))
+    return h.hexdigest()
+
+
+def _ingest(conn, path):
+    """Ingest rows appended to path since the last update; return the
+    number of rows added."""
+    st = os.stat(path)
+    src = conn.execute("SELECT id, size, mtime_ns, offset, prefix_hash, header, next_line"
+                       " FROM sources WHERE path = ?", (path,)).fetchone()
+    if src and (src[1], src[2]) == (st.st_size, st.st_mtime_ns):
+        return 0
+    with open(path, "rb") as f:
+        if src and st.st_size >= src[3] and _prefix_hash(f, src[3]) == src[4]:
+            source_id, offset, header, line = src[0], src[3], src[5], src[6]
+        else:
+            if src:
+                conn.execute("DELETE FROM runs WHERE source_id = ?", (src[0],))
+                conn.execute("DELETE FROM sources WHERE id = ?", (src[0],))
+            f.seek(0)
+            first = f.readline()
+            if not first.endswith(b"\n"):
+                return 0
+            header = first.decode("utf-8").strip() or ",".join(HEADER)
+            offset, line = len(first), 1
+            source_id = conn.execute(
+                "INSERT INTO sources (path, date, size, mtime_ns, offset, prefix_hash, header, next_line)"
+                " VALUES (?, ?, 0, 0, 0, '', ?, 1)", (path, source_date(path), header)).lastrowid
+        f.seek(offset)
+        chunk = f.read(st.st_size - offset)
+        # A concurrent writer may have left a partial last line; leave it
+        # for the next update.
+        end = chunk.rfind(b"\n") + 1
+        chunk = chunk[:end]
+        date = conn.execute("SELECT date FROM sources WHERE id = ?", (source_id,)).fetchone()[0]
+        reader = csv.DictReader(io.StringIO(chunk.decode("utf-8")), fieldnames=header.split(","))
+        rows = []
+        for row in reader:
+            line += 1
+            r = parse_row(row)
+            rows.append((source_id, line, date, r.task, r.agent, r.run_id, r.status, r.minutes))
+        conn.executemany("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        offset += end
+        conn.execute("UPDATE sources SET size = ?, mtime_ns = ?, offset = ?, prefix_hash = ?, next_line = ?"
+                     " WHERE id = ?", (st.st_size, st.st_mtime_ns, offset, _prefix_hash(f, offset),
+                                       line, source_id))
+    return len(rows)
+
+
+def sources(roots):
+    """results.csv files under roots, backups left out."""
+    for root in roots:
+        for pattern in SOURCE_GLOBS:
+            for path in sorted(glob.glob(os.path.join(os.path.abspath(root), pattern))):
+                if not BACKUP_RE.search(os.path.basename(os.path.dirname(path))):
+                    yield path
+
+
+def _prune(conn, roots, keep):
+    """Drop sources under roots that are not in keep, with their rows;
+    returns how many were dropped."""
+    prefixes = tuple(os.path.join(os.path.abspath(r), "") for r in roots)
+    gone = [(sid,) for sid, path in conn.execute("SELECT id, path FROM sources")
+            if path.startswith(prefixes) and path not in keep]
+    conn.executemany("DELETE FROM runs WHERE source_id = ?", gone)
+    conn.executemany("DELETE FROM sources WHERE id = ?", gone)
+    return len(gone)
+
+
+def update(conn, roots=(REPO_DIR,)):
+    """Ingest new rows from every results.csv under roots and forget the
+    sources under them that are gone, in one transaction.  Returns (rows
+    added, sources dropped)."""
+    added = 0
+    paths = list(dict.fromkeys(sources(roots)))
+    with conn:
+        for path in paths:
+            added += _ingest(conn, path)
+        dropped = _prune(conn, roots, set(paths))
+    return added, dropped
+
+
+def query_runs(conn, task=None, agent=None, since=None, until=None, status=None,
+               min_minutes=None, max_minutes=None):
+    """Yield Runs matching the filters, oldest first."""
+    clauses, params = [], []
+    for col, op, val in (("task", "=", task), ("agent", "=", agent),
+                         ("date", ">=", since), ("date", "<=", until), ("status", "=", status),
+                         ("minutes", ">=", min_minutes), ("minutes", "<=", max_minutes)):
+        if val is not None:
+            clauses.append(f"{col} {op} ?")
+            params.append(val)
+    sql = "SELECT task, run_id, agent, status, minutes FROM runs"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY date, source_id, line"
+    for row in conn.execute(sql, params):
+        yield Run(*row)
+
+
+def add_filter_args(ap):
+    ap.add_argument("--task", help="only runs of this task")
+    ap.add_argument("--agent", help="only runs of this agent")
+    ap.add_argument("--since", metavar="YYYY-MM-DD", help="only runs on or after this date")
+    ap.add_argument("--until", metavar="YYYY-MM-DD", help="only runs on or before this date")
+    ap.add_argument("--status", choices=STATUSES, help="only runs with this outcome")
+    ap.add_argument("--min-minutes", type=float, metavar="M", help="only runs that took at least M minutes")
+    ap.add_argument("--max-minutes", type=float, metavar="M", help="only runs that took at most M minutes")
+
+
+def filter_args(args):
+    """The query_runs keyword arguments from parsed add_filter_args options."""
+    return {k: getattr(args, k) for k in ("task", "agent", "since", "until", "status",
+                                          "min_minutes", "max_minutes")}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Incremental SQLite index of results.csv files")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"index database (default: {DEFAULT_DB})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    up = sub.add_parser("update", help="ingest new rows")
+    up.add_argument("roots", nargs="*", default=[REPO_DIR],
+                    help="directories to scan (default: the repository)")
+    q = sub.add_parser("query", help="print matching runs as CSV")
+    add_filter_args(q)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "update":
+        conn = connect(args.db)
+        added, dropped = update(conn, args.roots)
+        print(f"Indexed {added} new rows into {args.db}" + (f", dropped {dropped} missing sources" if dropped else ""))
+    else:
+        if not os.path.exists(args.db):
+            ap.error(f"index database not found: {args.db}")
+        conn = connect(args.db, readonly=True)
+        w = csv.writer(sys.stdout)
+        w.writerow(HEADER)
+        for r in query_runs(conn, **filter_args(args)):
+            w.writerow([r.task, r.run_id, r.agent, r.status, "" if r.minutes is None else r.minutes])
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Appending rows to results.csv and timeline.csv from concurrent cells.
+
+    results_writer.py append [--header LINE] [--no-sync] FILE ROW [ROW ...]
+
+Every cell appends its own rows while others do the same.  append() takes
+an exclusive fcntl.flock on the file itself.  A writer with nothing to do
+sleeps in the kernel until the lock is free; there is no lock file to
+poll or to go stale.  Under the lock it writes the header if the file is
+still empty, then writes all of its rows with one O_APPEND write (looping
+only on a short write).  Another writer's rows can therefore never land
+inside ours, however long the rows are.
+
+Every append with sync=True issues its own fsync; nothing batches them.
+The fsync comes after the lock is released, so a writer waits only for
+its own flush and never holds the lock through another's.  The harness
+appends one results.csv row per cell, so that is one fsync per cell.
+Timeline rows, which can be lost without harm, skip it (--no-sync).
+"""
+import argparse
+import fcntl
+import os
+import sys
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def append(path, rows, header=None, sync=True):
+    """Append rows (strings without newlines) to path, creating it with
+    header first if it is empty."""
+    data = "".join(row.rstrip("\n") + "\n" for row in rows).encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if header and os.fstat(fd).st_size == 0:
+                data = (header + "\n").encode() + data
+            _write_all(fd, data)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Locked appends to results CSV files")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ad = sub.add_parser("append", help="append ROWs to FILE under an exclusive lock")
+    ad.add_argument("--header", help="written first when FILE is empty")
+    ad.add_argument("--no-sync", action="store_true", help="skip the fsync")
+    ad.add_argument("file")
+    ad.add_argument("rows", nargs="+")
+    args = ap.parse_args(argv)
+
+    append(args.file, args.rows, args.header, sync=not args.no_sync)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
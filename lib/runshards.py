@@ -0,0 +1,98 @@
+"""Paged, precompressed shards for the report's "All Runs" table.
+
+Instead of one <tr> per run inlined into report.html, runs are written in
+pages of SHARD_ROWS to RESULTS_DIR/runs/NNNNN.js, each alongside a gzip copy
+(NNNNN.js.gz) for servers that serve precompressed files.  A shard is a JSON
+object of column arrays wrapped in a `loadRunShard(index, {...});` call, so
+the page can load shards with <script> tags; that works from file:// as well
+as over HTTP, where fetch() of a sibling file would not.
+
+    {"t": [task codes], "r": [run ids], "a": [agent codes],
+     "s": [status codes], "m": [hundredths of a minute, -1 if unknown]}
+
+Codes index into the manifest's "tasks", "agents" and "statuses" lists, which
+the report inlines together with the row and shard counts.
+"""
+import gzip
+import json
+import os
+import re
+import time
+
+from colcache import STATUS_CODES
+from groupby import np
+
+SHARD_ROWS = 2000
+SHARD_RE = re.compile(r"^(\d{5})\.js(\.gz)?$")
+
+
+class RunShardWriter:
+    """Write runs to shards either one at a time (add) or straight from a
+    colcache.Columns (add_columns)."""
+
+    def __init__(self, out_dir, shard_rows=SHARD_ROWS):
+        self.out_dir = out_dir
+        self.shard_rows = shard_rows
+        self.tasks, self.agents = {}, {}
+        self.rows = 0
+        self.shards = 0
+        self._status = {s: i for i, s in enumerate(STATUS_CODES)}
+        self._page = {"t": [], "r": [], "a": [], "s": [], "m": []}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add(self, run):
+        p = self._page
+        p["t"].append(self.tasks.setdefault(run.task, len(self.tasks)))
+        p["r"].append(run.run_id)
+        p["a"].append(self.agents.setdefault(run.agent, len(self.agents)))
+        p["s"].append(self._status[run.status])
+        p["m"].append(-1 if run.minutes is None else int(run.minutes * 100 + 0.5))
+        self.rows += 1
+        if len(p["r"]) == self.shard_rows:
+            self._flush()
+
+    def add_columns(self, cols):
+        """Shard a whole Columns using slice.tolist() per column page."""
+        self._flush()
+        task_map = [self.tasks.setdefault(t, len(self.tasks)) for t in cols.tasks]
+        agent_map = [self.agents.setdefault(a, len(self.agents)) for a in cols.agents]
+        identity = task_map == list(range(len(task_map))) and agent_map == list(range(len(agent_map)))
+        for lo in range(0, cols.n, self.shard_rows):
+            hi = min(lo + self.shard_rows, cols.n)
+            t, a = cols.task[lo:hi].tolist(), cols.agent[lo:hi].tolist()
+            if not identity:
+                t = [task_map[x] for x in t]
+                a = [agent_map[x] for x in a]
+            if np is not None:
+                m = np.frombuffer(cols.minutes[lo:hi], dtype=np.float32).astype(np.float64)
+                m = np.where(np.isnan(m), -1, np.rint(m * 100)).astype(np.int64).tolist()
+            else:
+                m = [-1 if x != x else int(x * 100 + 0.5) for x in cols.minutes[lo:hi].tolist()]
+            self._page = {"t": t, "r": cols.run_id[lo:hi].tolist(), "a": a,
+                          "s": cols.status[lo:hi].tolist(), "m": m}
+            self.rows += hi - lo
+            self._flush()
+
+    def _flush(self):
+        if not self._page["r"]:
+            return
+        body = ("loadRunShard(%d,%s);\n" % (self.shards, json.dumps(self._page, separators=(",", ":")))).encode()
+        base = os.path.join(self.out_dir, "%05d.js" % self.shards)
+        for path, data in ((base, body), (base + ".gz", gzip.compress(body, 1, mtime=0))):
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        self.shards += 1
+        self._page = {"t": [], "r": [], "a": [], "s": [], "m": []}
+
+    def close(self):
+        """Flush the last page, drop shards left over from a larger previous
+        build and return the manifest the page needs."""
+        self._flush()
+        for name in os.listdir(self.out_dir):
+            m = SHARD_RE.match(name)
+            if m and int(m.group(1)) >= self.shards:
+                os.unlink(os.path.join(self.out_dir, name))
+        return {"rows": self.rows, "shard": self.shard_rows, "shards": self.shards,
+                "tasks": list(self.tasks), "agents": list(self.agents),
+                "statuses": list(STATUS_CODES), "v": int(time.time())}
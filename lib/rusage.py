@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Resource usage of the harness's phases, from wait4.
+
+    rusage.py run [--out FILE] -- CMD ...
+    rusage.py summary RESULTS_DIR
+
+Wall time alone cannot tell a parallel run that thrashes the host from one
+that idles.  `run` is the supervisor every phase's command runs under: it
+spawns CMD, forwards SIGINT/SIGTERM/SIGHUP to it, reaps it with os.wait4()
+and exits with its status (128 + N for signal N).  The rusage wait4 returns
+covers CMD and every descendant it waited for.  The agent CLI under
+timeout, pip, pytest, the headless game and npm are all covered; daemons
+that detach from their parent are not.  The usage is written to FILE as
+the tail of a timeline.csv row, in USAGE_COLUMNS order:
+
+    UserCPU(s),SysCPU(s),MaxRSS(KB),InBlocks,OutBlocks,VolCtx,InvolCtx
+
+Blocks are 512-byte units of filesystem I/O that reached the device.
+MaxRSS is the peak of the largest single process, not of the tree.
+Without --out, a summary goes to stderr, like /usr/bin/time.
+
+summarize() folds a timeline into what host sizing needs:
+- per (agent, phase) medians and maxima;
+- the CPU cores the run kept busy on average and at peak;
+- peak memory, the sum of MaxRSS over phases running at the same time.
+Phases running at the same time are assumed to peak together, so the sum
+is an upper bound.
+"""
+import argparse
+import os
+import signal
+import statistics
+import sys
+
+import timeline
+from timeline import USAGE_COLUMNS
+
+# ru_maxrss is in bytes on macOS and KB elsewhere
+RSS_KB = 1 / 1024 if sys.platform == "darwin" else 1
+
+
+def usage_fields(ru):
+    return (f"{ru.ru_utime:.3f}", f"{ru.ru_stime:.3f}", str(int(ru.ru_maxrss * RSS_KB)),
+            str(ru.ru_inblock), str(ru.ru_oublock), str(ru.ru_nvcsw), str(ru.ru_nivcsw))
+
+
+def supervise(cmd):
+    """Run cmd to completion; returns (exit status, rusage)."""
+    try:
+        pid = os.posix_spawnp(cmd[0], cmd, os.environ)
+    except OSError as e:
+        print(f"rusage.py: {cmd[0]}: {e.strerror}", file=sys.stderr)
+        return (127 if isinstance(e, FileNotFoundError) else 126), None
+
+    def forward(signum, _frame):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, forward)
+    _, status, ru = os.wait4(pid, 0)
+    ec = os.waitstatus_to_exitcode(status)
+    return (128 - ec if ec < 0 else ec), ru
+
+
+def summarize(phases):
+    """Per (agent, phase) statistics and host-wide figures from timeline
+    Phases; see the module docstring.  None without supervised phases."""
+    usage = [(p, p.usage) for p in phases if p.usage is not None]
+    if not usage:
+        return None
+    groups = {}
+    for p, u in usage:
+        groups.setdefault((p.agent, p.phase), []).append((p, u))
+    rows = []
+    for (agent, name), items in sorted(groups.items()):
+        cpu = [u["UserCPU(s)"] + u["SysCPU(s)"] for _, u in items]
+        cores = [c / (p.end - p.start) for c, (p, _) in zip(cpu, items) if p.end > p.start]
+        rss = [u["MaxRSS(KB)"] for _, u in items]
+        io = [(u["InBlocks"] * 512, u["OutBlocks"] * 512) for _, u in items]
+        rows.append({
+            "agent": agent, "phase": name, "runs": len(items),
+            "cpu_s": statistics.median(cpu),
+            "cores": statistics.median(cores) if cores else None,
+            "rss_kb": statistics.median(rss), "rss_max_kb": max(rss),
+            "read_b": statistics.median(r for r, _ in io), "written_b": statistics.median(w for _, w in io),
+            "vol_ctx": statistics.median(u["VolCtx"] for _, u in items),
+            "invol_ctx": statistics.median(u["InvolCtx"] for _, u in items),
+        })
+    # Sweep the phases' starts and ends: cores as CPU seconds per wall
+    # second spread evenly over each phase, memory as the sum of peaks
+    events = []
+    for p, u in usage:
+        wall = max(p.end - p.start, 1e-3)
+        rate = (u["UserCPU(s)"] + u["SysCPU(s)"]) / wall
+        events += [(p.start, 1, rate, u["MaxRSS(KB)"]), (p.end, -1, -rate, -u["MaxRSS(KB)"])]
+    events.sort(key=lambda e: (e[0], e[1]))
+    cores = rss = peak_cores = peak_rss = 0.0
+    for _, _, d_cores, d_rss in events:
+        cores += d_cores
+        rss += d_rss
+        peak_cores, peak_rss = max(peak_cores, cores), max(peak_rss, rss)
+    start, end = min(p.start for p, _ in usage), max(p.end for p, _ in usage)
+    total_cpu = sum(u["UserCPU(s)"] + u["SysCPU(s)"] for _, u in usage)
+    return {"rows": rows, "cpu_s": total_cpu, "mean_cores": total_cpu / max(end - start, 1e-3),
+            "peak_cores": peak_cores, "peak_rss_kb": peak_rss}
+
+
+def _mb(kb):
+    return f"{kb / 1024:.0f} MB"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Resource usage of harness phases")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rn = sub.add_parser("run", help="run CMD and record its resource usage")
+    rn.add_argument("--out", help="write the usage columns here (default: summary on stderr)")
+    rn.add_argument("command", nargs=argparse.REMAINDER)
+    sm = sub.add_parser("summary", help="resource usage by agent and phase from timeline.csv")
+    sm.add_argument("dir")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        command = args.command[1:] if args.command[:1] == ["--"] else args.command
+        if not command:
+            ap.error("run needs a command after --")
+        ec, ru = supervise(command)
+        if ru is not None:
+            fields = usage_fields(ru)
+            if args.out:
+                with open(args.out, "w") as f:
+                    f.write(",".join(fields) + "\n")
+            else:
+                print(", ".join(f"{c} {v}" for c, v in zip(USAGE_COLUMNS, fields)), file=sys.stderr)
+        return ec
+    s = summarize(timeline.read_timeline(os.path.join(args.dir, "timeline.csv")))
+    if s is None:
+        print("No resource usage recorded in timeline.csv")
+        return 1
+    print(f"{'agent':<10} {'phase':<11} {'runs':>4} {'cpu s':>8} {'cores':>6} {'rss':>8} "
+          f"{'max rss':>8} {'read MB':>8} {'write MB':>8} {'vcsw':>7} {'ivcsw':>7}")
+    for r in s["rows"]:
+        cores = "" if r["cores"] is None else f"{r['cores']:.2f}"
+        print(f"{r['agent']:<10} {r['phase']:<11} {r['runs']:>4} {r['cpu_s']:>8.1f} {cores:>6} "
+              f"{_mb(r['rss_kb']):>8} {_mb(r['rss_max_kb']):>8} {r['read_b'] / 1e6:>8.1f} "
+              f"{r['written_b'] / 1e6:>8.1f} {r['vol_ctx']:>7.0f} {r['invol_ctx']:>7.0f}")
+    print(f"CPU: {s['cpu_s']:.0f} s in total, {s['mean_cores']:.2f} cores busy on average, "
+          f"{s['peak_cores']:.2f} at peak; memory: {_mb(s['peak_rss_kb'])} at peak (sum of concurrent MaxRSS)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
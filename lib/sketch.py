@@ -0,0 +1,142 @@
+"""Mergeable quantile sketch (merging t-digest) used by the report builder.
+
+A digest keeps at most ~compression centroids no matter how many values are
+added, so per-(task, agent) duration state stays constant-size.  Digests of
+disjoint streams can be merged, which is what lets per-agent and per-date
+aggregates be assembled from smaller ones.
+"""
+import math
+
+
+class TDigest:
+    """Merging t-digest with the k1 (arcsine) scale function.
+
+    Up to `compression` values are kept exactly, so small groups report the
+    same quantiles as groupby.py's NumPy path.  Beyond that
+    the rank error is bounded by roughly q*(1-q)/compression, i.e. tightest
+    at the tails (p99) and loosest around the median.
+    """
+
+    __slots__ = ("compression", "count", "min", "max", "_means", "_weights", "_buf")
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = []
+        self._weights = []
+        self._buf = []
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, w=1):
+        self._buf.append((x, w))
+        self.count += w
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buf) >= 5 * self.compression:
+            self._compress()
+
+    def update(self, values):
+        for x in values:
+            self.add(x)
+
+    def merge(self, other):
+        other._compress()
+        for m, w in zip(other._means, other._weights):
+            self._buf.append((m, w))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buf:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + self._buf)
+        self._buf = []
+        if self.count <= self.compression:
+            # Small enough to keep every value exactly.
+            self._means = [m for m, _ in points]
+            self._weights = [w for _, w in points]
+            return
+        total = float(self.count)
+        means, weights = [], []
+        cur_m, cur_w = points[0]
+        seen = 0.0
+        q_limit = self._q(self._k(0.0) + 1)
+        for m, w in points[1:]:
+            merged = cur_w + w
+            if (seen + merged) / total <= q_limit:
+                cur_m += (m - cur_m) * w / merged
+                cur_w = merged
+            else:
+                means.append(cur_m)
+                weights.append(cur_w)
+                seen += cur_w
+                q_limit = self._q(self._k(seen / total) + 1)
+                cur_m, cur_w = m, w
+        means.append(cur_m)
+        weights.append(cur_w)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1); None when empty.
+
+        Uses the same definition as groupby.py's exact quantiles (NumPy's
+        default, statistics' "inclusive"): rank q * (count - 1) of the sorted
+        values, linearly interpolated.  A centroid stands for the ranks it
+        covers and sits at their middle, so singletons are interpolated
+        exactly and larger centroids approximately, towards min and max at
+        the ends.
+        """
+        self._compress()
+        if not self._means:
+            return None
+        means, weights = self._means, self._weights
+        target = q * (self.count - 1)
+        centre = (weights[0] - 1) / 2
+        if target <= centre:
+            return self.min + (means[0] - self.min) * target / centre if centre else means[0]
+        cum = weights[0]
+        for i in range(1, len(means)):
+            nxt = cum + (weights[i] - 1) / 2
+            if target <= nxt:
+                frac = (target - centre) / (nxt - centre)
+                return means[i - 1] + (means[i] - means[i - 1]) * frac
+            centre = nxt
+            cum += weights[i]
+        last = self.count - 1
+        if last > centre:
+            return means[-1] + (self.max - means[-1]) * (target - centre) / (last - centre)
+        return means[-1]
+
+    def to_dict(self):
+        self._compress()
+        return {"compression": self.compression, "count": self.count,
+                "min": self.min if self.count else None,
+                "max": self.max if self.count else None,
+                "means": self._means, "weights": self._weights}
+
+    @classmethod
+    def from_dict(cls, d):
+        t = cls(d.get("compression", 100))
+        t.count = d["count"]
+        if t.count:
+            t.min, t.max = d["min"], d["max"]
+        t._means = list(d["means"])
+        t._weights = list(d["weights"])
+        return t
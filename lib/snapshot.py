@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Hardlink deduplication of results directories and their backups.
+
+    snapshot.py dedupe [--store DIR] [--jobs N] RESULTS_DIR [...]
+    snapshot.py gc [--store DIR] PARENT
+    snapshot.py du DIR [...]
+
+Every rerun moves BASE_DIR aside to a backup and five of them are kept, yet
+most of their files are identical: prompt.txt, the .claude and .gemini
+settings written into every workspace, unchanged generated sources.
+`dedupe` turns the finished cell workspaces of results directories into
+views of a content-addressed object store next to them:
+
+    PARENT/.eval-objects/ab/abcdef...-644   sha256 of the contents, then mode
+
+Files are hashed on a thread pool.  The first file with a given key
+becomes the object by getting a second link into the store, and every
+identical file after it is replaced by a link to that object.  Files that
+already are a store object (matched by inode, which the store listing
+gives for free) are not hashed again, so deduping a directory twice, or a
+backup of a directory deduped at the end of its run, costs one walk.  An
+object's link count is its reference count: `gc` removes the objects that
+only the store still links to, i.e. those of backups that the retention
+policy has deleted.
+
+Only workspaces with a completion marker (.cell-done) are deduped; nothing
+writes into them again, whereas results.csv and timeline.csv are appended
+to by --resume.  venv/ and node_modules/ are already hardlinks into the
+venv and node_modules caches and are left as they are.  Linked files share
+one mtime and must not be edited in place; editors and the harness replace
+files instead.  Hardlinks need the store on the same filesystem as the
+results, which PARENT guarantees.
+"""
+import argparse
+import errno
+import hashlib
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STORE_NAME = ".eval-objects"
+DONE_MARKER = ".cell-done"   # written by coding-agent-eval.sh, see orchestrate.py
+SKIP_DIRS = {"venv", ".venv", "node_modules"}
+
+
+def default_store(results_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(results_dir)), STORE_NAME)
+
+
+def _objects(store):
+    """Yield a DirEntry for every object in store."""
+    try:
+        fans = list(os.scandir(store))
+    except FileNotFoundError:
+        return
+    for fan in fans:
+        if fan.is_dir(follow_symlinks=False):
+            with os.scandir(fan.path) as it:
+                yield from (e for e in it if e.is_file(follow_symlinks=False))
+
+
+def _workspace_files(results_dir):
+    """Regular files of the finished workspaces in results_dir, with stat."""
+    with os.scandir(results_dir) as it:
+        workspaces = [e.path for e in it if e.is_dir(follow_symlinks=False)
+                      and os.path.exists(os.path.join(e.path, DONE_MARKER))]
+    for ws in workspaces:
+        for root, dirs, names in os.walk(ws):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in names:
+                path = os.path.join(root, name)
+                st = os.lstat(path)
+                if stat.S_ISREG(st.st_mode):
+                    yield path, st
+
+
+def _key(path, st):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return f"{h.hexdigest()}-{stat.S_IMODE(st.st_mode):o}"
+
+
+def _link_to(obj, path):
+    """Replace path by a hardlink to obj."""
+    tmp = f"{path}.{os.getpid()}.dedupe"
+    os.link(obj, tmp)
+    os.replace(tmp, path)
+
+
+def dedupe(results_dirs, store=None, jobs=None):
+    """Link identical files of results_dirs' finished workspaces to shared
+    objects.  Returns (files seen, files hashed, bytes freed)."""
+    store = store or default_store(results_dirs[0])
+    known = {(e.stat().st_dev, e.inode()) for e in _objects(store)}
+    files = [(p, st) for d in results_dirs for p, st in _workspace_files(d)]
+    todo = [(p, st) for p, st in files if (st.st_dev, st.st_ino) not in known]
+    with ThreadPoolExecutor(jobs or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        keys = list(pool.map(lambda item: _key(*item), todo))
+    freed = 0
+    for (path, st), key in zip(todo, keys):
+        obj = os.path.join(store, key[:2], key)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        try:
+            os.link(path, obj)
+            continue  # path is the object now
+        except FileExistsError:
+            pass
+        except OSError as e:
+            if e.errno != errno.EMLINK:
+                raise
+            continue
+        try:
+            if os.stat(obj).st_ino != st.st_ino:
+                _link_to(obj, path)
+                if st.st_nlink == 1:
+                    freed += st.st_size
+        except OSError as e:
+            if e.errno != errno.EMLINK:
+                raise
+    return len(files), len(todo), freed
+
+
+def gc(store):
+    """Remove objects no results directory links to any more.  Returns
+    (objects removed, bytes freed)."""
+    removed = freed = 0
+    for e in _objects(store):
+        st = e.stat(follow_symlinks=False)
+        if st.st_nlink == 1:
+            os.unlink(e.path)
+            removed += 1
+            freed += st.st_size
+    return removed, freed
+
+
+def disk_usage(paths):
+    """(apparent bytes, bytes on disk counting each inode once)."""
+    apparent, seen = 0, {}
+    for top in paths:
+        for root, _, names in os.walk(top):
+            for name in names:
+                st = os.lstat(os.path.join(root, name))
+                if stat.S_ISREG(st.st_mode):
+                    apparent += st.st_size
+                    seen[(st.st_dev, st.st_ino)] = st.st_blocks * 512
+    return apparent, sum(seen.values())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Hardlink deduplication of results directories")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    dd = sub.add_parser("dedupe", help="link identical workspace files to shared objects")
+    dd.add_argument("--store", help=f"object store (default: {STORE_NAME} next to the results)")
+    dd.add_argument("--jobs", type=int, default=None, help="hashing threads")
+    dd.add_argument("dirs", nargs="+")
+    g = sub.add_parser("gc", help="remove objects no results directory uses")
+    g.add_argument("--store", help=f"object store (default: PARENT/{STORE_NAME})")
+    g.add_argument("parent")
+    du = sub.add_parser("du", help="apparent size vs. disk use with shared files counted once")
+    du.add_argument("dirs", nargs="+")
+    args = ap.parse_args(argv)
+
+    t0 = time.monotonic()
+    if args.cmd == "dedupe":
+        seen, hashed, freed = dedupe(args.dirs, args.store, args.jobs)
+        print(f"Deduped {seen} files ({hashed} hashed), freed {freed / 1e6:.1f} MB "
+              f"in {time.monotonic() - t0:.2f}s")
+    elif args.cmd == "gc":
+        removed, freed = gc(args.store or os.path.join(args.parent, STORE_NAME))
+        print(f"Removed {removed} unused objects, freed {freed / 1e6:.1f} MB")
+    else:
+        apparent, actual = disk_usage(args.dirs)
+        print(f"{apparent / 1e6:.1f} MB of files, {actual / 1e6:.1f} MB on disk")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Execution timeline of a harness run and how well it used its slots.
+
+The harness appends one line per phase of every (task, run, agent) cell to
+RESULTS_DIR/timeline.csv:
+
+    Task,RunId,Agent,Phase,Start,End,ExitCode[,USAGE_COLUMNS]
+
+with Start/End as epoch seconds.  Phases run under lib/rusage.py add their
+CPU time, peak RSS, block I/O and context switches (USAGE_COLUMNS); others
+leave them empty, and older timelines lack them.  From those this module derives:
+
+  slots        cells packed greedily into lanes; the lane count is the
+               peak concurrency
+  busy         (time, cells running) steps
+  idle         1 - (sum of cell durations) / (slots x makespan)
+  barrier wait slot time between an agent finishing a task and the task's
+               slowest agent finishing: what a driver that waits for every
+               agent before the next task would lose (orchestrate.py's
+               work queue hands that slot to the next cell instead)
+  critical     the chain of cells that bounds the makespan, found by
+               walking back from the last cell to whichever cell finished
+               last before it started
+  ideal        makespan if the same work were packed perfectly into the
+               same slots: max(busy / slots, longest cell)
+"""
+import bisect
+import csv
+import heapq
+from collections import namedtuple
+
+USAGE_COLUMNS = ("UserCPU(s)", "SysCPU(s)", "MaxRSS(KB)", "InBlocks", "OutBlocks", "VolCtx", "InvolCtx")
+
+# usage maps USAGE_COLUMNS to floats, or is None for unsupervised phases
+Phase = namedtuple("Phase", "task run_id agent phase start end ec usage", defaults=(None,))
+Cell = namedtuple("Cell", "task run_id agent start end phases")
+Utilization = namedtuple("Utilization", "start makespan slots busy idle_fraction "
+                                        "barrier_wait critical critical_work ideal")
+
+
+def read_timeline(path):
+    phases = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                start, end = float(row["Start"]), float(row["End"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            ec = (row.get("ExitCode") or "").strip()
+            try:
+                usage = {c: float(row[c]) for c in USAGE_COLUMNS}
+            except (KeyError, TypeError, ValueError):
+                usage = None
+            phases.append(Phase(row.get("Task", ""), int(row.get("RunId") or 0), row.get("Agent", ""),
+                                row.get("Phase", ""), start, max(start, end),
+                                int(ec) if ec.isdigit() else None, usage))
+    return phases
+
+
+def cells(phases):
+    """Group phases into cells, ordered by start time."""
+    by_cell = {}
+    for p in phases:
+        by_cell.setdefault((p.task, p.run_id, p.agent), []).append(p)
+    out = [Cell(t, r, a, min(p.start for p in ps), max(p.end for p in ps), sorted(ps, key=lambda p: p.start))
+           for (t, r, a), ps in by_cell.items()]
+    return sorted(out, key=lambda c: (c.start, c.end))
+
+
+def assign_slots(cells):
+    """Lane index per cell (same order), reusing the lane that freed up
+    first; the number of lanes is the peak concurrency."""
+    free, lanes, used = [], [], 0
+    for c in cells:
+        if free and free[0][0] <= c.start:
+            _, lane = heapq.heappop(free)
+        else:
+            lane, used = used, used + 1
+        lanes.append(lane)
+        heapq.heappush(free, (c.end, lane))
+    return lanes
+
+
+def busy_steps(cells):
+    """[(time, running cells)] at every start or end."""
+    events = sorted([(c.start, 1) for c in cells] + [(c.end, -1) for c in cells],
+                    key=lambda e: (e[0], e[1]))
+    steps, running = [], 0
+    for t, d in events:
+        running += d
+        if steps and steps[-1][0] == t:
+            steps[-1] = (t, running)
+        else:
+            steps.append((t, running))
+    return steps
+
+
+def critical_path(cells):
+    if not cells:
+        return []
+    by_end = sorted(cells, key=lambda c: c.end)
+    ends = [c.end for c in by_end]
+    i = len(by_end) - 1
+    path = [by_end[i]]
+    while True:
+        i = bisect.bisect_right(ends, by_end[i].start, 0, i) - 1
+        if i < 0:
+            break
+        path.append(by_end[i])
+    return path[::-1]
+
+
+def utilization(cells, slots=None):
+    if not cells:
+        return None
+    start = min(c.start for c in cells)
+    makespan = max(c.end for c in cells) - start
+    slots = slots or max(assign_slots(cells)) + 1
+    busy = sum(c.end - c.start for c in cells)
+    task_end = {}
+    for c in cells:
+        task_end[c.task] = max(task_end.get(c.task, c.end), c.end)
+    agent_end = {}
+    for c in cells:
+        key = (c.task, c.agent)
+        agent_end[key] = max(agent_end.get(key, c.end), c.end)
+    barrier_wait = sum(task_end[t] - end for (t, _), end in agent_end.items())
+    path = critical_path(cells)
+    return Utilization(
+        start=start, makespan=makespan, slots=slots, busy=busy,
+        idle_fraction=(1 - busy / (slots * makespan)) if makespan > 0 else 0.0,
+        barrier_wait=barrier_wait, critical=path,
+        critical_work=sum(c.end - c.start for c in path),
+        ideal=max(busy / slots, max(c.end - c.start for c in cells)))
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Turns, tool calls and token usage from agent generation logs.
+
+    transcripts.py parse LOG [...]
+    transcripts.py scan [--jobs N] [--force] RESULTS_DIR [...]
+
+results.csv only says whether a cell passed.  The generation logs say how
+the agent got there, and `scan` extracts that for every workspace of
+RESULTS_DIR into RESULTS_DIR/metrics.csv, one row per cell:
+
+    Task,RunId,Agent,Turns,ToolCalls,Writes,Reads,Shell,OtherTools,
+    InputTokens,OutputTokens,CostUSD,FirstWrite(s),LogBytes
+
+Tool calls are counted by kind (KINDS: file writes, reads and searches,
+shell commands, anything else).  FirstWrite(s) is the time from the start
+of generation to the agent's first file write, read off the time marks
+logcap.py keeps in the log index; LogBytes is how much output the agent
+produced.  Fields a log format does not carry are left empty:
+
+  claude   `--output-format stream-json` events (coding-agent-eval.sh
+           --transcripts): assistant messages and their tool_use blocks,
+           and the closing result event with num_turns, usage and
+           total_cost_usd
+  gemini   `--output-format stream-json` events, or the pretty-printed
+           object of `--output-format json` with its stats block
+
+Plain text output, Claude's without --transcripts and Copilot's, has
+nothing to count; only LogBytes is filled in.
+
+A log is read line by line as it is decompressed, so memory is bounded by
+LINE_MAX however long the log; longer lines are skipped.  Tool results,
+the bulk of a Claude transcript, are recognized by their prefix and never
+decoded.  Logs are parsed on a process pool, one log per task.  Cells that
+finished (.cell-done) and are already in metrics.csv are not parsed again
+unless --force is given.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import logcap
+
+METRICS_NAME = "metrics.csv"
+DONE_MARKER = ".cell-done"   # written by coding-agent-eval.sh, see orchestrate.py
+LOG_SUFFIXES = ("_generation.log.gz", "_generation.log")
+FIELDS = ("turns", "tool_calls", "writes", "reads", "shell", "other_tools",
+          "input_tokens", "output_tokens", "cost_usd", "first_write_s", "log_bytes")
+HEADER = ["Task", "RunId", "Agent", "Turns", "ToolCalls", "Writes", "Reads", "Shell", "OtherTools",
+          "InputTokens", "OutputTokens", "CostUSD", "FirstWrite(s)", "LogBytes"]
+LINE_MAX = 16 << 20
+WORKSPACE_RE = re.compile(r"^(.+)-([A-Za-z0-9_]+)-run(\d+)$")
+
+# Tool names of the Claude and Gemini CLIs by kind; other names are classified by the
+# words in them (_kind)
+KINDS = {
+    "write": {"write", "edit", "multiedit", "notebookedit", "write_file", "replace"},
+    "read": {"read", "glob", "grep", "ls", "read_file", "read_many_files", "list_directory",
+             "search_file_content"},
+    "shell": {"bash", "run_shell_command", "shell", "run", "bashoutput", "killshell"},
+    "other": {"todowrite", "todoread", "task", "webfetch", "websearch", "web_fetch",
+              "google_web_search", "exitplanmode", "save_memory"},
+}
+KIND_WORDS = (("write", ("write", "edit", "create", "replace", "patch", "update")),
+              ("read", ("read", "view", "list", "glob", "grep", "search", "find")),
+              ("shell", ("bash", "shell", "run", "exec", "command")))
+
+
+@lru_cache(maxsize=None)
+def _kind(name):
+    name = name.lower()
+    for kind, names in KINDS.items():
+        if name in names:
+            return kind
+    if name.startswith("mcp__"):
+        return "other"
+    for kind, words in KIND_WORDS:
+        if any(w in name for w in words):
+            return kind
+    return "other"
+
+
+class Transcript:
+    """Metrics folded from one log, a line at a time."""
+
+    def __init__(self, agent, index=None):
+        self.agent = agent
+        self.index = index            # logcap index, for time marks
+        self.turns = None
+        self.counts = {"write": 0, "read": 0, "shell": 0, "other": 0}
+        self.seen_tools = False
+        self.input_tokens = self.output_tokens = None
+        self.cost_usd = None
+        self.first_write_s = None
+        self.log_bytes = 0
+        self.last_message = None      # id of the last assistant message
+        self.in_turn = False          # gemini: inside a run of assistant events
+        self.block = None             # gemini json: lines of the object
+
+    def tool(self, name, pos):
+        kind = _kind(name)
+        self.counts[kind] += 1
+        self.seen_tools = True
+        if kind == "write" and self.first_write_s is None and self.index and pos is not None:
+            self.first_write_s = logcap.elapsed(self.index, pos)
+
+    def tokens(self, inp, out):
+        self.input_tokens = (self.input_tokens or 0) + int(inp)
+        self.output_tokens = (self.output_tokens or 0) + int(out)
+
+    def line(self, line, pos):
+        """Fold one line of output, which starts at byte pos of the log."""
+        if self.block is not None or line.rstrip() == b"{":
+            self._json_block(line)
+        elif line.startswith(b"{"):
+            # Tool results echo whole files back; they carry nothing we count
+            if line.startswith((b'{"type":"user"', b'{"type":"tool_result"')):
+                return
+            try:
+                event = json.loads(line)
+            except ValueError:
+                return
+            if isinstance(event, dict):
+                self._event(event, pos)
+
+    def _event(self, ev, pos):
+        kind = ev.get("type")
+        if kind == "assistant":                     # claude stream-json
+            msg = ev.get("message") or {}
+            if msg.get("id") is None or msg["id"] != self.last_message:
+                self.last_message = msg.get("id")
+                self.turns = (self.turns or 0) + 1
+            for block in msg.get("content") or ():
+                if isinstance(block, dict) and block.get("type") == "tool_use":
+                    self.tool(block.get("name") or "", pos)
+        elif kind == "tool_use":                    # gemini stream-json
+            self.in_turn = False
+            self.tool(ev.get("tool_name") or ev.get("name") or "", pos)
+        elif kind == "message":
+            assistant = ev.get("role") == "assistant"
+            if assistant and not self.in_turn:
+                self.turns = (self.turns or 0) + 1
+            self.in_turn = assistant
+        elif kind == "result":
+            if isinstance(ev.get("num_turns"), int):
+                self.turns = ev["num_turns"]
+            usage = ev.get("usage")
+            if isinstance(usage, dict):             # claude
+                self.input_tokens = self.output_tokens = None
+                self.tokens(sum(usage.get(k) or 0 for k in ("input_tokens", "cache_creation_input_tokens",
+                                                              "cache_read_input_tokens")),
+                            usage.get("output_tokens") or 0)
+            stats = ev.get("stats")
+            if isinstance(stats, dict) and "input_tokens" in stats:   # gemini
+                self.input_tokens = self.output_tokens = None
+                self.tokens(stats.get("input_tokens") or 0, stats.get("output_tokens") or 0)
+            if isinstance(ev.get("total_cost_usd"), (int, float)):
+                self.cost_usd = ev["total_cost_usd"]
+
+    def _json_block(self, line):
+        """gemini --output-format json: one pretty-printed object."""
+        if self.block is None:
+            self.block, self.block_len = [], 0
+        self.block.append(line)
+        self.block_len += len(line)
+        if self.block_len > LINE_MAX:
+            self.block = None
+            return
+        if line.rstrip() != b"}":
+            return
+        try:
+            obj = json.loads(b"".join(self.block))
+        except ValueError:
+            obj = None
+        self.block = None
+        stats = obj.get("stats") if isinstance(obj, dict) else None
+        if not isinstance(stats, dict):
+            return
+        for model in (stats.get("models") or {}).values():
+            tok = model.get("tokens") or {}
+            self.tokens(tok.get("prompt") or 0, (tok.get("candidates") or 0) + (tok.get("thoughts") or 0))
+            api = model.get("api") or {}
+            if isinstance(api.get("totalRequests"), int):
+                self.turns = (self.turns or 0) + api["totalRequests"]
+        by_name = (stats.get("tools") or {}).get("byName") or {}
+        if by_name and not self.seen_tools:
+            for name, tool in by_name.items():
+                for _ in range(tool.get("count") or 0):
+                    self.tool(name, None)
+
+    def metrics(self):
+        tools = sum(self.counts.values()) if self.seen_tools else None
+        if tools is None and self.turns is None and self.input_tokens is None:
+            writes = reads = shell = other = None   # nothing structured in the log
+        else:
+            writes, reads, shell, other = (self.counts[k] for k in ("write", "read", "shell", "other"))
+            tools = tools or 0
+        return dict(zip(FIELDS, (self.turns, tools, writes, reads, shell, other, self.input_tokens,
+                                 self.output_tokens, self.cost_usd, self.first_write_s, self.log_bytes)))
+
+
+def _open(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def parse(path, agent=None):
+    """Metrics of the log at path, a dict keyed by FIELDS."""
+    agent = agent or os.path.basename(path).split("_", 1)[0]
+    index = None
+    if path.endswith(".gz"):
+        try:
+            index = logcap.load_index(path)
+        except (OSError, ValueError):
+            pass
+    t = Transcript(agent, index)
+    pos = 0
+    with _open(path) as f:
+        while True:
+            line = f.readline(LINE_MAX)
+            if not line:
+                break
+            n = len(line)
+            if not line.endswith(b"\n") and n == LINE_MAX:
+                while True:         # skip the rest of an oversized line
+                    rest = f.readline(LINE_MAX)
+                    n += len(rest)
+                    if not rest or rest.endswith(b"\n"):
+                        break
+            else:
+                t.line(line, pos)
+            pos += n
+    t.log_bytes = index["seen"] if index else pos
+    return t.metrics()
+
+
+def cell_log(results_dir, task, run_id, agent):
+    """Path of the generation log of a cell of results_dir, or None."""
+    ws = os.path.join(results_dir, f"{task}-{agent}-run{run_id}")
+    for suffix in LOG_SUFFIXES:
+        log = os.path.join(ws, agent + suffix)
+        if os.path.isfile(log):
+            return log
+    return None
+
+
+def cell_logs(results_dir):
+    """Yield ((task, run_id, agent), log path, finished) for each workspace
+    of results_dir that has a generation log."""
+    with os.scandir(results_dir) as it:
+        workspaces = sorted(e.path for e in it if e.is_dir(follow_symlinks=False))
+    for ws in workspaces:
+        m = WORKSPACE_RE.match(os.path.basename(ws))
+        if not m:
+            continue
+        task, agent, run_id = m.groups()
+        for suffix in LOG_SUFFIXES:
+            log = os.path.join(ws, agent + suffix)
+            if os.path.isfile(log):
+                yield (task, int(run_id), agent), log, os.path.exists(os.path.join(ws, DONE_MARKER))
+                break
+
+
+def _fmt(v):
+    if v is None:
+        return ""
+    return f"{v:.4f}".rstrip("0").rstrip(".") if isinstance(v, float) else str(v)
+
+
+def read_metrics(path):
+    """{(task, run_id, agent): {field: value or None}} from a metrics.csv."""
+    out = {}
+    try:
+        f = open(path, newline="")
+    except FileNotFoundError:
+        return out
+    with f:
+        for row in csv.DictReader(f):
+            try:
+                cell = (row["Task"], int(row["RunId"]), row["Agent"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            values = {}
+            for field, col in zip(FIELDS, HEADER[3:]):
+                v = (row.get(col) or "").strip()
+                try:
+                    values[field] = None if not v else float(v) if "." in v else int(v)
+                except ValueError:
+                    values[field] = None
+            out[cell] = values
+    return out
+
+
+def write_metrics(path, metrics):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        for cell in sorted(metrics):
+            w.writerow([*cell, *(_fmt(metrics[cell].get(k)) for k in FIELDS)])
+    os.replace(tmp, path)
+
+
+def _parse_job(item):
+    return parse(*item)
+
+
+def scan(results_dirs, jobs=None, force=False):
+    """Update metrics.csv in each of results_dirs.  Returns (logs parsed,
+    cells kept from the previous scan)."""
+    plans, todo = [], []
+    for d in results_dirs:
+        path = os.path.join(d, METRICS_NAME)
+        old = {} if force else read_metrics(path)
+        keep, parse_cells = {}, []
+        for cell, log, finished in cell_logs(d):
+            if finished and cell in old:
+                keep[cell] = old[cell]
+            else:
+                parse_cells.append(cell)
+                todo.append((log, cell[2]))
+        plans.append((path, keep, parse_cells))
+    if len(todo) > 1 and jobs != 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            parsed = list(pool.map(_parse_job, todo, chunksize=4))
+    else:
+        parsed = [_parse_job(item) for item in todo]
+    it = iter(parsed)
+    kept = 0
+    for path, keep, parse_cells in plans:
+        kept += len(keep)
+        keep.update((cell, next(it)) for cell in parse_cells)
+        if keep:
+            write_metrics(path, keep)
+    return len(todo), kept
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Turns, tool calls and token usage from agent logs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pa = sub.add_parser("parse", help="print the metrics of each LOG as JSON")
+    pa.add_argument("logs", nargs="+")
+    sc = sub.add_parser("scan", help=f"write {METRICS_NAME} for each RESULTS_DIR")
+    sc.add_argument("--jobs", type=int, default=None, help="parser processes (default: CPU count)")
+    sc.add_argument("--force", action="store_true", help="parse every log again")
+    sc.add_argument("dirs", nargs="+")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "parse":
+        for log in args.logs:
+            print(json.dumps({"log": log, **parse(log)}))
+    elif args.cmd == "scan":
+        t0 = time.monotonic()
+        parsed, kept = scan(args.dirs, args.jobs, args.force)
+        print(f"Parsed {parsed} agent logs ({kept} cells unchanged) in {time.monotonic() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
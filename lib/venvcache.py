@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of Python virtualenvs for acceptance runs.
+
+    venvcache.py populate [--cache DIR] REQUIREMENTS
+    venvcache.py clone [--cache DIR] REQUIREMENTS DEST
+    venvcache.py key REQUIREMENTS
+
+Every Python acceptance run used to create a venv and pip install its
+requirements.txt from scratch, so the same pygame and pytest wheels were
+installed dozens of times a night.  `clone` gives DEST a venv with the
+requirements installed, built at most once per cache key:
+
+    key = sha256(normalized requirements, interpreter version and path, platform)
+
+Normalizing drops comments, blank lines and ordering and canonicalizes
+project names, so cosmetic differences between agents' requirements.txt
+share one entry.  A file that installs local paths, editables or other
+requirement files (-e, -r, -c, ./, file:) cannot be keyed by its text and
+is installed into DEST directly, as before.
+
+The base env lives at CACHE/KEY and is complete once CACHE/KEY/.complete
+exists.  It is built in place (venv scripts embed their own path), under
+an exclusive flock on CACHE/KEY.lock, so concurrent runs that miss on the
+same key build it once and the rest wait in the kernel for it.  A failed
+install leaves nothing behind.  A complete entry is never modified.
+
+`populate` only builds the base env, so the harness can time the install
+(a pip install on a miss, nothing on a hit) apart from the clone into the
+project.  DEST is a hardlink copy of the base env, so it takes one link per
+file and no network.  Files that name the base env's path (pyvenv.cfg, activate
+scripts and console-script shebangs under bin/) are rewritten for DEST
+instead.  pip and Python replace files rather than writing into them, so
+installing more packages into DEST or compiling bytecode there leaves the
+cache untouched.  Where hardlinks are not possible (the cache on another
+filesystem) files are copied.
+
+The cache defaults to $XDG_CACHE_HOME/coding-agent-eval/venvs; VENV_CACHE_DIR
+overrides it.  Delete the directory to drop every entry.
+"""
+import argparse
+import errno
+import fcntl
+import hashlib
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+COMPLETE = ".complete"
+UNCACHEABLE = re.compile(r"^(-e|--editable|-r|--requirement|-c|--constraint)\b|^[./~]|file:|^git\+")
+_NAME = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("VENV_CACHE_DIR") or os.path.join(base, "coding-agent-eval", "venvs")
+
+
+def normalize(text):
+    """Sorted requirement lines with comments, whitespace and name spelling
+    normalized, or None when the file cannot be keyed by its text."""
+    lines = set()
+    for raw in text.splitlines():
+        line = re.sub(r"(^|\s)#.*$", "", raw).strip()
+        if not line:
+            continue
+        if UNCACHEABLE.search(line):
+            return None
+        m = _NAME.match(line)
+        if m:
+            name, rest = m.groups()
+            line = re.sub(r"[-_.]+", "-", name).lower() + re.sub(r"\s+", "", rest)
+        lines.add(line)
+    return sorted(lines)
+
+
+def cache_key(requirements_path, python=sys.executable):
+    """The cache key for requirements installed with this interpreter, or
+    None when the requirements cannot be cached."""
+    with open(requirements_path, encoding="utf-8", errors="replace") as f:
+        reqs = normalize(f.read())
+    if reqs is None:
+        return None
+    h = hashlib.sha256()
+    for part in (sys.version, sys.implementation.cache_tag, os.path.realpath(python),
+                 sys.platform, platform.machine(), *reqs):
+        h.update(part.encode() + b"\0")
+    return h.hexdigest()[:32]
+
+
+def build(env, requirements_path, python=sys.executable):
+    """Create a venv at env and pip install requirements into it."""
+    subprocess.run([python, "-m", "venv", env], check=True)
+    subprocess.run([os.path.join(env, "bin", "python"), "-m", "pip", "install",
+                    "--disable-pip-version-check", "-r", requirements_path], check=True)
+
+
+def populate(cache, key, fill, log=None):
+    """Path of the complete entry CACHE/KEY, calling fill(path) under the
+    entry's lock to build it if needed.  Also used by nodecache.py."""
+    env = os.path.join(cache, key)
+    if os.path.exists(os.path.join(env, COMPLETE)):
+        return env
+    os.makedirs(cache, exist_ok=True)
+    with open(env + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(os.path.join(env, COMPLETE)):
+            return env
+        if log:
+            log(f"cache miss, building {env}")
+        shutil.rmtree(env, ignore_errors=True)  # left by an interrupted build
+        try:
+            fill(env)
+        except BaseException:
+            shutil.rmtree(env, ignore_errors=True)
+            raise
+        with open(os.path.join(env, COMPLETE), "w") as f:
+            f.write(f"{time.time():.0f}\n")
+    return env
+
+
+def _rewrites(rel):
+    return rel == "pyvenv.cfg" or rel.startswith("bin" + os.sep)
+
+
+def clone(env, dest, rewrite=_rewrites):
+    """Hardlink copy of the tree at env into dest.  Files for which
+    rewrite(relative path) is true get env's path replaced by dest's if
+    they contain it.  Returns the number of files."""
+    src_b, dest_b = os.fsencode(os.path.abspath(env)), os.fsencode(os.path.abspath(dest))
+    link, files = True, 0
+    for root, dirs, names in os.walk(env):
+        rel_root = os.path.relpath(root, env)
+        out_root = os.path.normpath(os.path.join(dest, rel_root))
+        os.makedirs(out_root, exist_ok=True)
+        for name in dirs + names:
+            src = os.path.join(root, name)
+            if not os.path.islink(src):
+                continue
+            target = os.readlink(src)
+            if os.path.isabs(target) and target.startswith(os.path.abspath(env) + os.sep):
+                target = os.path.join(os.path.abspath(dest), os.path.relpath(target, env))
+            os.symlink(target, os.path.join(out_root, name))
+        dirs[:] = [d for d in dirs if not os.path.islink(os.path.join(root, d))]
+        for name in names:
+            src, out = os.path.join(root, name), os.path.join(out_root, name)
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            if os.path.islink(src) or rel == COMPLETE:
+                continue
+            files += 1
+            if rewrite and rewrite(rel):
+                with open(src, "rb") as f:
+                    data = f.read()
+                if src_b in data:
+                    with open(out, "wb") as f:
+                        f.write(data.replace(src_b, dest_b))
+                    shutil.copymode(src, out)
+                    continue
+            if link:
+                try:
+                    os.link(src, out)
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+                    link = False
+            shutil.copy2(src, out)
+    return files
+
+
+def prepare(requirements_path, cache=None, log=None):
+    """Build the cache entry for requirements if it is missing.  Returns
+    (entry path, "hit" or "miss"), or (None, "uncached")."""
+    cache = cache or default_cache_dir()
+    key = cache_key(requirements_path)
+    if key is None:
+        return None, "uncached"
+    hit = os.path.exists(os.path.join(cache, key, COMPLETE))
+    env = populate(cache, key, lambda path: build(path, requirements_path), log)
+    if log:
+        log(f"venv cache {'hit' if hit else 'miss'} {key[:12]}: {env}")
+    return env, "hit" if hit else "miss"
+
+
+def provision(requirements_path, dest, cache=None, log=None):
+    """Give dest a venv with requirements installed.  Returns "hit", "miss"
+    or "uncached"."""
+    if os.path.lexists(dest):
+        if not os.path.exists(os.path.join(dest, "pyvenv.cfg")):
+            raise SystemExit(f"{dest} exists and is not a venv")
+        shutil.rmtree(dest)
+    env, outcome = prepare(requirements_path, cache, log)
+    if env is None:
+        if log:
+            log("requirements name local paths or other files; installing without the cache")
+        build(dest, requirements_path)
+        return outcome
+    files = clone(env, dest)
+    if log:
+        log(f"{files} files linked into {dest}")
+    return outcome
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Content-addressed venv cache")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    po = sub.add_parser("populate", help="build the cache entry for REQUIREMENTS if it is missing; "
+                        "exits 2 when they cannot be cached")
+    cl = sub.add_parser("clone", help="give DEST a venv with REQUIREMENTS installed")
+    for p in (po, cl):
+        p.add_argument("--cache", help="cache directory (default: $VENV_CACHE_DIR or "
+                       "~/.cache/coding-agent-eval/venvs)")
+        p.add_argument("requirements")
+    cl.add_argument("dest")
+    ky = sub.add_parser("key", help="print the cache key for REQUIREMENTS")
+    ky.add_argument("requirements")
+    args = ap.parse_args(argv)
+    log = lambda m: print(m, flush=True)
+
+    if args.cmd == "key":
+        print(cache_key(args.requirements) or "uncacheable")
+    elif args.cmd == "populate":
+        if prepare(args.requirements, args.cache, log)[0] is None:
+            log("requirements name local paths or other files; they cannot be cached")
+            return 2
+    else:
+        provision(args.requirements, args.dest, args.cache, log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
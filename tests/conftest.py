@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The lib/ modules import each other as top-level modules, as when the
+# harness runs them as scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib"))
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import acceptcache
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("print('hi')\n")
+    (root / "accept.sh").write_text("#!/bin/sh\npytest -q\n")
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(acceptcache, "toolchain", lambda: ["python3 Python 3.x", "linux"])
+    return str(tmp_path / "cache")
+
+
+def digest(root):
+    return acceptcache.tree_hash(str(root), jobs=2)[0]
+
+
+def test_tree_hash_ignores_acceptance_by_products(project):
+    before = digest(project)
+    (project / "venv" / "bin").mkdir(parents=True)
+    (project / "venv" / "bin" / "python").write_text("#!/bin/sh\n")
+    (project / "node_modules" / "left-pad").mkdir(parents=True)
+    (project / "node_modules" / "left-pad" / "index.js").write_text("module.exports = 1\n")
+    (project / "src" / "__pycache__").mkdir()
+    (project / "src" / "__pycache__" / "app.cpython-312.pyc").write_bytes(b"\0")
+    (project / "accept.log").write_text("ok\n")
+    (project / "tests.log.gz").write_bytes(b"\x1f\x8b")
+    (project / "highscore.json").write_text('{"score": 3}\n')
+    assert digest(project) == before
+
+
+def test_tree_hash_follows_content_names_and_layout(project):
+    before = digest(project)
+    (project / "src" / "app.py").write_text("print('bye')\n")
+    edited = digest(project)
+    assert edited != before
+    (project / "src" / "app.py").write_text("print('hi')\n")
+    assert digest(project) == before
+    (project / "src" / "app.py").rename(project / "app.py")
+    assert digest(project) != before
+    (project / "app.py").rename(project / "src" / "app.py")
+    os.symlink("app.py", project / "src" / "main.py")
+    assert digest(project) != before
+
+
+def test_a_key_change_invalidates_the_outcome(project, cache):
+    key = acceptcache.cache_key(str(project), "run_acceptance () { ... }")
+    assert acceptcache.store(key, 0, {"tests": ("4.2", 0)}, cache=cache)
+    assert acceptcache.lookup(key, cache=cache, max_age=60)["exit"] == 0
+
+    # Ignored files keep the key, so the outcome is still found
+    (project / "venv").mkdir()
+    (project / "highscore.json").write_text("{}\n")
+    assert acceptcache.cache_key(str(project), "run_acceptance () { ... }") == key
+
+    edited_recipe = acceptcache.cache_key(str(project), "run_acceptance () { changed; }")
+    (project / "src" / "app.py").write_text("print('bye')\n")
+    edited_project = acceptcache.cache_key(str(project), "run_acceptance () { ... }")
+    assert len({key, edited_recipe, edited_project}) == 3
+    assert acceptcache.lookup(edited_recipe, cache=cache, max_age=60) is None
+    assert acceptcache.lookup(edited_project, cache=cache, max_age=60) is None
+
+
+def test_toolchain_is_part_of_the_key(project, cache, monkeypatch):
+    key = acceptcache.cache_key(str(project), "recipe")
+    monkeypatch.setattr(acceptcache, "toolchain", lambda: ["python3 Python 3.y", "linux"])
+    assert acceptcache.cache_key(str(project), "recipe") != key
+
+
+def test_only_passing_outcomes_are_stored(cache):
+    assert not acceptcache.store("a" * 32, 1, {"tests": ("1.0", 1)}, cache=cache)
+    assert not acceptcache.store("b" * 32, 0, {"install": ("1.0", 0), "tests": ("1.0", 2)}, cache=cache)
+    assert acceptcache.lookup("a" * 32, cache=cache) is None
+    assert acceptcache.lookup("b" * 32, cache=cache) is None
+
+
+def test_expired_outcomes_are_dropped(cache):
+    acceptcache.store("c" * 32, 0, {}, cache=cache)
+    path = os.path.join(cache, "c" * 32 + ".json")
+    assert acceptcache.lookup("c" * 32, cache=cache, max_age=60) is not None
+    assert acceptcache.lookup("c" * 32, cache=cache, max_age=-1) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,77 @@
+import fcntl
+import os
+import time
+
+import pytest
+
+import admission
+from admission import Cost, Limits
+
+
+@pytest.fixture
+def state(tmp_path):
+    return str(tmp_path / "ledger.json")
+
+
+def locked(state):
+    """Whether another open file holds the ledger lock."""
+    with open(state + ".lock", "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+
+def test_load_is_sampled_outside_the_lock(state, monkeypatch):
+    seen = []
+
+    def runnable():
+        seen.append(locked(state))
+        return 0.0
+    monkeypatch.setattr(admission, "runnable", runnable)
+    admission.acquire(state, os.getpid(), "tests", Limits(4, 0, 0))
+    assert seen == [False]
+
+
+def test_settling_reservations_count_in_full():
+    limits = Limits(2, 0, 0)
+    now = time.time()
+    fresh = {"1": dict(Cost(1.0, 0, 0)._asdict(), phase="tests", t=now)}
+    old = {"1": dict(Cost(1.0, 0, 0)._asdict(), phase="tests", t=now - admission.SETTLE - 1)}
+    sample = (0.5, None, 10_000.0)
+    assert not admission.admissible(fresh, Cost(1.0, 0, 0), limits, sample, now)[0]
+    assert admission.admissible(old, Cost(1.0, 0, 0), limits, sample, now)[0]
+
+
+def test_reservation_made_after_sampling_is_rechecked(state, monkeypatch):
+    """A cell that reserves between another's sampling and its lock must
+    still be counted by the re-check under the lock."""
+    limits = Limits(1.5, 0, 0)
+    other = os.getppid()
+    calls = []
+
+    def runnable():
+        calls.append(1)
+        if len(calls) == 1:
+            admission.acquire(state, other, "tests", limits)
+        return 0.0
+    monkeypatch.setattr(admission, "runnable", runnable)
+    monkeypatch.setattr(admission, "POLL_MAX", admission.POLL_MIN)
+    monkeypatch.setattr(admission, "SETTLE", 0.3)
+    admission.acquire(state, os.getpid(), "tests", limits)
+    # The first attempt saw the other reservation and had to wait for it
+    # to settle
+    assert len(calls) > 3
+    admission.release(state, other)
+
+
+def test_release_drops_the_reservation(state, monkeypatch):
+    monkeypatch.setattr(admission, "runnable", lambda: 0.0)
+    admission.acquire(state, os.getpid(), "install", Limits(4, 0, 0))
+    with admission.Ledger(state) as ledger:
+        assert ledger.reservations[str(os.getpid())]["phase"] == "install"
+    admission.release(state, os.getpid())
+    with admission.Ledger(state) as ledger:
+        assert ledger.reservations == {}
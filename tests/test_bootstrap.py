@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import bootstrap  # noqa: E402
+
+
+def coverage(n, trials, p=0.6, median=10.0, resamples=2000):
+    """Share of trials whose rate and median intervals contain the true
+    values, for Bernoulli(p) outcomes and exponential minutes."""
+    rng = np.random.default_rng(2024)
+    samples = {i: ((rng.random(n) < p).astype(float),
+                   rng.exponential(median / np.log(2), n)) for i in range(trials)}
+    cis = bootstrap.confidence_intervals(samples, resamples, jobs=1, seed=7)
+    rate = sum(c["rate"][0] <= p * 100 <= c["rate"][1] for c in cis.values()) / trials
+    mid = sum(c["median"][0] <= median <= c["median"][1] for c in cis.values()) / trials
+    return rate, mid
+
+
+@pytest.mark.parametrize("n", [30, bootstrap.RESAMPLE_MAX_N + 100])
+def test_intervals_cover_at_about_their_level(n):
+    # n=30 resamples the median, the larger group uses the closed form
+    rate, mid = coverage(n, 300)
+    assert 0.9 <= rate <= 0.99
+    assert 0.9 <= mid <= 0.99
+
+
+def samples(groups=6, n=12):
+    rng = np.random.default_rng(1)
+    return {("todo", f"agent{i}"): ((rng.random(n) < 0.5).astype(float), rng.random(n) * 20)
+            for i in range(groups)}
+
+
+def test_serial_and_pool_give_the_same_intervals(monkeypatch):
+    serial = bootstrap.confidence_intervals(samples(), 500, jobs=1)
+    monkeypatch.setattr(bootstrap, "POOL_MIN_CELLS", 0)
+    pooled = bootstrap.confidence_intervals(samples(), 500, jobs=2)
+    assert pooled == serial
+
+
+def test_intervals_are_reproducible_and_seeded():
+    a = bootstrap.confidence_intervals(samples(), 500, jobs=1)
+    assert bootstrap.confidence_intervals(samples(), 500, jobs=1) == a
+    assert bootstrap.confidence_intervals(samples(), 500, jobs=1, seed=1) != a
+    # A group's interval does not depend on the other groups
+    alone = dict(list(samples().items())[2:3])
+    assert bootstrap.confidence_intervals(alone, 500, jobs=1) == {k: a[k] for k in alone}
+
+
+def test_a_typical_night_uses_the_pool():
+    # 5 agents x 10 tasks x 3 runs at the default 10000 resamples
+    assert 10000 * (5 * 10 * 3 + 5 * 30) >= bootstrap.POOL_MIN_CELLS
+
+
+def test_empty_groups_have_no_interval():
+    ci = bootstrap.confidence_intervals({"x": (np.array([]), np.array([]))}, 100, jobs=1)
+    assert ci == {"x": {"rate": None, "median": None}}
@@ -0,0 +1,44 @@
+import os
+
+import build_report
+import logcap
+
+
+def make_results(tmp_path, rows, logs):
+    with open(tmp_path / "results.csv", "w") as f:
+        f.write("Task,RunId,Agent,Success(Y/N),Time(min)\n")
+        for row in rows:
+            f.write(",".join(map(str, row)) + "\n")
+    for ws, data in logs.items():
+        os.makedirs(tmp_path / ws)
+        writer = logcap.LogWriter(str(tmp_path / ws / (ws.split("-")[1] + "_generation.log.gz")))
+        writer.write(data)
+        writer.close()
+    return str(tmp_path)
+
+
+def test_failed_runs_show_their_log_tails(tmp_path):
+    long_log = b"".join(b"line %d\n" % i for i in range(20_000)) + b"Traceback: <boom>\n"
+    d = make_results(tmp_path, [("neon", 1, "claude", "N", 3.0), ("neon", 1, "gemini", "Y", 2.0),
+                                ("neon", 2, "claude", "N", 4.0)],
+                     {"neon-claude-run1": long_log, "neon-gemini-run1": b"passed\n"})
+    html = build_report.failed_logs_fragment(d)
+    # The passing run is not shown; the failed run without a log is skipped
+    assert "Failed Runs <span class=\"muted\">(1)</span>" in html
+    assert "neon-claude-run1/claude_generation.log.gz" in html
+    assert "Traceback: &lt;boom&gt;" in html
+    assert "line 0\n" not in html
+    shown = html.split('<pre class="mono log">')[1].split("</pre>")[0]
+    assert len(shown) <= build_report.LOG_TAIL + 64
+
+
+def test_report_includes_failed_logs(tmp_path):
+    d = make_results(tmp_path, [("neon", 1, "claude", "N", 3.0)], {"neon-claude-run1": b"it broke\n"})
+    path = build_report.build(d, resamples=0, memo=False)
+    with open(path) as f:
+        assert "it broke" in f.read()
+
+
+def test_no_failures_no_card(tmp_path):
+    d = make_results(tmp_path, [("neon", 1, "claude", "Y", 3.0)], {"neon-claude-run1": b"ok\n"})
+    assert build_report.failed_logs_fragment(d) == ""
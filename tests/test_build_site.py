@@ -0,0 +1,26 @@
+import os
+
+import build_site
+import logcap
+
+
+def test_run_page_shows_the_generation_log_tail(tmp_path):
+    run = tmp_path / "results" / "2025-10-16" / "neon-claude-run1"
+    os.makedirs(run / "neon")
+    (run / "prompt.txt").write_text("Build neon\n")
+    (run / "neon" / "game.py").write_text("print('neon')\n")
+    with open(tmp_path / "results" / "2025-10-16" / "results.csv", "w") as f:
+        f.write("Task,RunId,Agent,Success(Y/N),Time(min)\nneon,1,claude,N,3.5\n")
+    data = b"".join(b"step %d\n" % i for i in range(20_000)) + b"Error: <no display>\n"
+    writer = logcap.LogWriter(str(run / "claude_generation.log.gz"))
+    writer.write(data)
+    writer.close()
+
+    build_site.build(str(tmp_path), jobs=1, prompts_dir=str(tmp_path))
+    html = (run / build_site.RUN_PAGE).read_text()
+    assert "Error: &lt;no display&gt;" in html
+    assert "step 0\n" not in html
+    assert f"The last {build_site.LOG_TAIL} of {len(data)} bytes of output" in html
+    assert 'href="claude_generation.log.gz"' in html
+    assert "claude_generation.log.gz.idx" not in html
+    assert "print(&#x27;neon&#x27;)" in html or "print('neon')" in html
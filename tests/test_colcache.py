@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+import build_report
+import colcache
+import results
+from results import HEADER_V2, PHASES
+
+ROWS = [
+    "neon,1,claude,Y,1.5," + ",".join(["2.0", "0"] * len(PHASES)),
+    "neon,1,gemini,N,n/a," + ",".join(["1.25", "0", "", ""] + ["3.5", "1"] * (len(PHASES) - 2)),
+    "todo,2,claude,SKIP,0.25," + ",".join([""] * 2 * len(PHASES)),
+]
+
+
+def write(path, rows):
+    path.write_text(",".join(HEADER_V2) + "\n" + "".join(r + "\n" for r in rows))
+    return str(path)
+
+
+def loaded(csv_path, **kw):
+    cols = colcache.load(csv_path, **kw)
+    if cols is None:
+        return None
+    try:
+        return list(cols.runs())
+    finally:
+        cols.close()
+
+
+def test_round_trip(tmp_path):
+    csv_path = write(tmp_path / "results.csv", ROWS)
+    runs = list(results.iter_runs(csv_path))
+    assert loaded(csv_path) == runs   # all values are exact in float32
+    assert os.path.exists(colcache.sidecar_path(csv_path))
+    # A second load maps the sidecar without rebuilding it
+    assert loaded(csv_path, rebuild=False) == runs
+
+
+def test_v1_results_have_no_phase_columns(tmp_path):
+    csv_path = tmp_path / "results.csv"
+    csv_path.write_text("Task,RunId,Agent,Success(Y/N),Time(min)\nneon,1,claude,Y,2.30\n")
+    cols = colcache.load(str(csv_path))
+    try:
+        assert cols.phases == () and cols.phase_s is None
+        assert [r.phases for r in cols.runs()] == [None]
+    finally:
+        cols.close()
+
+
+def test_appending_makes_the_sidecar_stale(tmp_path):
+    csv_path = write(tmp_path / "results.csv", ROWS[:2])
+    assert len(loaded(csv_path)) == 2
+    with open(csv_path, "a") as f:
+        f.write(ROWS[2] + "\n")
+    assert loaded(csv_path, rebuild=False) is None
+    assert loaded(csv_path) == list(results.iter_runs(csv_path))
+
+
+def test_rewriting_with_the_same_size_makes_the_sidecar_stale(tmp_path):
+    csv_path = write(tmp_path / "results.csv", ROWS)
+    loaded(csv_path)
+    st = os.stat(csv_path)
+    write(tmp_path / "results.csv", [r.replace("claude", "codex1") for r in ROWS])
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert os.stat(csv_path).st_size == st.st_size
+    assert {r.agent for r in loaded(csv_path)} == {"codex1", "gemini"}
+
+
+@pytest.mark.parametrize("damage", ["garbage", "truncated", "bad dict", "empty"])
+def test_corrupt_sidecar_is_rebuilt(tmp_path, damage):
+    csv_path = write(tmp_path / "results.csv", ROWS)
+    runs = loaded(csv_path)
+    path = colcache.sidecar_path(csv_path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if damage == "garbage":
+        data = os.urandom(len(data))
+    elif damage == "truncated":
+        data = data[:-8]
+    elif damage == "bad dict":
+        start = colcache.HEADER.size
+        data = data[:start] + b"{" * 8 + data[start + 8:]
+    else:
+        data = b""
+    with open(path, "wb") as f:
+        f.write(data)
+    assert loaded(csv_path, rebuild=False) is None
+    assert loaded(csv_path) == runs
+
+
+def test_too_many_agents_fall_back_to_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(colcache, "CODE_MAX", 1)
+    csv_path = write(tmp_path / "results.csv", ROWS + [ROWS[0].replace("claude", "codex")])
+    assert colcache.load(csv_path) is None
+    assert not os.path.exists(colcache.sidecar_path(csv_path))
+    # The report is still built, from the CSV
+    with open(build_report.build(str(tmp_path), resamples=0, memo=False)) as f:
+        html = f.read()
+    assert "codex" in html and "gemini" in html
+
+
+def test_codes_beyond_uint16_are_not_wrapped(tmp_path):
+    rows = [f"t{i},1,claude,Y,1.0," + ",".join([""] * 2 * len(PHASES))
+            for i in range(colcache.CODE_MAX + 2)]
+    csv_path = write(tmp_path / "results.csv", rows)
+    assert colcache.load(csv_path) is None
@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import difftest  # noqa: E402
+
+
+def fisher_reference(a, n1, c, n2):
+    """Two-sided Fisher p-value summed term by term with math.comb."""
+    k, n = a + c, n1 + n2
+
+    def prob(x):
+        return math.comb(n1, x) * math.comb(n2, k - x) / math.comb(n, k)
+    obs = prob(a)
+    return min(1.0, sum(prob(x) for x in range(max(0, k - n2), min(n1, k) + 1)
+                        if prob(x) <= obs * (1 + 1e-7)))
+
+
+@pytest.mark.parametrize("table, expected", [
+    ((3, 4, 1, 4), 0.4857142857142857),     # Fisher's tea tasting
+    ((8, 10, 1, 6), 0.03496503496503497),   # scipy.stats.fisher_exact([[8, 2], [1, 5]])
+    ((1, 10, 11, 14), 0.002759456185220083),  # scipy.stats.fisher_exact([[1, 9], [11, 3]])
+    ((5, 10, 5, 10), 1.0),
+])
+def test_fisher_exact_known_values(table, expected):
+    assert difftest.fisher_exact(*[[v] for v in table])[0] == pytest.approx(expected, rel=1e-9)
+
+
+def test_fisher_exact_matches_term_by_term_sum():
+    rng = np.random.default_rng(3)
+    n1, n2 = rng.integers(1, 40, 200), rng.integers(1, 40, 200)
+    a, c = rng.integers(0, n1 + 1), rng.integers(0, n2 + 1)
+    got = difftest.fisher_exact(a, n1, c, n2)
+    want = [fisher_reference(*map(int, t)) for t in zip(a, n1, c, n2)]
+    assert got == pytest.approx(want, rel=1e-9)
+
+
+def test_fisher_exact_empty_side_is_nan():
+    p = difftest.fisher_exact([0, 2], [0, 3], [1, 1], [2, 2])
+    assert math.isnan(p[0]) and not math.isnan(p[1])
+
+
+def pairs():
+    rng = np.random.default_rng(11)
+    return {("todo", "claude"): (rng.normal(10, 2, 12), rng.normal(13, 2, 12)),
+            ("todo", "gemini"): (rng.normal(10, 2, 9), rng.normal(10, 2, 11)),
+            ("neon", "claude"): (rng.normal(5, 1, 7), rng.normal(5.5, 1, 6))}
+
+
+def test_permutation_p_values_are_reproducible_under_a_seed():
+    a = difftest.median_tests(pairs(), 2000, jobs=1, seed=5)
+    assert difftest.median_tests(pairs(), 2000, jobs=1, seed=5) == a
+    assert difftest.median_tests(pairs(), 2000, jobs=1, seed=6) != a
+    # Seeds derive from the key, so order does not matter
+    assert difftest.median_tests(dict(reversed(list(pairs().items()))), 2000, jobs=1, seed=5) == a
+
+
+def test_permutation_p_values_same_in_a_pool(monkeypatch):
+    serial = difftest.median_tests(pairs(), 2000, jobs=1)
+    monkeypatch.setattr(difftest, "POOL_MIN_CELLS", 0)
+    assert difftest.median_tests(pairs(), 2000, jobs=2) == serial
+
+
+def test_permutation_separates_shifted_medians():
+    x = pairs()[("todo", "gemini")][0]
+    p = difftest.median_tests({**pairs(), "same": (x, x[::-1].copy())}, 5000, jobs=1)
+    assert p[("todo", "claude")] < 0.01
+    assert p["same"] == 1.0   # stops after STOP_HITS permutations
+    assert difftest.median_tests({"x": (np.array([]), np.array([1.0]))}, 100, jobs=1) == {"x": None}
+
+
+def test_bh_qvalues_textbook_example():
+    # Benjamini & Hochberg (1995), section 4; expected values as R's
+    # p.adjust(p, "BH")
+    p = [0.0001, 0.0004, 0.0019, 0.0095, 0.0201, 0.0278, 0.0298, 0.0344,
+         0.0459, 0.3240, 0.4262, 0.5719, 0.6528, 0.7590, 1.0000]
+    q = [0.0015, 0.003, 0.0095, 0.035625, 0.0603, 0.06385714, 0.06385714, 0.0645,
+         0.0765, 0.486, 0.5811818, 0.714875, 0.7532308, 0.8132143, 1.0]
+    assert difftest.bh_qvalues(p) == pytest.approx(q, abs=1e-7)
+    assert sum(v <= 0.05 for v in difftest.bh_qvalues(p)) == 4   # the paper rejects four
+    # Order does not matter, and missing p-values are skipped
+    shuffled = p[::-1] + [None, float("nan")]
+    assert difftest.bh_qvalues(shuffled)[:15] == pytest.approx(q[::-1], abs=1e-7)
+    assert difftest.bh_qvalues(shuffled)[15:] == [None, None]
@@ -0,0 +1,77 @@
+import csv
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import build_report  # noqa: E402
+import colcache  # noqa: E402
+import groupby  # noqa: E402
+import results  # noqa: E402
+
+QS = (0.1, 0.25, 0.5, 0.9, 0.99)
+
+
+def write_results(path, n_runs, seed=0):
+    """A v2 results.csv with ragged groups, skips, untimed runs and phases
+    that only some runs recorded.  Times are multiples of 1/64 so the
+    sidecar's float32 columns hold them exactly."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(results.HEADER_V2)
+        for run in range(1, n_runs + 1):
+            for task in ("neon", "todo", "chess"):
+                for agent in ("claude", "gemini", "codex"):
+                    if rng.random() < 0.1:
+                        continue
+                    status = rng.choice("YYN") if rng.random() > 0.05 else "SKIP"
+                    minutes = "n/a" if rng.random() < 0.05 else "%.6f" % (rng.randrange(64, 1280) / 64)
+                    phases = []
+                    for p in results.PHASES:
+                        if p == "venv" and task == "neon":
+                            phases += ["", ""]
+                        else:
+                            phases += ["%.6f" % (rng.randrange(1, 6400) / 64), rng.choice("0000001")]
+                    w.writerow([task, run, agent, status, minutes] + phases)
+    return str(path)
+
+
+def assert_same_summary(streamed, exact):
+    assert streamed.tasks == exact.tasks
+    assert streamed.agents == exact.agents
+    assert streamed.run_ids == exact.run_ids
+    for key in ("by_agent", "cells"):
+        a, b = getattr(streamed, key), getattr(exact, key)
+        assert a.keys() == b.keys()
+        for k in a:
+            assert (a[k].total, a[k].passed, a[k].skipped) == (b[k].total, b[k].passed, b[k].skipped), k
+            for q in QS:
+                assert a[k].quantile(q) == pytest.approx(b[k].quantile(q), rel=1e-9), (k, q)
+    assert streamed.phases.keys() == exact.phases.keys()
+    for agent, phases in streamed.phases.items():
+        assert phases.keys() == exact.phases[agent].keys()
+        for name, p in phases.items():
+            e = exact.phases[agent][name]
+            assert (p.runs, p.failed) == (e.runs, e.failed), (agent, name)
+            assert p.median == pytest.approx(e.median, rel=1e-9), (agent, name)
+
+
+@pytest.mark.parametrize("n_runs", [1, 2, 5, 10])
+def test_streaming_and_numpy_paths_agree(tmp_path, n_runs):
+    # Up to 30 runs per agent, within the t-digest's exact range
+    path = write_results(tmp_path / "results.csv", n_runs, seed=n_runs)
+    streamed = build_report.aggregate(results.iter_runs(path)).summary()
+    exact = groupby.summarize(colcache.load(path), QS)
+    assert_same_summary(streamed, exact)
+
+
+def test_quantiles_follow_numpy_linear_definition(tmp_path):
+    path = write_results(tmp_path / "results.csv", 10)
+    streamed = build_report.aggregate(results.iter_runs(path)).summary()
+    for agent, stats in streamed.by_agent.items():
+        times = [r.minutes for r in results.iter_runs(path)
+                 if r.agent == agent and r.status != "SKIP" and r.minutes is not None]
+        for q in QS:
+            assert stats.quantile(q) == pytest.approx(float(np.quantile(times, q)), rel=1e-12)
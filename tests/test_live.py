@@ -0,0 +1,58 @@
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import live
+import logcap
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(logcap, "BLOCK", 16 << 10)
+    data = b"".join(b"%08d\n" % i for i in range(100_000))
+    os.makedirs(tmp_path / "neon-claude-run1")
+    writer = logcap.LogWriter(str(tmp_path / "neon-claude-run1" / "claude_generation.log.gz"))
+    writer.write(data)
+    writer.close()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), live.make_handler(None, "", str(tmp_path)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", data
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as r:
+        return r.read(), r.headers["X-Log-Range"]
+
+
+def test_log_tail_by_default(server):
+    base, data = server
+    body, served = get(base + "/log?cell=neon-claude-run1")
+    assert body == data[-live.LOG_VIEW:]
+    assert served == f"{len(data) - live.LOG_VIEW}-{len(data)}/{len(data)}"
+
+
+def test_log_byte_range(server):
+    base, data = server
+    body, served = get(base + "/log?cell=neon-claude-run1&start=123456&end=123500")
+    assert body == data[123456:123500]
+    assert served == f"123456-123500/{len(data)}"
+    body, _ = get(base + f"/log?cell=neon-claude-run1&start=0&end={len(data)}")
+    assert body == data[:live.LOG_VIEW_MAX]
+
+
+@pytest.mark.parametrize("query, status", [
+    ("cell=neon-claude-run2", 404),
+    ("cell=../neon-claude-run1", 400),
+    ("cell=passwd", 400),
+    ("cell=neon-claude-run1&start=x", 400),
+])
+def test_log_rejects_bad_requests(server, query, status):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get(server[0] + "/log?" + query)
+    assert e.value.code == status
@@ -0,0 +1,55 @@
+import gzip
+import random
+
+import pytest
+
+import logcap
+
+
+def write_log(path, data, chunk=1000, **kw):
+    writer = logcap.LogWriter(str(path), **kw)
+    for i in range(0, len(data), chunk):
+        writer.write(data[i:i + chunk])
+    writer.close()
+    return str(path)
+
+
+@pytest.fixture
+def data():
+    rng = random.Random(3)
+    return b"".join(f"{i:06d} {rng.random():.12f}\n".encode() for i in range(60_000))
+
+
+def test_read_range_matches_the_raw_stream(tmp_path, data, monkeypatch):
+    monkeypatch.setattr(logcap, "BLOCK", 64 << 10)
+    log = write_log(tmp_path / "a.log.gz", data)
+    index = logcap.load_index(log)
+    assert len(index["blocks"]) > 10
+    assert logcap.retained(index) == len(data)
+    with gzip.open(log) as f:
+        assert f.read() == data
+    rng = random.Random(0)
+    for _ in range(50):
+        start = rng.randrange(len(data))
+        end = start + rng.randrange(1, 200_000)
+        assert logcap.read_range(log, start, end) == data[start:end]
+    assert logcap.read_range(log, len(data) - 10, None, index) == data[-10:]
+    assert logcap.read_range(log, len(data), len(data) + 5) == b""
+
+
+def test_capped_log_keeps_head_marker_and_tail(tmp_path, data):
+    log = write_log(tmp_path / "c.log.gz", data, cap=200 << 10, tail=50 << 10)
+    index = logcap.load_index(log)
+    assert index["seen"] == len(data)
+    skipped = index["omitted"][1]
+    kept = logcap.read_range(log)
+    assert len(kept) == logcap.retained(index)
+    assert kept.startswith(data[:150 << 10])
+    assert kept.endswith(data[-(50 << 10):])
+    assert f"[... {skipped} bytes omitted ...]".encode() in kept
+
+
+def test_empty_log(tmp_path):
+    log = write_log(tmp_path / "e.log.gz", b"")
+    assert logcap.retained(logcap.load_index(log)) == 0
+    assert logcap.read_range(log) == b""
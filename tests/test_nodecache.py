@@ -0,0 +1,93 @@
+import json
+import os
+import stat
+
+import pytest
+
+import nodecache
+
+FAKE_NPM = """#!/bin/sh
+# npm ci stand-in: installs one package with a .bin link, logs where it ran
+echo "$PWD" >> "{log}"
+rm -rf node_modules
+mkdir -p node_modules/jest node_modules/.bin
+echo "module.exports = 'jest'" > node_modules/jest/index.js
+ln -s ../jest/index.js node_modules/.bin/jest
+"""
+
+
+@pytest.fixture
+def npm(tmp_path):
+    path = tmp_path / "npm"
+    log = tmp_path / "npm.log"
+    path.write_text(FAKE_NPM.format(log=log))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path), log
+
+
+def project(root, lock='{"lockfileVersion": 3, "packages": {"node_modules/jest": {"version": "29.7.0"}}}',
+            scripts=None, npmrc=None):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "package.json").write_text(json.dumps({"name": "neon", "scripts": scripts or {"test": "jest"}}))
+    if lock is not None:
+        (root / "package-lock.json").write_text(lock)
+    if npmrc is not None:
+        (root / ".npmrc").write_text(npmrc)
+    return str(root)
+
+
+def test_key_follows_lockfile_and_npmrc(tmp_path):
+    base = nodecache.cache_key(project(tmp_path / "a"))
+    assert base == nodecache.cache_key(project(tmp_path / "b"))
+    assert nodecache.cache_key(project(tmp_path / "c", lock='{"lockfileVersion": 2}')) != base
+    assert nodecache.cache_key(project(tmp_path / "d", npmrc="registry=https://example.com\n")) != base
+
+
+@pytest.mark.parametrize("kw", [
+    {"lock": None},
+    {"scripts": {"postinstall": "node build.js"}},
+    {"lock": '{"packages": {"node_modules/x": {"resolved": "file:../x"}}}'},
+    {"lock": '{"packages": {"node_modules/x": {"link": true}}}'},
+])
+def test_projects_that_depend_on_more_than_the_lockfile_are_uncacheable(tmp_path, kw):
+    assert nodecache.cache_key(project(tmp_path / "p", **kw)) is None
+
+
+def test_install_fills_the_store_once_and_links_it(tmp_path, npm):
+    npm_bin, log = npm
+    cache = str(tmp_path / "store")
+    first, second = project(tmp_path / "first"), project(tmp_path / "second")
+    assert nodecache.install(first, cache, npm_bin) == "miss"
+    assert nodecache.install(second, cache, npm_bin) == "hit"
+    # npm ci ran once, in the store, not in a project
+    ran = log.read_text().split()
+    assert len(ran) == 1 and ran[0].startswith(cache)
+    for p in (first, second):
+        mods = os.path.join(p, "node_modules")
+        assert open(os.path.join(mods, ".bin", "jest")).read() == "module.exports = 'jest'\n"
+        assert os.readlink(os.path.join(mods, ".bin", "jest")) == "../jest/index.js"
+    assert os.path.samefile(os.path.join(first, "node_modules", "jest", "index.js"),
+                            os.path.join(second, "node_modules", "jest", "index.js"))
+
+
+def test_install_replaces_existing_node_modules(tmp_path, npm):
+    p = project(tmp_path / "p")
+    os.makedirs(os.path.join(p, "node_modules", "stale"))
+    nodecache.install(p, str(tmp_path / "store"), npm[0])
+    assert sorted(os.listdir(os.path.join(p, "node_modules"))) == [".bin", "jest"]
+
+
+def test_a_new_lockfile_is_a_new_entry(tmp_path, npm):
+    npm_bin, log = npm
+    cache = str(tmp_path / "store")
+    nodecache.install(project(tmp_path / "a"), cache, npm_bin)
+    assert nodecache.install(project(tmp_path / "b", lock='{"lockfileVersion": 2}'), cache, npm_bin) == "miss"
+    assert len(log.read_text().split()) == 2
+
+
+def test_uncacheable_projects_run_npm_ci_in_place(tmp_path, npm):
+    npm_bin, log = npm
+    p = project(tmp_path / "p", lock=None)
+    assert nodecache.install(p, str(tmp_path / "store"), npm_bin) == "uncached"
+    assert log.read_text().split() == [p]
+    assert not os.path.exists(tmp_path / "store")
@@ -0,0 +1,146 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+import orchestrate
+
+# Stands in for `coding-agent-eval.sh --cell TASK RUN_ID AGENT --base-dir DIR`:
+# logs when it starts and ends, appends its results.csv row and marker like
+# run_agent_once, and fails for the task "broken"
+STUB = r"""#!/bin/bash
+task=$2 run_id=$3 agent=$4 base=$6
+echo "start $agent $(date +%s.%N)" >> "$base/events"
+echo "generating $task"
+printf 'partial line'
+sleep 0.15
+echo "end $agent $(date +%s.%N)" >> "$base/events"
+[[ $task == broken ]] && exit 3
+row="$task,$run_id,$agent,Y,0.1"
+mkdir -p "$base/$task-$agent-run$run_id"
+echo "$row" >> "$base/results.csv"
+echo "$row" > "$base/$task-$agent-run$run_id/.cell-done"
+echo "SUCCESS=Y"
+"""
+
+
+@pytest.fixture
+def stub(tmp_path):
+    script = tmp_path / "stub.sh"
+    script.write_text(STUB)
+    base = tmp_path / "base"
+    base.mkdir()
+    (base / "results.csv").write_text("Task,RunId,Agent,Success(Y/N),Time(min)\n")
+    return str(script), str(base)
+
+
+def peak_concurrency(base):
+    """(most cells at once, {agent: most cells of agent at once}) from the
+    stub's event log."""
+    with open(os.path.join(base, "events")) as f:
+        events = sorted((float(t), kind == "start", agent)
+                        for kind, agent, t in (line.split() for line in f))
+    total = peak = 0
+    running, peaks = {}, {}
+    for _, start, agent in events:
+        d = 1 if start else -1
+        total += d
+        running[agent] = running.get(agent, 0) + d
+        peak = max(peak, total)
+        peaks[agent] = max(peaks.get(agent, 0), running[agent])
+    return peak, peaks
+
+
+def rows(base):
+    with open(os.path.join(base, "results.csv")) as f:
+        return f.read().splitlines()[1:]
+
+
+def test_default_runs_one_cell_per_agent(stub, capfd):
+    script, base = stub
+    assert orchestrate.main(["--script", script, "--base-dir", base, "--tasks", "a,b,c",
+                             "--agents", "claude,gemini", "--runs", "1"]) == 0
+    peak, peaks = peak_concurrency(base)
+    assert peaks == {"claude": 1, "gemini": 1}
+    assert peak == 2
+    assert len(rows(base)) == 6
+    assert "2 at a time" in capfd.readouterr().out
+
+
+def test_jobs_and_agent_caps(stub, capfd):
+    script, base = stub
+    orchestrate.main(["--script", script, "--base-dir", base, "--tasks", "a,b,c,d",
+                      "--agents", "claude,gemini", "--jobs", "3", "--agent-jobs", "claude=1"])
+    peak, peaks = peak_concurrency(base)
+    assert peak <= 3
+    assert peaks["claude"] == 1
+    assert peaks["gemini"] == 2
+    assert len(rows(base)) == 8
+
+
+def test_capped_agent_does_not_hold_up_the_queue():
+    orch = orchestrate.Orchestrator("x", "b", [("a", 1, "claude"), ("a", 2, "claude"), ("a", 1, "gemini")],
+                                    jobs=3, caps={"claude": 1})
+    orch.running = {"claude": 1}
+    assert orch._startable() == 2
+
+
+def test_output_is_prefixed_and_failures_reported(stub):
+    script, base = stub
+    out = io.BytesIO()
+    cells = orchestrate.expand(["ok", "broken"], ["claude"], 1)
+    orch = orchestrate.Orchestrator(script, base, cells, 2, out=out)
+    failed = asyncio.run(orch.run())
+    assert failed == ["broken/claude#1"]
+    lines = out.getvalue().decode().splitlines()
+    assert "[ok/claude#1] generating ok" in lines
+    assert "[ok/claude#1] partial lineSUCCESS=Y" in lines
+    assert any(line.startswith("==> [") and "ok/claude#1: Y in" in line for line in lines)
+    assert any("broken/claude#1: cell exited 3" in line for line in lines)
+
+
+def test_resume_runs_only_unfinished_cells(stub, capfd):
+    script, base = stub
+    cells = orchestrate.expand(["a", "b", "c"], ["claude", "gemini"], 1)
+    # Interrupted: a's cells finished normally; b/claude finished, but the
+    # results.csv its row went into was cut short; the rest never finished
+    # (c/gemini has a workspace but no marker)
+    for task, run_id, agent in cells[:3]:
+        row = f"{task},{run_id},{agent},Y,0.1"
+        ws = orchestrate.workspace(base, (task, run_id, agent))
+        os.makedirs(ws)
+        with open(os.path.join(ws, orchestrate.DONE_MARKER), "w") as f:
+            f.write(row + "\n")
+        if task == "a":
+            with open(os.path.join(base, "results.csv"), "a") as f:
+                f.write(row + "\n")
+    os.makedirs(orchestrate.workspace(base, ("c", 1, "gemini")))
+    with open(os.path.join(base, "timeline.csv"), "w") as f:
+        f.write("Task,RunId,Agent,Phase,Start,End,ExitCode\n")
+        for task, run_id, agent in cells:
+            f.write(f"{task},{run_id},{agent},generation,1.0,2.0,0\n")
+
+    assert orchestrate.main(["--script", script, "--base-dir", base, "--tasks", "a,b,c",
+                             "--agents", "claude,gemini", "--resume"]) == 0
+    assert "Resuming: 3 of 6 cells already finished" in capfd.readouterr().out
+    with open(os.path.join(base, "events")) as f:
+        started = sorted(line.split()[1] for line in f if line.startswith("start"))
+    assert started == ["claude", "gemini", "gemini"]
+    got = rows(base)
+    assert sorted(got) == sorted(f"{t},{r},{a},Y,0.1" for t, r, a in cells)
+    assert len(set(got)) == len(got)
+    # Timeline rows of the cells that had not finished were dropped
+    with open(os.path.join(base, "timeline.csv")) as f:
+        timeline = f.read().splitlines()
+    assert [line.split(",")[0] + "/" + line.split(",")[2] for line in timeline[1:]] == \
+        ["a/claude", "a/gemini", "b/claude"]
+
+
+def test_resume_twice_adds_nothing(stub):
+    script, base = stub
+    cells = orchestrate.expand(["a"], ["claude"], 2)
+    asyncio.run(orchestrate.Orchestrator(script, base, cells, 1, out=io.BytesIO()).run())
+    assert orchestrate.resume(base, cells) == []
+    assert orchestrate.resume(base, cells) == []
+    assert len(rows(base)) == 2
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+import build_report
+import logcap
+import reportcache
+import transcripts
+
+TIMELINE_HEADER = ("Task,RunId,Agent,Phase,Start,End,ExitCode,UserCPU(s),SysCPU(s),MaxRSS(KB),"
+                   "InBlocks,OutBlocks,VolCtx,InvolCtx\n")
+
+
+def write_log(results_dir, data):
+    ws = results_dir / "neon-claude-run1"
+    ws.mkdir(exist_ok=True)
+    writer = logcap.LogWriter(str(ws / "claude_generation.log.gz"))
+    writer.write(data)
+    writer.close()
+
+
+def touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    (tmp_path / "results.csv").write_text("Task,RunId,Agent,Success(Y/N),Time(min)\n"
+                                          "neon,1,claude,N,3.0\nneon,1,gemini,Y,2.0\n")
+    (tmp_path / "timeline.csv").write_text(TIMELINE_HEADER + "neon,1,claude,generation,100.0,160.0,1,,,,,,,\n")
+    transcripts.write_metrics(str(tmp_path / transcripts.METRICS_NAME),
+                              {("neon", 1, "claude"): {"turns": 7, "tool_calls": 12}})
+    write_log(tmp_path, b"Traceback: first failure\n")
+    return tmp_path
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Names of the parts of the page each build renders."""
+    calls = []
+
+    def counting(name, render):
+        def wrapper(*args, **kw):
+            calls.append(name)
+            return render(*args, **kw)
+        return wrapper
+    monkeypatch.setattr(build_report, "render_fragments",
+                        counting("data", build_report.render_fragments))
+    for name, render in list(build_report.FILE_FRAGMENTS.items()):
+        monkeypatch.setitem(build_report.FILE_FRAGMENTS, name, counting(name, render))
+    return calls
+
+
+def build(results_dir, calls):
+    del calls[:]
+    timings = {}
+    path = build_report.build(str(results_dir), resamples=0, timings=timings)
+    with open(path) as f:
+        return f.read(), sorted(calls), timings
+
+
+def test_first_build_renders_everything(results_dir, rendered):
+    html, calls, _ = build(results_dir, rendered)
+    assert calls == ["data", "efficiency", "failed_logs", "timeline"]
+    assert "first failure" in html
+
+
+def test_noop_rebuild_skips_rendering(results_dir, rendered):
+    first, _, _ = build(results_dir, rendered)
+    html, calls, timings = build(results_dir, rendered)
+    assert calls == []
+    assert list(timings) == ["memo"]
+    assert html == first
+
+
+@pytest.mark.parametrize("edit, stale", [
+    ("results.csv", ["data", "efficiency", "failed_logs"]),
+    ("timeline.csv", ["timeline"]),
+    ("metrics.csv", ["efficiency"]),
+    ("log", ["failed_logs"]),
+])
+def test_edits_rerender_only_what_depends_on_them(results_dir, rendered, edit, stale):
+    build(results_dir, rendered)
+    if edit == "results.csv":
+        with open(results_dir / "results.csv", "a") as f:
+            f.write("neon,2,claude,Y,1.0\n")
+    elif edit == "timeline.csv":
+        with open(results_dir / "timeline.csv", "a") as f:
+            f.write("neon,1,gemini,generation,100.0,150.0,0,,,,,,,\n")
+    elif edit == "metrics.csv":
+        transcripts.write_metrics(str(results_dir / transcripts.METRICS_NAME),
+                                  {("neon", 1, "claude"): {"turns": 9, "tool_calls": 12}})
+        touch(results_dir / transcripts.METRICS_NAME)
+    else:
+        write_log(results_dir, b"Traceback: second failure, longer\n")
+        touch(results_dir / "neon-claude-run1" / "claude_generation.log.gz")
+    html, calls, _ = build(results_dir, rendered)
+    assert calls == stale
+    if edit == "log":
+        assert "second failure" in html and "first failure" not in html
+    # Nothing is left stale for the next build
+    assert build(results_dir, rendered)[1] == []
+
+
+def test_editing_the_report_rebuilds_it_from_fragments(results_dir, rendered):
+    first, _, _ = build(results_dir, rendered)
+    (results_dir / "report.html").write_text("clobbered")
+    html, calls, _ = build(results_dir, rendered)
+    assert calls == []
+    assert html == first
+
+
+def test_logs_digest_follows_log_size_and_mtime(results_dir):
+    before = reportcache.logs_digest(str(results_dir))
+    assert reportcache.logs_digest(str(results_dir)) == before
+    touch(results_dir / "neon-claude-run1" / "claude_generation.log.gz")
+    assert reportcache.logs_digest(str(results_dir)) != before
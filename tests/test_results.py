@@ -0,0 +1,37 @@
+import pytest
+
+import colcache
+import results
+from results import HEADER, HEADER_V2, PHASES
+
+
+def write(path, header, rows):
+    path.write_text(",".join(header) + "\n" + "".join(r + "\n" for r in rows))
+    return str(path)
+
+
+def test_v1_time_is_minutes_dot_seconds(tmp_path):
+    csv_path = write(tmp_path / "results.csv", HEADER,
+                     ["neon,1,claude,Y,1.5", "neon,2,claude,Y,1.50", "neon,3,claude,N,12.0",
+                      "neon,4,claude,N,n/a", "neon,5,claude,SKIP,0"])
+    runs = list(results.iter_runs(csv_path))
+    assert [r.minutes * 60 for r in runs[:3]] == pytest.approx([65, 110, 720])
+    assert runs[3].minutes is None
+    assert runs[4].minutes == 0
+    assert all(r.phases is None for r in runs)
+
+
+def test_v2_time_is_decimal_minutes(tmp_path):
+    phases = "," * (2 * len(PHASES))
+    csv_path = write(tmp_path / "results.csv", HEADER_V2, [f"neon,1,claude,Y,1.5{phases}"])
+    assert next(results.iter_runs(csv_path)).minutes == 1.5
+
+
+def test_v1_decoding_reaches_the_sidecar_and_tail(tmp_path):
+    csv_path = write(tmp_path / "results.csv", HEADER, ["neon,1,claude,Y,1.5"])
+    cols = colcache.load(csv_path)
+    try:
+        assert cols.minutes[0] * 60 == pytest.approx(65, abs=1e-3)
+    finally:
+        cols.close()
+    assert results.CsvTail(csv_path).poll()[0].minutes * 60 == pytest.approx(65)
@@ -0,0 +1,84 @@
+import shutil
+import sqlite3
+
+import pytest
+
+import results_index
+
+HEADER = "Task,RunId,Agent,Success(Y/N),Time(min)\n"
+
+
+def write_results(root, name, rows):
+    d = root / name
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "results.csv").write_text(HEADER + "".join(r + "\n" for r in rows))
+
+
+@pytest.fixture
+def archive(tmp_path):
+    write_results(tmp_path, "eval_results_251001", ["neon,1,claude,Y,2.0", "neon,1,gemini,N,5.5"])
+    write_results(tmp_path, "eval_results_251002", ["neon,1,claude,N,3.0"])
+    write_results(tmp_path, "eval_results_251002_backup_101500", ["neon,1,claude,Y,1.0"])
+    return tmp_path
+
+
+def test_update_skips_backups_and_is_incremental(archive):
+    conn = results_index.connect(str(archive / "index.sqlite"))
+    assert results_index.update(conn, [str(archive)]) == (3, 0)
+    assert results_index.update(conn, [str(archive)]) == (0, 0)
+    with open(archive / "eval_results_251002" / "results.csv", "a") as f:
+        f.write("neon,2,claude,Y,4.0\n")
+    assert results_index.update(conn, [str(archive)]) == (1, 0)
+
+
+def test_update_drops_sources_that_are_gone(archive):
+    conn = results_index.connect(str(archive / "index.sqlite"))
+    results_index.update(conn, [str(archive)])
+    shutil.rmtree(archive / "eval_results_251001")
+    assert results_index.update(conn, [str(archive)]) == (0, 1)
+    runs = list(results_index.query_runs(conn))
+    assert [(r.agent, r.status) for r in runs] == [("claude", "N")]
+    assert conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0] == 1
+
+
+def test_update_leaves_sources_under_other_roots(archive, tmp_path_factory):
+    other = tmp_path_factory.mktemp("other")
+    write_results(other, "eval_results_250901", ["calculator,1,copilot,Y,1.5"])
+    conn = results_index.connect(str(archive / "index.sqlite"))
+    results_index.update(conn, [str(other)])
+    results_index.update(conn, [str(archive)])
+    assert {r.task for r in results_index.query_runs(conn)} == {"neon", "calculator"}
+
+
+def test_typed_filters(archive):
+    db = str(archive / "index.sqlite")
+    results_index.update(results_index.connect(db), [str(archive)])
+    conn = results_index.connect(db, readonly=True)
+    q = lambda **kw: [(r.agent, r.minutes) for r in results_index.query_runs(conn, **kw)]
+    assert q(status="Y") == [("claude", 2.0)]
+    assert q(agent="claude", since="2025-10-02") == [("claude", 3.0)]
+    assert q(min_minutes=2.5, max_minutes=5.0) == [("claude", 3.0)]
+    # Filter values are bound, never spliced into the SQL
+    assert q(task="neon' OR '1'='1") == []
+
+
+def test_queries_are_read_only(archive):
+    db = str(archive / "index.sqlite")
+    results_index.update(results_index.connect(db), [str(archive)])
+    conn = results_index.connect(db, readonly=True)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM runs")
+
+
+def test_index_from_an_older_parser_is_rebuilt(archive):
+    db = str(archive / "index.sqlite")
+    conn = results_index.connect(db)
+    results_index.update(conn, [str(archive)])
+    conn.execute("UPDATE runs SET minutes = 5.5")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    conn = results_index.connect(db)
+    assert results_index.update(conn, [str(archive)]) == (3, 0)
+    minutes = sorted(r.minutes for r in results_index.query_runs(conn))
+    assert minutes == pytest.approx([2.0, 3.0, 5 + 5 / 60])
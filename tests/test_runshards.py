@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import random
+import re
+
+import pytest
+
+import colcache
+import results
+from runshards import RunShardWriter
+
+SHARD = re.compile(r"^loadRunShard\((\d+),(.*)\);\n$", re.S)
+
+
+def write_results(path, n, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write(",".join(results.HEADER_V2) + "\n")
+        for i in range(n):
+            minutes = "n/a" if rng.random() < 0.05 else "%.2f" % rng.uniform(0.1, 30)
+            f.write(f"{rng.choice(['neon', 'todo', 'chess'])},{i // 7 + 1},"
+                    f"{rng.choice(['claude', 'gemini', 'codex'])},{rng.choice(['Y', 'N', 'SKIP'])},{minutes}"
+                    + "," * 2 * len(results.PHASES) + "\n")
+    return str(path)
+
+
+def read_shards(out_dir, manifest):
+    """Rows decoded from every shard in page order, checking each .gz copy
+    and the page layout on the way."""
+    rows = []
+    for i in range(manifest["shards"]):
+        base = os.path.join(out_dir, "%05d.js" % i)
+        with open(base, "rb") as f:
+            body = f.read()
+        with gzip.open(base + ".gz", "rb") as f:
+            assert f.read() == body
+        m = SHARD.match(body.decode())
+        assert m and int(m.group(1)) == i
+        page = json.loads(m.group(2))
+        assert len({len(col) for col in page.values()}) == 1
+        size = len(page["r"])
+        # Every page but the last is full, so row k is on page k // shard
+        assert size == manifest["shard"] if i < manifest["shards"] - 1 else 0 < size <= manifest["shard"]
+        for t, r, a, s, mins in zip(page["t"], page["r"], page["a"], page["s"], page["m"]):
+            rows.append((manifest["tasks"][t], r, manifest["agents"][a], manifest["statuses"][s],
+                         None if mins == -1 else mins))
+    assert len(rows) == manifest["rows"]
+    assert sorted(n for n in os.listdir(out_dir)) == sorted(
+        "%05d.js%s" % (i, gz) for i in range(manifest["shards"]) for gz in ("", ".gz"))
+    return rows
+
+
+def expected(csv_path):
+    return [(r.task, r.run_id, r.agent, r.status, None if r.minutes is None else round(r.minutes * 100))
+            for r in results.iter_runs(csv_path)]
+
+
+@pytest.mark.parametrize("n", [1, 99, 100, 101, 1234])
+def test_streamed_shards_match_the_csv(tmp_path, n):
+    csv_path = write_results(tmp_path / "results.csv", n)
+    writer = RunShardWriter(str(tmp_path / "runs"), shard_rows=100)
+    for run in results.iter_runs(csv_path):
+        writer.add(run)
+    manifest = writer.close()
+    assert manifest["shards"] == -(-n // 100)
+    assert read_shards(str(tmp_path / "runs"), manifest) == expected(csv_path)
+
+
+@pytest.mark.parametrize("n", [1, 100, 1234])
+def test_column_shards_match_the_csv(tmp_path, n):
+    csv_path = write_results(tmp_path / "results.csv", n, seed=n)
+    cols = colcache.load(csv_path)
+    try:
+        writer = RunShardWriter(str(tmp_path / "runs"), shard_rows=100)
+        writer.add_columns(cols)
+        manifest = writer.close()
+    finally:
+        cols.close()
+    assert read_shards(str(tmp_path / "runs"), manifest) == expected(csv_path)
+
+
+def test_smaller_rebuild_drops_leftover_shards(tmp_path):
+    out = str(tmp_path / "runs")
+    for n in (1234, 250):
+        csv_path = write_results(tmp_path / "results.csv", n)
+        writer = RunShardWriter(out, shard_rows=100)
+        for run in results.iter_runs(csv_path):
+            writer.add(run)
+        manifest = writer.close()
+    assert manifest["shards"] == 3
+    assert read_shards(out, manifest) == expected(csv_path)
@@ -0,0 +1,109 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+import rusage
+from timeline import USAGE_COLUMNS, Phase
+
+RUSAGE = os.path.join(os.path.dirname(rusage.__file__), "rusage.py")
+
+
+def supervised(tmp_path, *cmd):
+    """Run cmd under `rusage.py run`; returns (exit code, usage columns)."""
+    out = tmp_path / "usage"
+    ec = subprocess.run([sys.executable, RUSAGE, "run", "--out", str(out), "--", *cmd]).returncode
+    if not out.exists():
+        return ec, None
+    return ec, dict(zip(USAGE_COLUMNS, map(float, out.read_text().strip().split(","))))
+
+
+def python(code):
+    return (sys.executable, "-c", code)
+
+
+def test_exit_code_and_usage_of_a_short_child(tmp_path):
+    ec, usage = supervised(tmp_path, *python(
+        "import sys, time\n"
+        "block = bytearray(64 << 20)\n"
+        "t = time.process_time()\n"
+        "while time.process_time() - t < 0.2: pass\n"
+        "sys.exit(3)"))
+    assert ec == 3
+    assert usage["UserCPU(s)"] + usage["SysCPU(s)"] >= 0.15
+    assert usage["MaxRSS(KB)"] >= 64 << 10
+    assert usage["VolCtx"] >= 0 and usage["InvolCtx"] >= 0
+
+
+def test_usage_covers_descendants_that_were_waited_for(tmp_path):
+    _, usage = supervised(tmp_path, *python(
+        "import subprocess, sys\n"
+        "subprocess.run([sys.executable, '-c', 'import time\\nt = time.process_time()\\n"
+        "while time.process_time() - t < 0.3: pass'])"))
+    assert usage["UserCPU(s)"] + usage["SysCPU(s)"] >= 0.25
+
+
+def test_a_signalled_child_exits_128_plus_n(tmp_path):
+    ec, usage = supervised(tmp_path, *python("import os, signal; os.kill(os.getpid(), signal.SIGKILL)"))
+    assert ec == 128 + signal.SIGKILL
+    assert usage is not None
+
+
+def test_missing_and_unexecutable_commands(tmp_path):
+    assert supervised(tmp_path, str(tmp_path / "missing")) == (127, None)
+    script = tmp_path / "not-executable"
+    script.write_text("#!/bin/sh\n")
+    assert supervised(tmp_path, str(script)) == (126, None)
+
+
+def test_signals_are_forwarded_to_the_child(tmp_path):
+    ready = tmp_path / "ready"
+    proc = subprocess.Popen([sys.executable, RUSAGE, "run", "--out", str(tmp_path / "usage"), "--",
+                             *python(f"import time; open({str(ready)!r}, 'w').close(); time.sleep(30)")])
+    deadline = time.monotonic() + 10
+    while not ready.exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(10) == 128 + signal.SIGTERM
+    assert (tmp_path / "usage").exists()
+
+
+def phase(agent, name, start, end, cpu, rss):
+    usage = dict.fromkeys(USAGE_COLUMNS, 0.0)
+    usage.update({"UserCPU(s)": cpu * 0.75, "SysCPU(s)": cpu * 0.25, "MaxRSS(KB)": rss,
+                  "InBlocks": 8, "OutBlocks": 16})
+    return Phase("neon", 1, agent, name, start, end, 0, usage)
+
+
+def test_summarize_sweeps_concurrent_phases():
+    phases = [
+        phase("claude", "generation", 0, 10, 10, 100_000),    # 1 core
+        phase("gemini", "generation", 5, 15, 20, 200_000),    # 2 cores, overlaps the first
+        phase("claude", "tests", 15, 20, 5, 50_000),          # starts as the second ends
+        Phase("neon", 1, "claude", "setup", 0, 1, 0),         # not supervised
+    ]
+    s = rusage.summarize(phases)
+    assert s["cpu_s"] == pytest.approx(35)
+    assert s["mean_cores"] == pytest.approx(35 / 20)
+    assert s["peak_cores"] == pytest.approx(3)
+    assert s["peak_rss_kb"] == 300_000
+    rows = {(r["agent"], r["phase"]): r for r in s["rows"]}
+    assert set(rows) == {("claude", "generation"), ("claude", "tests"), ("gemini", "generation")}
+    g = rows[("gemini", "generation")]
+    assert (g["runs"], g["cpu_s"], g["cores"], g["rss_max_kb"]) == (1, 20, 2, 200_000)
+    assert (g["read_b"], g["written_b"]) == (8 * 512, 16 * 512)
+
+
+def test_summarize_takes_medians_per_agent_and_phase():
+    phases = [phase("claude", "tests", i * 10, i * 10 + 4, cpu, rss)
+              for i, (cpu, rss) in enumerate([(1, 10), (2, 30), (8, 20)])]
+    (row,) = rusage.summarize(phases)["rows"]
+    assert (row["runs"], row["cpu_s"], row["cores"], row["rss_kb"], row["rss_max_kb"]) == (3, 2, 0.5, 20, 30)
+    assert rusage.summarize(phases)["peak_rss_kb"] == 30
+
+
+def test_summarize_without_usage():
+    assert rusage.summarize([Phase("neon", 1, "claude", "setup", 0, 1, 0)]) is None
@@ -0,0 +1,112 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from sketch import TDigest
+
+QS = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def samples(dist, n, seed=0):
+    rng = random.Random(seed)
+    draw = {
+        "uniform": lambda: rng.uniform(0, 100),
+        "normal": lambda: rng.gauss(10, 3),
+        "lognormal": lambda: rng.lognormvariate(1, 1),   # skewed, like durations
+        "ties": lambda: float(rng.randrange(5)),
+    }[dist]
+    return [draw() for _ in range(n)]
+
+
+def tolerance(q, n):
+    """Allowed rank error: half a percentile in the body, tighter at the
+    tails where the k1 scale function keeps centroids small."""
+    return (0.002 if q < 0.05 or q > 0.95 else 0.005) + 1 / n
+
+
+def within_rank(data, q, estimate, eps):
+    """estimate lies between the exact (sorted data) quantiles at q - eps
+    and q + eps."""
+    n = len(data)
+    lo = data[max(0, math.floor((q - eps) * (n - 1)))]
+    hi = data[min(n - 1, math.ceil((q + eps) * (n - 1)))]
+    return lo <= estimate <= hi
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 50, 100])
+def test_small_groups_are_exact(n):
+    data = samples("lognormal", n)
+    t = TDigest()
+    t.update(data)
+    assert t.quantile(0.5) == pytest.approx(statistics.median(data))
+    assert t.quantile(0) == min(data)
+    assert t.quantile(1) == max(data)
+
+
+@pytest.mark.parametrize("dist", ["uniform", "normal", "lognormal"])
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000])
+def test_rank_error_is_bounded(dist, n):
+    data = samples(dist, n)
+    t = TDigest()
+    t.update(data)
+    data.sort()
+    for q in QS:
+        assert within_rank(data, q, t.quantile(q), tolerance(q, n)), q
+
+
+@pytest.mark.parametrize("n", [1_000, 100_000])
+def test_ties_stay_between_neighbouring_values(n):
+    # Centroids of a point mass are interpolated between, so an estimate
+    # may fall between two of the values, but no further
+    data = sorted(samples("ties", n))
+    values = sorted(set(data))
+    t = TDigest()
+    t.update(data)
+    for q in QS:
+        exact = data[round(q * (n - 1))]
+        i = values.index(exact)
+        assert values[max(0, i - 1)] <= t.quantile(q) <= values[min(len(values) - 1, i + 1)], q
+
+
+@pytest.mark.parametrize("dist", ["uniform", "lognormal"])
+def test_close_to_statistics_quantiles(dist):
+    data = samples(dist, 20_000)
+    t = TDigest()
+    t.update(data)
+    exact = statistics.quantiles(data, n=100, method="inclusive")
+    spread = max(data) - min(data)
+    for pct in (10, 25, 50, 75, 90, 99):
+        assert t.quantile(pct / 100) == pytest.approx(exact[pct - 1], abs=0.01 * spread)
+
+
+@pytest.mark.parametrize("parts", [2, 5, 20])
+def test_merge_matches_one_digest_over_all_values(parts):
+    data = samples("lognormal", 50_000, seed=parts)
+    merged = TDigest()
+    for i in range(parts):
+        d = TDigest()
+        d.update(data[i::parts])
+        merged.merge(d)
+    assert merged.count == len(data)
+    assert (merged.min, merged.max) == (min(data), max(data))
+    data.sort()
+    for q in QS:
+        assert within_rank(data, q, merged.quantile(q), tolerance(q, len(data))), q
+
+
+def test_merge_of_small_digests_stays_exact():
+    a, b = TDigest(), TDigest()
+    a.update([1.0, 5.0, 9.0])
+    b.update([2.0, 4.0])
+    a.merge(b)
+    assert a.quantile(0.5) == statistics.median([1.0, 2.0, 4.0, 5.0, 9.0])
+
+
+def test_round_trip_and_empty():
+    assert TDigest().quantile(0.5) is None
+    t = TDigest()
+    t.update(samples("normal", 5_000))
+    u = TDigest.from_dict(t.to_dict())
+    assert [u.quantile(q) for q in QS] == [t.quantile(q) for q in QS]
@@ -0,0 +1,125 @@
+import os
+import shutil
+
+import pytest
+
+import snapshot
+
+
+def workspace(results, name, files, done=True):
+    ws = results / name
+    for rel, text in files.items():
+        path = ws / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    if done:
+        (ws / snapshot.DONE_MARKER).write_text("todo,1,claude,Y,1.00\n")
+    return ws
+
+
+FILES = {
+    "prompt.txt": "Build a todo app\n",
+    ".claude/settings.json": '{"permissions": {}}\n',
+    "todo/app.py": "print('todo')\n",
+}
+
+
+@pytest.fixture
+def parent(tmp_path):
+    results = tmp_path / "results"
+    workspace(results, "todo_1_claude", FILES)
+    workspace(results, "todo_1_gemini", FILES)
+    return tmp_path
+
+
+def nlink(path):
+    return os.stat(path).st_nlink
+
+
+def objects(store):
+    return sorted(e.name for e in snapshot._objects(store))
+
+
+def test_identical_workspaces_share_one_object_per_file(parent):
+    results = parent / "results"
+    store = snapshot.default_store(results)
+    seen, hashed, freed = snapshot.dedupe([str(results)])
+    assert (seen, hashed) == (8, 8)   # three files and the marker per workspace
+    assert freed == sum(len(t) for t in FILES.values()) + len("todo,1,claude,Y,1.00\n")
+    assert len(objects(store)) == 4
+    for rel, text in FILES.items():
+        a, b = results / "todo_1_claude" / rel, results / "todo_1_gemini" / rel
+        assert a.read_text() == b.read_text() == text
+        assert os.path.samefile(a, b)
+        assert nlink(a) == 3   # both workspaces and the store
+
+
+def test_dedupe_twice_hashes_nothing(parent):
+    results = parent / "results"
+    snapshot.dedupe([str(results)])
+    seen, hashed, freed = snapshot.dedupe([str(results)])
+    assert (seen, hashed, freed) == (8, 0, 0)
+    assert nlink(results / "todo_1_claude" / "prompt.txt") == 3
+
+
+def test_backup_links_to_the_same_objects(parent):
+    results = parent / "results"
+    snapshot.dedupe([str(results)])
+    backup = parent / "results.bak"
+    shutil.copytree(results, backup)
+    seen, hashed, _ = snapshot.dedupe([str(backup)], store=snapshot.default_store(results))
+    assert (seen, hashed) == (8, 8)
+    assert os.path.samefile(backup / "todo_1_claude" / "prompt.txt",
+                            results / "todo_1_claude" / "prompt.txt")
+    assert nlink(results / "todo_1_claude" / "prompt.txt") == 5
+
+
+def test_same_contents_with_another_mode_is_another_object(parent):
+    results = parent / "results"
+    os.chmod(results / "todo_1_gemini" / "todo" / "app.py", 0o755)
+    snapshot.dedupe([str(results)])
+    assert not os.path.samefile(results / "todo_1_claude" / "todo" / "app.py",
+                                results / "todo_1_gemini" / "todo" / "app.py")
+    assert os.stat(results / "todo_1_gemini" / "todo" / "app.py").st_mode & 0o777 == 0o755
+
+
+def test_unfinished_workspaces_and_venvs_are_left_alone(parent):
+    results = parent / "results"
+    cut_short = workspace(results, "todo_2_claude", FILES, done=False)
+    for ws in ("todo_1_claude", "todo_1_gemini"):
+        workspace(results, ws, {"venv/lib/site.py": "import os\n",
+                                "web/node_modules/x/index.js": "module.exports = 1\n"}, done=False)
+    seen, _, _ = snapshot.dedupe([str(results)])
+    assert seen == 8
+    for rel in FILES:
+        assert nlink(cut_short / rel) == 1
+    for ws in ("todo_1_claude", "todo_1_gemini"):
+        assert nlink(results / ws / "venv" / "lib" / "site.py") == 1
+        assert nlink(results / ws / "web" / "node_modules" / "x" / "index.js") == 1
+
+
+def test_gc_removes_only_objects_nothing_else_links(parent):
+    results = parent / "results"
+    backup = parent / "results.bak"
+    workspace(backup, "todo_1_claude", {"old.py": "gone\n"})
+    store = snapshot.default_store(results)
+    snapshot.dedupe([str(results), str(backup)])
+    assert len(objects(store)) == 5   # FILES, the marker, old.py
+
+    shutil.rmtree(backup)
+    removed, freed = snapshot.gc(store)
+    assert (removed, freed) == (1, len("gone\n"))
+    assert len(objects(store)) == 4
+    assert all(nlink(e.path) > 1 for e in snapshot._objects(store))
+    for rel, text in FILES.items():
+        assert (results / "todo_1_claude" / rel).read_text() == text
+    assert snapshot.gc(store) == (0, 0)
+
+
+def test_disk_usage_counts_shared_files_once(parent):
+    results = parent / "results"
+    before_apparent, before = snapshot.disk_usage([str(results)])
+    snapshot.dedupe([str(results)])
+    apparent, actual = snapshot.disk_usage([str(results)])
+    assert apparent == before_apparent
+    assert actual < before
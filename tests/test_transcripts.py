@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import logcap
+import transcripts
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "transcripts")
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def test_claude_stream_json():
+    m = transcripts.parse(fixture("claude_stream.jsonl"), "claude")
+    # num_turns of the result event wins over the assistant messages counted
+    assert m["turns"] == 9
+    assert (m["tool_calls"], m["writes"], m["reads"], m["shell"], m["other_tools"]) == (6, 2, 1, 1, 2)
+    assert m["input_tokens"] == 40 + 12000 + 48000
+    assert m["output_tokens"] == 1950
+    assert m["cost_usd"] == 0.1875
+    assert m["first_write_s"] is None      # no logcap index
+    assert m["log_bytes"] == os.path.getsize(fixture("claude_stream.jsonl"))
+
+
+def test_claude_turns_without_result_event(tmp_path):
+    """An interrupted run has no result event; assistant messages split
+    over several events count once."""
+    with open(fixture("claude_stream.jsonl"), "rb") as f:
+        lines = f.readlines()[:-1]
+    log = tmp_path / "claude_generation.log"
+    log.write_bytes(b"".join(lines))
+    m = transcripts.parse(str(log))
+    assert m["turns"] == 5
+    assert m["tool_calls"] == 6
+    assert m["input_tokens"] is None and m["cost_usd"] is None
+
+
+def test_gemini_stream_json():
+    m = transcripts.parse(fixture("gemini_stream.jsonl"), "gemini")
+    assert m["turns"] == 3
+    assert (m["tool_calls"], m["writes"], m["reads"], m["shell"], m["other_tools"]) == (3, 1, 1, 1, 0)
+    assert (m["input_tokens"], m["output_tokens"]) == (14200, 1150)
+    assert m["cost_usd"] is None
+
+
+def test_gemini_json_stats():
+    m = transcripts.parse(fixture("gemini_json.log"), "gemini")
+    assert m["turns"] == 5
+    assert (m["tool_calls"], m["writes"], m["reads"], m["shell"], m["other_tools"]) == (4, 2, 1, 1, 0)
+    assert m["input_tokens"] == 21000 + 500
+    assert m["output_tokens"] == 1400 + 700 + 20
+
+
+@pytest.mark.parametrize("agent", ["claude", "copilot"])
+def test_plain_text_leaves_metrics_empty(agent):
+    m = transcripts.parse(fixture("claude_plain.log"), agent)
+    assert m["log_bytes"] == os.path.getsize(fixture("claude_plain.log"))
+    assert all(v is None for k, v in m.items() if k != "log_bytes")
+
+
+def test_first_write_from_logcap_marks(tmp_path):
+    with open(fixture("claude_stream.jsonl"), "rb") as f:
+        data = f.read()
+    log = str(tmp_path / "claude_generation.log.gz")
+    writer = logcap.LogWriter(log)
+    writer.write(data)
+    writer.close()
+    # Pretend the line with the first Write call arrived 12.5 s in
+    line_start = data.rindex(b"\n", 0, data.index(b'"name":"Write"')) + 1
+    index = logcap.load_index(log)
+    index["marks"] = [[0, 0.0], [line_start, 12.5]]
+    with open(log + ".idx", "w") as f:
+        json.dump(index, f)
+    m = transcripts.parse(log)
+    assert m["first_write_s"] == 12.5
+    assert m["writes"] == 2
+
+
+def test_scan_writes_metrics_and_keeps_finished_cells(tmp_path):
+    for ws, name in (("dodgefall-claude-run1", "claude_stream.jsonl"),
+                     ("calculator-gemini-run2", "gemini_stream.jsonl"),
+                     ("calculator-copilot-run1", "claude_plain.log")):
+        agent = ws.split("-")[1]
+        os.makedirs(tmp_path / ws)
+        shutil.copy(fixture(name), tmp_path / ws / f"{agent}_generation.log")
+    (tmp_path / "dodgefall-claude-run1" / transcripts.DONE_MARKER).touch()
+    assert transcripts.scan([str(tmp_path)], jobs=1) == (3, 0)
+    metrics = transcripts.read_metrics(str(tmp_path / transcripts.METRICS_NAME))
+    assert metrics[("dodgefall", 1, "claude")]["turns"] == 9
+    assert metrics[("calculator", 2, "gemini")]["input_tokens"] == 14200
+    assert metrics[("calculator", 1, "copilot")]["tool_calls"] is None
+    # Only the finished cell is taken from metrics.csv on the next scan
+    assert transcripts.scan([str(tmp_path)], jobs=1) == (2, 1)
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import venvcache
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("pytest==8.0\npygame>=2\n", "# tests\nPyGame >= 2\n\npytest==8.0  # pinned\n"),
+    ("Flask_SQLAlchemy\n", "flask-sqlalchemy\n"),
+])
+def test_cosmetic_differences_share_a_key(tmp_path, a, b):
+    assert (venvcache.cache_key(write(tmp_path / "a.txt", a))
+            == venvcache.cache_key(write(tmp_path / "b.txt", b)) is not None)
+
+
+def test_a_changed_requirement_changes_the_key(tmp_path):
+    keys = {venvcache.cache_key(write(tmp_path / f"{i}.txt", text))
+            for i, text in enumerate(["pytest==8.0\n", "pytest==8.1\n", "pytest==8.0\nrich\n"])}
+    assert len(keys) == 3
+
+
+@pytest.mark.parametrize("line", ["-e .", "-r base.txt", "./vendor/pkg", "pkg @ file:///tmp/pkg",
+                                  "git+https://example.com/pkg.git"])
+def test_local_requirements_are_uncacheable(tmp_path, line):
+    assert venvcache.cache_key(write(tmp_path / "r.txt", "pytest\n" + line + "\n")) is None
+
+
+def fake_env(path):
+    """A tree shaped like a venv that names its own path where a real one does."""
+    os.makedirs(os.path.join(path, "bin"))
+    os.makedirs(os.path.join(path, "lib", "site-packages", "pkg"))
+    with open(os.path.join(path, "pyvenv.cfg"), "w") as f:
+        f.write(f"home = /usr/bin\ncommand = python -m venv {path}\n")
+    with open(os.path.join(path, "bin", "tool"), "w") as f:
+        f.write(f"#!{path}/bin/python\nimport pkg\n")
+    os.chmod(os.path.join(path, "bin", "tool"), 0o755)
+    with open(os.path.join(path, "lib", "site-packages", "pkg", "__init__.py"), "w") as f:
+        f.write(f"# built in {path}\n")
+    os.symlink("python3", os.path.join(path, "bin", "python"))
+    os.symlink("/usr/bin/python3", os.path.join(path, "bin", "python3"))
+    os.symlink(os.path.join(path, "lib"), os.path.join(path, "lib64"))
+
+
+def test_clone_links_files_and_rewrites_paths(tmp_path):
+    env, dest = str(tmp_path / "cache" / "k"), str(tmp_path / "project" / "venv")
+    fake_env(env)
+    assert venvcache.clone(env, dest) == 3
+    # Files naming the env are rewritten for dest; everything else is a link
+    assert dest in open(os.path.join(dest, "pyvenv.cfg")).read()
+    assert open(os.path.join(dest, "bin", "tool")).read().startswith(f"#!{dest}/bin/python\n")
+    assert os.access(os.path.join(dest, "bin", "tool"), os.X_OK)
+    pkg = os.path.join("lib", "site-packages", "pkg", "__init__.py")
+    assert os.path.samefile(os.path.join(env, pkg), os.path.join(dest, pkg))
+    assert not os.path.samefile(os.path.join(env, "pyvenv.cfg"), os.path.join(dest, "pyvenv.cfg"))
+    # Relative links are kept, absolute links into the env follow it
+    assert os.readlink(os.path.join(dest, "bin", "python")) == "python3"
+    assert os.readlink(os.path.join(dest, "bin", "python3")) == "/usr/bin/python3"
+    assert os.readlink(os.path.join(dest, "lib64")) == os.path.join(dest, "lib")
+
+
+def test_clone_of_a_real_venv_runs_from_dest(tmp_path):
+    env, dest = str(tmp_path / "cache" / "k"), str(tmp_path / "project" / "venv")
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", env], check=True)
+    venvcache.clone(env, dest)
+    out = subprocess.run([os.path.join(dest, "bin", "python"), "-c", "import sys; print(sys.prefix)"],
+                         capture_output=True, text=True, check=True).stdout.strip()
+    assert os.path.realpath(out) == os.path.realpath(dest)
+
+
+def test_populate_fills_once_and_failures_leave_nothing(tmp_path):
+    cache, fills = str(tmp_path / "cache"), []
+
+    def fill(path):
+        fills.append(path)
+        fake_env(path)
+
+    env = venvcache.populate(cache, "k1", fill)
+    assert venvcache.populate(cache, "k1", fill) == env
+    assert fills == [env]
+    assert os.path.exists(os.path.join(env, venvcache.COMPLETE))
+
+    def broken(path):
+        os.makedirs(path)
+        raise subprocess.CalledProcessError(1, "pip")
+    with pytest.raises(subprocess.CalledProcessError):
+        venvcache.populate(cache, "k2", broken)
+    assert not os.path.exists(os.path.join(cache, "k2"))
+
+    # An interrupted build (no .complete) is thrown away and redone
+    os.makedirs(os.path.join(cache, "k3", "stale"))
+    env3 = venvcache.populate(cache, "k3", fill)
+    assert not os.path.exists(os.path.join(env3, "stale"))
+
+
+def _populate_slowly(cache, counter):
+    def fill(path):
+        with open(counter, "a") as f:
+            f.write("fill\n")
+        time.sleep(0.3)
+        fake_env(path)
+    venvcache.populate(cache, "shared", fill)
+
+
+def test_concurrent_populate_fills_once(tmp_path):
+    cache, counter = str(tmp_path / "cache"), str(tmp_path / "fills")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_populate_slowly, args=(cache, counter)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert [p.exitcode for p in procs] == [0] * 4
+    assert open(counter).read() == "fill\n"
+    assert os.path.exists(os.path.join(cache, "shared", venvcache.COMPLETE))
+
+
+def test_provision_hit_miss_and_uncached(tmp_path, monkeypatch):
+    builds = []
+
+    def build(env, requirements_path, python=sys.executable):
+        builds.append(env)
+        fake_env(env)
+    monkeypatch.setattr(venvcache, "build", build)
+    cache = str(tmp_path / "cache")
+    reqs = write(tmp_path / "a" / "requirements.txt", "pytest\n")
+    assert venvcache.provision(reqs, str(tmp_path / "a" / "venv"), cache) == "miss"
+    other = write(tmp_path / "b" / "requirements.txt", "PyTest  # same\n")
+    assert venvcache.provision(other, str(tmp_path / "b" / "venv"), cache) == "hit"
+    assert len(builds) == 1
+    # Re-provisioning replaces a venv that is already there
+    assert venvcache.provision(reqs, str(tmp_path / "a" / "venv"), cache) == "hit"
+    local = write(tmp_path / "c" / "requirements.txt", "-e .\n")
+    assert venvcache.provision(local, str(tmp_path / "c" / "venv"), cache) == "uncached"
+    assert builds[-1] == str(tmp_path / "c" / "venv")
+
+    assert venvcache.prepare(reqs, cache)[1] == "hit"
+    assert venvcache.prepare(local, cache) == (None, "uncached")
+    assert venvcache.main(["populate", "--cache", cache, local]) == 2